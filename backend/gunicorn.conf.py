@@ -36,4 +36,22 @@ limit_request_field_size = 8190
 
 # Restart workers
 max_worker_memory = 500 * 1024 * 1024  # 500MB
-worker_tmp_dir = "/dev/shm"  # Use memory for tmp files
\ No newline at end of file
+worker_tmp_dir = "/dev/shm"  # Use memory for tmp files
+# Shared vector cache: one memory-mapped snapshot per host instead of one
+# in-memory copy per worker
+os.environ.setdefault(
+    "VECTOR_SNAPSHOT_PATH",
+    os.path.join(worker_tmp_dir, "peterbot-vectors.snapshot")
+)
+# Shared response cache so every worker sees the same hits and clears
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "sqlite")
+os.environ.setdefault(
+    "RESPONSE_CACHE_PATH",
+    os.path.join(worker_tmp_dir, "peterbot-responses.sqlite")
+)
+# Conversations continue on any worker and survive worker recycling
+os.environ.setdefault("CHECKPOINTER_BACKEND", "sqlite")
+os.environ.setdefault(
+    "CHECKPOINTER_PATH",
+    os.path.join(worker_tmp_dir, "peterbot-conversations.sqlite")
+)
@@ -0,0 +1,43 @@
+"""Add compact embedding codes to documents stored before quantization was enabled."""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import settings
+from src.services.firebase_vector_store import FirebaseVectorStore
+import structlog
+
+logger = structlog.get_logger()
+
+
+async def backfill_quantized_embeddings():
+    """Write quantized code fields for every document that lacks them."""
+    
+    if settings.vector_quantization == "none":
+        logger.error("Set VECTOR_QUANTIZATION to int8 or binary first")
+        return
+    
+    store = FirebaseVectorStore()
+    processor = store.processor
+    collection = store.firebase.get_collection(store.collection_name)
+    
+    updated = 0
+    for doc in collection.stream():
+        doc_data = doc.to_dict()
+        if doc_data.get(processor.QUANTIZATION_FIELD) == settings.vector_quantization:
+            continue
+        
+        embedding = processor.extract_embedding(doc_data)
+        if not embedding:
+            continue
+        
+        collection.document(doc.id).update(processor.quantized_fields(embedding))
+        updated += 1
+    
+    logger.info(f"Backfilled {updated} documents with {settings.vector_quantization} codes")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_quantized_embeddings())
@@ -0,0 +1,61 @@
+"""Train and evaluate the local retrieval classifier on the labeled query set."""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from src.config import settings
+from src.services.embeddings import EmbeddingService
+from src.services.retrieval_classifier import RetrievalClassifier, load_labeled_queries
+import structlog
+
+logger = structlog.get_logger()
+
+
+def split(count: int, holdout: float, seed: int = 0):
+    """Shuffled train/test indices."""
+    order = np.random.default_rng(seed).permutation(count)
+    cut = int(count * (1 - holdout))
+    return order[:cut], order[cut:]
+
+
+def pick(values, rows):
+    """The entries of ``values`` at ``rows``, or None when there are no values."""
+    return None if values is None else [values[i] for i in rows]
+
+
+async def train_retrieval_classifier(output: str, dataset: str = None, keywords_only: bool = False):
+    """Report held-out metrics, then fit on all labeled queries and save."""
+    queries, labels = load_labeled_queries(Path(dataset) if dataset else None)
+    
+    embeddings = None
+    if not keywords_only:
+        embeddings = await EmbeddingService().embed_texts(queries)
+    
+    train, test = split(len(queries), holdout=0.25)
+    
+    model = RetrievalClassifier.fit(
+        pick(queries, train), pick(labels, train), pick(embeddings, train), settings.embedding_model
+    )
+    metrics = model.evaluate(
+        pick(queries, test), pick(labels, test), pick(embeddings, test),
+        settings.query_analyzer_min_confidence
+    )
+    logger.info("Held-out evaluation", **metrics)
+    
+    model = RetrievalClassifier.fit(queries, labels, embeddings, settings.embedding_model)
+    model.save(output)
+    logger.info(f"Saved classifier trained on {len(queries)} queries to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default=settings.retrieval_classifier_path or "retrieval_classifier.npz")
+    parser.add_argument("--dataset", default=None, help="Labeled JSONL file (defaults to the shipped set)")
+    parser.add_argument("--keywords-only", action="store_true", help="Skip embedding features")
+    args = parser.parse_args()
+    
+    asyncio.run(train_retrieval_classifier(args.output, args.dataset, args.keywords_only))
@@ -1,9 +1,13 @@
 """Admin endpoints for monitoring and cache management."""
 
+import os
 from fastapi import APIRouter, Depends
 import structlog
-from src.utils.cache import get_cache_stats, clear_cache, cleanup_expired
-from src.services.cached_vector_store import CachedVectorStore
+from src.utils.cache import aget_cache_stats, aclear_cache, acleanup_expired
+from src.core.agent import get_agent_runtime, reload_agent
+from src.services.embedding_cache import get_query_embedding_cache
+from src.services.semantic_cache import get_semantic_response_cache
+from src.api.routes.chat import get_chat_flight_stats
 from src.middleware.auth import require_admin
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -14,10 +18,18 @@ logger = structlog.get_logger()
 async def get_cache_statistics():
     """Get cache performance statistics."""
     try:
-        stats = get_cache_stats()
-        logger.info("cache_stats_requested", stats=stats)
+        stats = await aget_cache_stats()
+        embedding_cache = get_query_embedding_cache()
+        embedding_stats = embedding_cache.stats() if embedding_cache else None
+        semantic_cache = get_semantic_response_cache()
+        batcher = get_agent_runtime().embedding_service.batcher
+        logger.info("cache_stats_requested", stats=stats, embedding_cache_stats=embedding_stats)
         return {
             "cache_stats": stats,
+            "embedding_cache_stats": embedding_stats,
+            "embedding_batch_stats": batcher.stats() if batcher is not None else None,
+            "semantic_cache_stats": semantic_cache.stats() if semantic_cache else None,
+            "chat_coalescing_stats": get_chat_flight_stats(),
             "status": "success"
         }
     except Exception as e:
@@ -29,7 +41,7 @@ async def get_cache_statistics():
 async def clear_response_cache():
     """Clear all cached responses."""
     try:
-        clear_cache()
+        await aclear_cache()
         logger.info("cache_cleared_via_admin")
         return {
             "message": "Cache cleared successfully",
@@ -44,7 +56,7 @@ async def clear_response_cache():
 async def cleanup_expired_cache():
     """Remove expired cache entries."""
     try:
-        removed_count = cleanup_expired()
+        removed_count = await acleanup_expired()
         logger.info("cache_cleanup_via_admin", removed_count=removed_count)
         return {
             "message": f"Removed {removed_count} expired entries",
@@ -60,8 +72,7 @@ async def cleanup_expired_cache():
 async def get_vector_cache_info():
     """Get vector store cache information."""
     try:
-        vector_store = CachedVectorStore()
-        cache_info = vector_store.get_cache_info()
+        cache_info = get_agent_runtime().vector_store.get_cache_info()
         logger.info("vector_cache_info_requested", cache_info=cache_info)
         return {
             "vector_cache_info": cache_info,
@@ -69,4 +80,41 @@ async def get_vector_cache_info():
         }
     except Exception as e:
         logger.error("vector_cache_info_error", error=str(e))
-        return {"error": str(e), "status": "error"}
\ No newline at end of file
+        return {"error": str(e), "status": "error"}
+
+
+@router.get("/agent/stats", dependencies=[Depends(require_admin)])
+async def get_agent_statistics():
+    """Get agent execution mode and speculative retrieval statistics."""
+    try:
+        stats = get_agent_runtime().stats()
+        logger.info("agent_stats_requested", stats=stats)
+        return {
+            "agent_stats": stats,
+            "status": "success"
+        }
+    except Exception as e:
+        logger.error("agent_stats_error", error=str(e))
+        return {"error": str(e), "status": "error"}
+
+
+@router.post("/agent/reload", dependencies=[Depends(require_admin)])
+async def reload_agent_runtime():
+    """
+    Re-read configuration and rebuild the agent and its services.
+    
+    Only the worker that handles the request is rebuilt; to reload every
+    worker, send HUP to the gunicorn master instead.
+    """
+    try:
+        runtime = await reload_agent(reload_config=True)
+        logger.info("agent_reloaded_via_admin")
+        return {
+            "message": "Agent reloaded successfully in this worker",
+            "worker_pid": os.getpid(),
+            "vector_cache_info": runtime.vector_store.get_cache_info(),
+            "status": "success"
+        }
+    except Exception as e:
+        logger.error("agent_reload_error", error=str(e))
+        return {"error": str(e), "status": "error"}
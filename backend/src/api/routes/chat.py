@@ -1,17 +1,148 @@
 """Chat endpoint for AI assistant interactions."""
 
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 import structlog
 import asyncio
+import json
 from src.models import ChatRequest, ChatResponse
-from src.core.agent import run_agent
+from src.core.agent import (
+    get_agent_runtime,
+    has_conversation_history,
+    record_turn,
+    run_agent,
+    stream_agent
+)
+from src.services.semantic_cache import get_semantic_response_cache
 from src.utils.quick_responses import get_quick_response
-from src.utils.cache import get_cached_response, cache_response
+from src.utils.cache import aget_cached_response, acache_response, response_cache_key
+from src.utils.single_flight import SingleFlight
 from src.config import settings
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = structlog.get_logger()
 
+# Identical first-turn queries that miss the response cache share one agent run
+_chat_flight = SingleFlight()
+
+
+def _summarize_context(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reduce retrieved documents to the fields returned to clients."""
+    return [
+        {
+            "id": doc["id"],
+            "text": doc["text"],
+            "similarity": doc["similarity"]
+        }
+        for doc in documents
+    ]
+
+
+def get_chat_flight_stats() -> Dict[str, Any]:
+    """Request coalescing statistics of the chat endpoint."""
+    return _chat_flight.stats()
+
+
+async def _remember(request: ChatRequest, response: str) -> None:
+    """Record an answer given without an agent run in the caller's conversation."""
+    try:
+        await record_turn(request.query, response, request.conversation_id)
+    except Exception as e:
+        logger.warning("conversation_turn_not_recorded", error=str(e), conversation_id=request.conversation_id)
+
+
+async def _is_first_turn(request: ChatRequest) -> bool:
+    """
+    Whether the request opens its conversation.
+    
+    Only first turns are answered from, stored in or coalesced through the
+    query-keyed caches; later answers depend on the conversation history.
+    """
+    try:
+        return not await has_conversation_history(request.conversation_id)
+    except Exception as e:
+        logger.warning("conversation_history_check_failed", error=str(e), conversation_id=request.conversation_id)
+        return False
+
+
+async def _embed_query(query: str) -> Optional[List[float]]:
+    """
+    Embed a query for the semantic cache, or None if it is unavailable.
+    
+    Goes through the agent's embedding service, so retrieval for the same
+    query is then served from the query embedding cache.
+    """
+    if get_semantic_response_cache() is None:
+        return None
+    try:
+        return await get_agent_runtime().embedding_service.embed_text(query)
+    except Exception as e:
+        logger.warning("semantic_cache_embedding_failed", error=str(e))
+        return None
+
+
+async def _get_semantic_response(query: str, query_embedding: Optional[List[float]]) -> Optional[str]:
+    """Cached answer to a near-duplicate of ``query``, if any."""
+    cache = get_semantic_response_cache()
+    if cache is None or query_embedding is None:
+        return None
+    
+    hit = cache.get(query_embedding)
+    if hit is None:
+        return None
+    
+    logger.info(
+        "semantic_cached_response_used",
+        query=query[:50],
+        cached_query=hit.entry.query[:50],
+        similarity=round(hit.similarity, 4)
+    )
+    return hit.entry.response
+
+
+async def _cache_result(query: str, query_embedding: Optional[List[float]], result: Dict[str, Any]) -> None:
+    """Store a successful answer in the exact and semantic caches."""
+    if not result.get("response") or result.get("error"):
+        return
+    
+    await acache_response(query, result["response"], ttl=300)
+    
+    cache = get_semantic_response_cache()
+    if cache is not None and query_embedding is not None:
+        cache.set(
+            query_embedding,
+            query,
+            result["response"],
+            [doc["id"] for doc in result.get("retrieved_context", [])]
+        )
+
+
+async def _run_and_cache(request: ChatRequest, query_embedding: Optional[List[float]]) -> Dict[str, Any]:
+    """
+    Run the agent for a query and cache a successful answer.
+    
+    Executed once per group of coalesced first-turn requests, in the
+    conversation of the request that started it. The timeout starts with
+    the first request, so requests that join later never wait longer than
+    ``request_timeout`` either.
+    """
+    result = await asyncio.wait_for(
+        run_agent(
+            query=request.query,
+            conversation_id=request.conversation_id,
+            user_id=request.user_id,
+            additional_context=request.additional_context
+        ),
+        timeout=settings.request_timeout
+    )
+    
+    # Cached before the in-flight entry is released, so no request can
+    # fall between the two and start another run
+    await _cache_result(request.query, query_embedding, result)
+    
+    return result
+
 
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest) -> ChatResponse:
@@ -36,35 +167,61 @@ async def chat(request: ChatRequest) -> ChatResponse:
                 query=request.query[:50],
                 response_length=len(quick_response)
             )
+            await _remember(request, quick_response)
             return ChatResponse(
                 response=quick_response,
                 conversation_id=request.conversation_id,
                 retrieved_context=[]
             )
         
-        cached_response = get_cached_response(request.query)
-        if cached_response:
-            logger.info(
-                "cached_response_used",
-                query=request.query[:50],
-                response_length=len(cached_response)
-            )
-            return ChatResponse(
-                response=cached_response,
-                conversation_id=request.conversation_id,
-                retrieved_context=[]
-            )
+        first_turn = await _is_first_turn(request)
         
-        try:
-            result = await asyncio.wait_for(
-                run_agent(
-                    query=request.query,
+        if first_turn:
+            cached_response = await aget_cached_response(request.query)
+            if cached_response:
+                logger.info(
+                    "cached_response_used",
+                    query=request.query[:50],
+                    response_length=len(cached_response)
+                )
+                await _remember(request, cached_response)
+                return ChatResponse(
+                    response=cached_response,
                     conversation_id=request.conversation_id,
-                    user_id=request.user_id,
-                    additional_context=request.additional_context
-                ),
-                timeout=settings.request_timeout
-            )
+                    retrieved_context=[]
+                )
+            
+            query_embedding = await _embed_query(request.query)
+            semantic_response = await _get_semantic_response(request.query, query_embedding)
+            if semantic_response:
+                await _remember(request, semantic_response)
+                return ChatResponse(
+                    response=semantic_response,
+                    conversation_id=request.conversation_id,
+                    retrieved_context=[]
+                )
+        
+        try:
+            if first_turn:
+                # Without history the answer depends on the query alone, so
+                # identical first turns can share the leader's run
+                result = await _chat_flight.do(
+                    response_cache_key(request.query),
+                    lambda: _run_and_cache(request, query_embedding)
+                )
+                if result.get("conversation_id") != request.conversation_id and not result.get("error"):
+                    # Ran in the leader's thread; add the turn to this one
+                    await _remember(request, result["response"])
+            else:
+                result = await asyncio.wait_for(
+                    run_agent(
+                        query=request.query,
+                        conversation_id=request.conversation_id,
+                        user_id=request.user_id,
+                        additional_context=request.additional_context
+                    ),
+                    timeout=settings.request_timeout
+                )
         except asyncio.TimeoutError:
             logger.error(
                 "chat_request_timeout",
@@ -89,20 +246,11 @@ async def chat(request: ChatRequest) -> ChatResponse:
         
         response = ChatResponse(
             response=result["response"],
-            conversation_id=result["conversation_id"],
-            retrieved_context=[
-                {
-                    "id": doc["id"],
-                    "text": doc["text"],
-                    "similarity": doc["similarity"]
-                }
-                for doc in result.get("retrieved_context", [])
-            ]
+            conversation_id=request.conversation_id,
+            retrieved_context=_summarize_context(result.get("retrieved_context", [])),
+            token_usage=result.get("token_usage")
         )
         
-        if result["response"] and not result.get("error"):
-            cache_response(request.query, result["response"], ttl=300)
-        
         logger.info(
             "chat_response_sent",
             response_length=len(response.response),
@@ -118,4 +266,97 @@ async def chat(request: ChatRequest) -> ChatResponse:
         raise HTTPException(
             status_code=500,
             detail=f"Chat endpoint error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _chat_events(request: ChatRequest) -> AsyncIterator[str]:
+    """Produce the SSE stream for a chat request."""
+    first_turn = await _is_first_turn(request)
+    instant_response = get_quick_response(request.query)
+    query_embedding = None
+    if not instant_response and first_turn:
+        instant_response = await aget_cached_response(request.query)
+        if not instant_response:
+            query_embedding = await _embed_query(request.query)
+            instant_response = await _get_semantic_response(request.query, query_embedding)
+    if instant_response:
+        await _remember(request, instant_response)
+        yield _sse("retrieval", {"retrieved_context": []})
+        yield _sse("token", {"text": instant_response})
+        yield _sse("done", {
+            "response": instant_response,
+            "conversation_id": request.conversation_id,
+            "retrieved_context": []
+        })
+        return
+    
+    try:
+        async with asyncio.timeout(settings.request_timeout):
+            async for event in stream_agent(
+                query=request.query,
+                conversation_id=request.conversation_id,
+                user_id=request.user_id,
+                additional_context=request.additional_context
+            ):
+                data = event["data"]
+                
+                if event["event"] == "retrieval":
+                    data = {"retrieved_context": _summarize_context(data["retrieved_context"])}
+                
+                elif event["event"] == "done":
+                    if data.get("error"):
+                        logger.error("chat_stream_agent_error", error=data["error"], query=request.query[:100])
+                        yield _sse("error", {"detail": f"Agent error: {data['error']}"})
+                        return
+                    
+                    if first_turn:
+                        await _cache_result(request.query, query_embedding, data)
+                    
+                    logger.info(
+                        "chat_stream_completed",
+                        response_length=len(data["response"]),
+                        context_count=len(data["retrieved_context"])
+                    )
+                    data = {
+                        "response": data["response"],
+                        "conversation_id": data["conversation_id"],
+                        "retrieved_context": _summarize_context(data["retrieved_context"]),
+                        "token_usage": data.get("token_usage")
+                    }
+                
+                yield _sse(event["event"], data)
+    
+    except TimeoutError:
+        logger.error("chat_stream_timeout", query=request.query[:50], timeout=settings.request_timeout)
+        yield _sse("error", {"detail": f"Request timed out after {settings.request_timeout} seconds"})
+    except Exception as e:
+        logger.error("chat_stream_error", error=str(e))
+        yield _sse("error", {"detail": f"Chat endpoint error: {str(e)}"})
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Chat with the AI assistant, streaming the answer as server-sent events.
+    
+    Events: ``retrieval`` (context used, sent before generation starts),
+    ``token`` (answer chunks as the model produces them), then ``done``
+    with the full response, or ``error``.
+    """
+    logger.info(
+        "chat_stream_request_received",
+        query=request.query[:100],
+        conversation_id=request.conversation_id,
+        user_id=request.user_id
+    )
+    
+    return StreamingResponse(
+        _chat_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
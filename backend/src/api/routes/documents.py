@@ -4,7 +4,7 @@ from fastapi import APIRouter, HTTPException, Query
 
 import structlog
 from src.models import DocumentRequest, DocumentResponse
-from src.services import FirebaseVectorStore
+from src.core.agent import get_agent_runtime
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 logger = structlog.get_logger()
@@ -16,9 +16,11 @@ async def create_document(request: DocumentRequest) -> DocumentResponse:
     Add a new document to the knowledge base.
     
     This will create embeddings and store the document in Firebase.
+    Writes go through the agent's shared vector cache, so the next search
+    and chat answer see the change.
     """
     try:
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store
         
         document_id = await vector_store.add_document(
             text=request.text,
@@ -51,7 +53,7 @@ async def create_document(request: DocumentRequest) -> DocumentResponse:
 async def get_document(document_id: str):
     """Get a specific document by ID."""
     try:
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store.firebase_store
         document = await vector_store.get_document(document_id)
         
         if not document:
@@ -79,7 +81,7 @@ async def update_document(
 ) -> DocumentResponse:
     """Update an existing document."""
     try:
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store
         
         success = await vector_store.update_document(
             document_id=document_id,
@@ -115,7 +117,7 @@ async def update_document(
 async def delete_document(document_id: str) -> DocumentResponse:
     """Delete a document from the knowledge base."""
     try:
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store
         
         success = await vector_store.delete_document(document_id)
         
@@ -150,7 +152,7 @@ async def list_documents(
 ):
     """List documents with pagination."""
     try:
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store.firebase_store
         
         documents, total_count = await vector_store.list_documents(
             limit=limit,
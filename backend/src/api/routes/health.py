@@ -31,6 +31,7 @@ async def root():
         "description": "AI assistant API with Firebase vector store",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
             "documents": "/documents", 
             "search": "/search",
             "health": "/health",
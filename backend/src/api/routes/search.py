@@ -1,58 +1,87 @@
 """Search endpoint for semantic search in the knowledge base."""
 
+from typing import Any, Dict, List
 from fastapi import APIRouter, HTTPException
 import structlog
-from src.models import SearchRequest, SearchResponse, SearchResult
-from src.services import FirebaseVectorStore
+from src.core.agent import get_agent_runtime
+from src.models import (
+    SearchRequest,
+    SearchResponse,
+    SearchResult,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    BatchSearchResult
+)
+from src.services.cached_vector_store import StaleCacheError
 
 router = APIRouter(prefix="/search", tags=["search"])
 logger = structlog.get_logger()
 
 
+def _to_search_results(results: List[Dict[str, Any]]) -> List[SearchResult]:
+    return [
+        SearchResult(
+            id=result["id"],
+            text=result["text"],
+            similarity=result["similarity"],
+            lexical_score=result.get("lexical_score"),
+            score=result.get("score"),
+            metadata=result.get("metadata", {}),
+            created_at=result.get("created_at")
+        )
+        for result in results
+    ]
+
+
 @router.post("/", response_model=SearchResponse)
 async def search(request: SearchRequest) -> SearchResponse:
     """
     Search the knowledge base using semantic similarity.
     
-    This endpoint performs vector similarity search to find
-    relevant documents based on the query.
+    This endpoint performs vector similarity search, fused with BM25
+    keyword ranking in hybrid mode, to find relevant documents based on
+    the query. It uses the process-wide cached index shared with the
+    agent; ``consistency="strong"`` first applies changes committed to
+    Firestore since the index was built.
     """
     try:
         logger.info(
             "search_request_received",
             query=request.query[:100],
             top_k=request.top_k,
-            threshold=request.threshold
+            threshold=request.threshold,
+            consistency=request.consistency,
+            filter=request.filter,
+            mode=request.mode
         )
         
-        vector_store = FirebaseVectorStore()
+        vector_store = get_agent_runtime().vector_store
         
-        results = await vector_store.search(
+        results, info = await vector_store.search_with_info(
             query=request.query,
             top_k=request.top_k,
-            threshold=request.threshold
+            threshold=request.threshold,
+            consistency=request.consistency,
+            metadata_filter=request.filter,
+            mode=request.mode
         )
         
-        search_results = [
-            SearchResult(
-                id=result["id"],
-                text=result["text"],
-                similarity=result["similarity"],
-                metadata=result.get("metadata", {}),
-                created_at=result.get("created_at")
-            )
-            for result in results
-        ]
+        search_results = _to_search_results(results)
         
         response = SearchResponse(
             results=search_results,
             query=request.query,
-            total_results=len(search_results)
+            total_results=len(search_results),
+            consistency=info["consistency"],
+            mode=info["mode"],
+            served_by=info["served_by"],
+            cache_age_seconds=info["cache_age_seconds"]
         )
         
         logger.info(
             "search_completed",
             results_count=len(search_results),
+            served_by=info["served_by"],
             top_similarity=search_results[0].similarity if search_results else 0
         )
         
@@ -63,4 +92,67 @@ async def search(request: SearchRequest) -> SearchResponse:
         raise HTTPException(
             status_code=500,
             detail=f"Search error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest) -> BatchSearchResponse:
+    """
+    Search the knowledge base for several queries at once.
+    
+    All queries are embedded in one request and scored together against
+    the cached index, so evaluation runs over hundreds of queries cost a
+    single round trip. Results come back in request order, with timing
+    for the whole batch.
+    """
+    try:
+        logger.info(
+            "batch_search_request_received",
+            query_count=len(request.queries),
+            top_k=request.top_k,
+            threshold=request.threshold,
+            consistency=request.consistency,
+            filter=request.filter,
+            mode=request.mode
+        )
+        
+        vector_store = get_agent_runtime().vector_store
+        
+        batch, info = await vector_store.search_batch(
+            queries=request.queries,
+            top_k=request.top_k,
+            threshold=request.threshold,
+            consistency=request.consistency,
+            metadata_filter=request.filter,
+            mode=request.mode
+        )
+        
+        return BatchSearchResponse(
+            results=[
+                BatchSearchResult(
+                    query=query,
+                    results=_to_search_results(results),
+                    total_results=len(results)
+                )
+                for query, results in zip(request.queries, batch)
+            ],
+            total_queries=len(request.queries),
+            consistency=info["consistency"],
+            mode=info["mode"],
+            served_by=info["served_by"],
+            cache_age_seconds=info["cache_age_seconds"],
+            timing={key: info[key] for key in ("embedding_ms", "scoring_ms", "total_ms")}
+        )
+        
+    except StaleCacheError as e:
+        logger.error("batch_search_index_unavailable", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail=f"Search index unavailable: {str(e)}"
+        )
+    except Exception as e:
+        logger.error("batch_search_endpoint_error", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Search error: {str(e)}"
+        )
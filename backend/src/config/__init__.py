@@ -1,5 +1,5 @@
 """Configuration module for LangGraph API."""
 
-from .settings import settings
+from .settings import settings, reload_settings
 
-__all__ = ["settings"]
\ No newline at end of file
+__all__ = ["settings", "reload_settings"]
\ No newline at end of file
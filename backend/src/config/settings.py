@@ -2,7 +2,7 @@
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Dict, Optional
 import os
 from pathlib import Path
 
@@ -45,8 +45,64 @@ class Settings(BaseSettings):
         env="EMBEDDING_MODEL"
     )
     vector_dimension: int = Field(default=1536, env="VECTOR_DIMENSION")
+    vector_index_type: str = Field(default="flat", env="VECTOR_INDEX_TYPE")
+    vector_index_nlist: int = Field(default=0, env="VECTOR_INDEX_NLIST")
+    vector_index_nprobe: int = Field(default=8, env="VECTOR_INDEX_NPROBE")
+    vector_index_min_size: int = Field(default=2048, env="VECTOR_INDEX_MIN_SIZE")
+    vector_quantization: str = Field(default="none", env="VECTOR_QUANTIZATION")
+    vector_rerank_factor: int = Field(default=4, env="VECTOR_RERANK_FACTOR")
+    vector_quantization_max_uncoded: float = Field(default=0.1, env="VECTOR_QUANTIZATION_MAX_UNCODED")
+    embedding_cache_max_entries: int = Field(default=2048, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    embedding_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="EMBEDDING_CACHE_MAX_BYTES")
+    embedding_cache_ttl: int = Field(default=86400, env="EMBEDDING_CACHE_TTL")
+    embedding_cache_path: Optional[str] = Field(default=None, env="EMBEDDING_CACHE_PATH")
+    embedding_batch_window_ms: float = Field(default=5.0, env="EMBEDDING_BATCH_WINDOW_MS")
+    embedding_batch_max_size: int = Field(default=64, env="EMBEDDING_BATCH_MAX_SIZE")
+    response_cache_backend: str = Field(default="memory", env="RESPONSE_CACHE_BACKEND")
+    response_cache_path: Optional[str] = Field(default=None, env="RESPONSE_CACHE_PATH")
+    response_cache_redis_url: str = Field(default="redis://localhost:6379/0", env="RESPONSE_CACHE_REDIS_URL")
+    response_cache_redis_timeout: float = Field(default=0.5, env="RESPONSE_CACHE_REDIS_TIMEOUT")
+    response_cache_max_entries: int = Field(default=1000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_max_bytes: int = Field(default=16 * 1024 * 1024, env="RESPONSE_CACHE_MAX_BYTES")
+    semantic_cache_max_entries: int = Field(default=1024, env="SEMANTIC_CACHE_MAX_ENTRIES")
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl: int = Field(default=300, env="SEMANTIC_CACHE_TTL")
+    context_max_tokens: int = Field(default=1500, env="CONTEXT_MAX_TOKENS")
+    context_metadata_keys: list[str] = Field(
+        default_factory=lambda: ["category", "topic"],
+        env="CONTEXT_METADATA_KEYS"
+    )
+    conversation_memory_turns: int = Field(default=3, env="CONVERSATION_MEMORY_TURNS")
+    conversation_memory_max_tokens: int = Field(default=800, env="CONVERSATION_MEMORY_MAX_TOKENS")
+    conversation_summary_max_tokens: int = Field(default=150, env="CONVERSATION_SUMMARY_MAX_TOKENS")
     similarity_threshold: float = Field(default=0.7, env="SIMILARITY_THRESHOLD")
     max_search_results: int = Field(default=5, env="MAX_SEARCH_RESULTS")
+    retrieval_filter: Optional[str] = Field(default=None, env="RETRIEVAL_FILTER")
+    search_mode: str = Field(default="vector", env="SEARCH_MODE")
+    hybrid_rrf_k: int = Field(default=60, env="HYBRID_RRF_K")
+    hybrid_candidate_factor: int = Field(default=4, env="HYBRID_CANDIDATE_FACTOR")
+    hybrid_min_lexical_score: float = Field(default=1.0, env="HYBRID_MIN_LEXICAL_SCORE")
+    rerank_enabled: bool = Field(default=False, env="RERANK_ENABLED")
+    rerank_candidates: int = Field(default=20, env="RERANK_CANDIDATES")
+    rerank_lexical_weight: float = Field(default=0.3, env="RERANK_LEXICAL_WEIGHT")
+    rerank_mmr_lambda: float = Field(default=0.7, env="RERANK_MMR_LAMBDA")
+    rerank_metadata_boosts: Dict[str, float] = Field(default_factory=dict, env="RERANK_METADATA_BOOSTS")
+    vector_snapshot_path: Optional[str] = Field(default=None, env="VECTOR_SNAPSHOT_PATH")
+    vector_cache_sync: str = Field(default="ttl", env="VECTOR_CACHE_SYNC")
+    vector_cache_poll_interval: float = Field(default=5.0, env="VECTOR_CACHE_POLL_INTERVAL")
+    vector_cache_max_staleness: int = Field(default=1800, env="VECTOR_CACHE_MAX_STALENESS")
+    vector_cache_refresh_backoff: float = Field(default=5.0, env="VECTOR_CACHE_REFRESH_BACKOFF")
+    
+    query_analyzer_backend: str = Field(default="local", env="QUERY_ANALYZER_BACKEND")
+    query_analyzer_min_confidence: float = Field(default=0.8, env="QUERY_ANALYZER_MIN_CONFIDENCE")
+    retrieval_classifier_path: Optional[str] = Field(default=None, env="RETRIEVAL_CLASSIFIER_PATH")
+    agent_speculative_retrieval: bool = Field(default=False, env="AGENT_SPECULATIVE_RETRIEVAL")
+    checkpointer_backend: str = Field(default="memory", env="CHECKPOINTER_BACKEND")
+    checkpointer_path: Optional[str] = Field(default=None, env="CHECKPOINTER_PATH")
+    checkpointer_max_threads: int = Field(default=1000, env="CHECKPOINTER_MAX_THREADS")
+    checkpointer_max_messages: int = Field(default=20, env="CHECKPOINTER_MAX_MESSAGES")
+    checkpointer_ttl: int = Field(default=86400, env="CHECKPOINTER_TTL")
+    conversation_id_secret: Optional[str] = Field(default=None, env="CONVERSATION_ID_SECRET")
     
     request_timeout: int = Field(default=30, env="REQUEST_TIMEOUT")
     llm_timeout: int = Field(default=15, env="LLM_TIMEOUT")  
@@ -99,4 +155,15 @@ class Settings(BaseSettings):
         """Check if running in production mode."""
         return self.api_env == "production"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+
+
+def reload_settings() -> Settings:
+    """
+    Re-read the environment and .env into the shared settings instance.
+    
+    Modules hold a reference to ``settings``, so it is updated in place
+    rather than replaced.
+    """
+    settings.__init__()
+    return settings
\ No newline at end of file
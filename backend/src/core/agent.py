@@ -1,9 +1,15 @@
 """LangGraph agent implementation."""
 
-from typing import Dict, Any
+import time
+import uuid
+from typing import AsyncIterator, Dict, Any, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 import structlog
+from src.config import reload_settings, settings
+from src.services.llm_usage import start_usage_tracking
+from .checkpointer import create_checkpointer
 from .state import AgentState
 from .nodes import Nodes
 
@@ -17,7 +23,11 @@ def should_retrieve(state: AgentState) -> str:
     return "skip"
 
 
-def create_agent_graph():
+def create_agent_graph(
+    nodes: Optional[Nodes] = None,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    speculative: Optional[bool] = None
+):
     """
     Create the LangGraph agent with all nodes and edges.
     
@@ -25,42 +35,208 @@ def create_agent_graph():
     1. Analyze query to determine if retrieval is needed
     2. Either retrieve context or skip retrieval
     3. Plan and generate the final response in one step (optimized)
+    
+    In speculative mode steps 1 and 2 are one node that retrieves while
+    the query is analyzed and drops the context if it is not needed.
+    
+    Args:
+        nodes: Node services to wire in; a new set is built if omitted
+        checkpointer: Conversation checkpointer; a new one if omitted
+        speculative: Retrieve concurrently with analysis; defaults to
+            ``agent_speculative_retrieval``
     """
     
-    nodes = Nodes()
+    nodes = nodes or Nodes()
+    if speculative is None:
+        speculative = settings.agent_speculative_retrieval
     
     workflow = StateGraph(AgentState)
-
-    workflow.add_node("analyze_query", nodes.analyze_query)
-    workflow.add_node("retrieve_context", nodes.retrieve_context)
-    workflow.add_node("skip_retrieval", nodes.skip_retrieval)
-    workflow.add_node("plan_and_generate_response", nodes.plan_and_generate_response)
-    
-    workflow.set_entry_point("analyze_query")
     
-    workflow.add_conditional_edges(
-        "analyze_query",
-        should_retrieve,
-        {
-            "retrieve": "retrieve_context",
-            "skip": "skip_retrieval"
-        }
-    )
+    workflow.add_node("plan_and_generate_response", nodes.plan_and_generate_response)
     
-    workflow.add_edge("retrieve_context", "plan_and_generate_response")
-    workflow.add_edge("skip_retrieval", "plan_and_generate_response")
+    if speculative:
+        workflow.add_node("analyze_and_retrieve", nodes.analyze_and_retrieve)
+        workflow.set_entry_point("analyze_and_retrieve")
+        workflow.add_edge("analyze_and_retrieve", "plan_and_generate_response")
+    else:
+        workflow.add_node("analyze_query", nodes.analyze_query)
+        workflow.add_node("retrieve_context", nodes.retrieve_context)
+        workflow.add_node("skip_retrieval", nodes.skip_retrieval)
+        
+        workflow.set_entry_point("analyze_query")
+        
+        workflow.add_conditional_edges(
+            "analyze_query",
+            should_retrieve,
+            {
+                "retrieve": "retrieve_context",
+                "skip": "skip_retrieval"
+            }
+        )
+        
+        workflow.add_edge("retrieve_context", "plan_and_generate_response")
+        workflow.add_edge("skip_retrieval", "plan_and_generate_response")
     
     workflow.add_edge("plan_and_generate_response", END)
     
-    memory = MemorySaver()
+    memory = checkpointer or create_checkpointer()
     
     app = workflow.compile(checkpointer=memory)
     
-    logger.info("agent_graph_created", nodes_count=4)
+    logger.info("agent_graph_created", nodes_count=2 if speculative else 4, speculative=speculative)
     
     return app
 
 
+class AgentRuntime:
+    """
+    Compiled graph plus the services it was built with.
+    
+    One runtime is shared by every request in the process, so the LLM
+    client, vector cache and embedding service are built once and reused.
+    """
+    
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
+        self.nodes = Nodes()
+        self.checkpointer = checkpointer or create_checkpointer()
+        self.speculative = settings.agent_speculative_retrieval
+        self.app = create_agent_graph(self.nodes, self.checkpointer, self.speculative)
+        self.created_at = time.time()
+    
+    @property
+    def vector_store(self):
+        """The shared cached vector store."""
+        return self.nodes.vector_store
+    
+    @property
+    def embedding_service(self):
+        """The embedding service used for retrieval."""
+        return self.nodes.vector_store.embedding_service
+    
+    def stats(self) -> Dict[str, Any]:
+        """Runtime configuration and counters for monitoring."""
+        return {
+            "execution_mode": "speculative" if self.speculative else "sequential",
+            "created_at": self.created_at,
+            "speculation_stats": self.nodes.speculation_stats() if self.speculative else None,
+            "analyzer_stats": self.nodes.analyzer_stats(),
+            "reranker_stats": self.nodes.reranker_stats(),
+            "checkpointer_stats": self.checkpointer.stats() if hasattr(self.checkpointer, "stats") else None
+        }
+    
+    async def close(self) -> None:
+        """Stop background work owned by the runtime's services."""
+        await self.nodes.vector_store.close()
+
+
+_runtime: Optional[AgentRuntime] = None
+
+
+def get_agent_runtime() -> AgentRuntime:
+    """Return the process-wide agent runtime, building it on first use."""
+    global _runtime
+    if _runtime is None:
+        _runtime = AgentRuntime()
+        logger.info("agent_runtime_created")
+    return _runtime
+
+
+async def start_agent() -> None:
+    """Build the runtime at startup and warm the vector cache."""
+    runtime = get_agent_runtime()
+    await runtime.vector_store.warm_up()
+
+
+async def shutdown_agent() -> None:
+    """Release the process-wide runtime."""
+    global _runtime
+    runtime, _runtime = _runtime, None
+    if runtime is not None:
+        await runtime.close()
+        logger.info("agent_runtime_closed")
+
+
+async def reload_agent(reload_config: bool = True) -> AgentRuntime:
+    """
+    Rebuild the runtime, optionally re-reading configuration first.
+    
+    The new runtime is built and its vector cache warmed before it
+    replaces the old one, so requests never see a half-initialized agent
+    or a cold cache. The old runtime serves until the swap and is closed
+    afterwards; conversation checkpoints carry over.
+    """
+    global _runtime
+    if reload_config:
+        reload_settings()
+    
+    old = _runtime
+    new = AgentRuntime(checkpointer=old.checkpointer if old else None)
+    await new.vector_store.warm_up()
+    _runtime = new
+    
+    if old is not None:
+        await old.close()
+    
+    logger.info("agent_runtime_reloaded", config_reloaded=reload_config)
+    return new
+
+
+async def has_conversation_history(conversation_id: str) -> bool:
+    """
+    Whether the conversation thread already holds earlier turns.
+    
+    Answers to a thread with history depend on that history, so they must
+    not be served from or stored in the query-keyed response caches.
+    """
+    app = get_agent_runtime().app
+    state = await app.aget_state({"configurable": {"thread_id": conversation_id}})
+    return bool(state.values.get("messages"))
+
+
+async def record_turn(query: str, response: str, conversation_id: str) -> None:
+    """
+    Append a turn answered without running the graph to its conversation.
+    
+    Used for quick, cached and coalesced answers, so the thread's memory
+    still contains the question and the answer the visitor saw.
+    """
+    app = get_agent_runtime().app
+    await app.aupdate_state(
+        {"configurable": {"thread_id": conversation_id}},
+        {
+            "query": query,
+            "final_response": response,
+            "messages": [
+                HumanMessage(content=query, id=str(uuid.uuid4())),
+                AIMessage(content=response, id=str(uuid.uuid4()))
+            ]
+        },
+        as_node="plan_and_generate_response"
+    )
+
+
+def _initial_state(
+    query: str,
+    conversation_id: str,
+    user_id: str,
+    additional_context: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """Build the initial graph state for a query."""
+    return {
+        "messages": [],
+        "query": query,
+        "retrieved_context": [],
+        "should_retrieve": False,
+        "retrieval_complete": False,
+        "response_plan": None,
+        "final_response": None,
+        "conversation_id": conversation_id,
+        "user_id": user_id,
+        "error": None,
+        "additional_context": additional_context or {}
+    }
+
+
 async def run_agent(
     query: str,
     conversation_id: str = "default",
@@ -80,22 +256,10 @@ async def run_agent(
         Agent response with final answer and metadata
     """
     try:
-       
-        app = create_agent_graph()
+        app = get_agent_runtime().app
         
-        initial_state = {
-            "messages": [],
-            "query": query,
-            "retrieved_context": [],
-            "should_retrieve": False,
-            "retrieval_complete": False,
-            "response_plan": None,
-            "final_response": None,
-            "conversation_id": conversation_id,
-            "user_id": user_id,
-            "error": None,
-            "additional_context": additional_context or {}
-        }
+        initial_state = _initial_state(query, conversation_id, user_id, additional_context)
+        usage = start_usage_tracking()
         
         config = {"configurable": {"thread_id": conversation_id}}
         result = await app.ainvoke(initial_state, config)
@@ -105,7 +269,8 @@ async def run_agent(
             query=query[:100],
             conversation_id=conversation_id,
             retrieved_docs=len(result.get("retrieved_context", [])),
-            has_error=bool(result.get("error"))
+            has_error=bool(result.get("error")),
+            **usage
         )
         
         return {
@@ -113,7 +278,8 @@ async def run_agent(
             "retrieved_context": result.get("retrieved_context", []),
             "conversation_id": conversation_id,
             "error": result.get("error"),
-            "messages": result.get("messages", [])
+            "messages": result.get("messages", []),
+            "token_usage": usage
         }
         
     except Exception as e:
@@ -127,4 +293,82 @@ async def run_agent(
             "response": "I apologize, but I encountered an error processing your request.",
             "error": str(e),
             "conversation_id": conversation_id
-        }
\ No newline at end of file
+        }
+
+
+async def stream_agent(
+    query: str,
+    conversation_id: str = "default",
+    user_id: str = "anonymous",
+    additional_context: Dict[str, Any] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the agent and yield events as soon as they are available.
+    
+    Yields:
+        ``{"event": "retrieval", "data": {...}}`` once context is known,
+        ``{"event": "token", "data": {"text": ...}}`` per generated chunk,
+        and a final ``{"event": "done", "data": {...}}`` with the same
+        fields ``run_agent`` returns
+    """
+    app = get_agent_runtime().app
+    initial_state = _initial_state(query, conversation_id, user_id, additional_context)
+    config = {"configurable": {"thread_id": conversation_id}}
+    usage = start_usage_tracking()
+    
+    retrieved_context = []
+    final_state: Dict[str, Any] = {}
+    streamed_tokens = 0
+    
+    async for mode, payload in app.astream(
+        initial_state, config, stream_mode=["updates", "messages"]
+    ):
+        if mode == "messages":
+            chunk, metadata = payload
+            # Only the model's answer chunks, not the analyzer's yes/no or
+            # the messages the node writes to state afterwards
+            if (
+                isinstance(chunk, AIMessageChunk)
+                and metadata.get("langgraph_node") == "plan_and_generate_response"
+                and chunk.content
+            ):
+                streamed_tokens += 1
+                yield {"event": "token", "data": {"text": chunk.content}}
+            continue
+        
+        for node, update in payload.items():
+            if not update:
+                continue
+            final_state.update(update)
+            if node in ("retrieve_context", "skip_retrieval", "analyze_and_retrieve"):
+                retrieved_context = update.get("retrieved_context", [])
+                yield {
+                    "event": "retrieval",
+                    "data": {"retrieved_context": retrieved_context}
+                }
+    
+    response = final_state.get("final_response") or ""
+    if response and not streamed_tokens:
+        # The model did not stream (e.g. error fallback); send it whole
+        yield {"event": "token", "data": {"text": response}}
+    
+    logger.info(
+        "agent_stream_completed",
+        query=query[:100],
+        conversation_id=conversation_id,
+        retrieved_docs=len(retrieved_context),
+        streamed_tokens=streamed_tokens,
+        has_error=bool(final_state.get("error")),
+        **usage
+    )
+    
+    yield {
+        "event": "done",
+        "data": {
+            "response": response,
+            "retrieved_context": retrieved_context,
+            "conversation_id": conversation_id,
+            "error": final_state.get("error"),
+            "token_usage": usage
+        }
+    }
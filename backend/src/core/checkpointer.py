@@ -0,0 +1,391 @@
+"""Bounded conversation checkpointers: per-worker memory or shared SQLite."""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple
+)
+from langgraph.checkpoint.memory import InMemorySaver
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-memory checkpointer with bounded size.
+
+    Only the latest ``history`` checkpoints of a thread are kept, the
+    stored message list is trimmed to the last ``max_messages``, threads
+    idle for ``ttl`` seconds are dropped and, beyond ``max_threads``, the
+    least recently used thread is evicted. Memory therefore stays flat no
+    matter how many conversations a worker has seen.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_threads: int = 1000,
+        max_messages: int = 20,
+        ttl: int = 86400,
+        history: int = 2
+    ):
+        super().__init__()
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.history = max(history, 1)
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.time()
+        self._last_access.move_to_end(thread_id)
+
+    def _drop(self, thread_id: str) -> None:
+        self._last_access.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    def _expire(self, now: float) -> None:
+        # Access order is also age order, so expired threads are at the front
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if last_access >= now - self.ttl:
+                break
+            self._drop(thread_id)
+            self.expirations += 1
+
+    def _evict(self) -> None:
+        while len(self._last_access) > self.max_threads:
+            thread_id = next(iter(self._last_access))
+            self._drop(thread_id)
+            self.evictions += 1
+            logger.debug("checkpoint_thread_evicted", thread_id=thread_id)
+
+    def _trim(self, checkpoint: Checkpoint) -> Checkpoint:
+        messages = checkpoint["channel_values"].get("messages")
+        if not isinstance(messages, list) or len(messages) <= self.max_messages:
+            return checkpoint
+        channel_values = dict(checkpoint["channel_values"])
+        channel_values["messages"] = messages[-self.max_messages:] if self.max_messages else []
+        return {**checkpoint, "channel_values": channel_values}
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the latest checkpoints of a thread, with their writes and blobs."""
+        saved = self.storage[thread_id][checkpoint_ns]
+        if len(saved) <= self.history:
+            return
+
+        ordered = sorted(saved)
+        stale_versions = set()
+        for checkpoint_id in ordered[:-self.history]:
+            checkpoint, _, _ = saved.pop(checkpoint_id)
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            stale_versions.update(self.serde.loads_typed(checkpoint)["channel_versions"].items())
+
+        for checkpoint_id in ordered[-self.history:]:
+            checkpoint = self.serde.loads_typed(saved[checkpoint_id][0])
+            stale_versions.difference_update(checkpoint["channel_versions"].items())
+
+        for channel, version in stale_versions:
+            self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._expire(time.time())
+            result = super().get_tuple(config)
+            if result is not None:
+                self._touch(thread_id)
+            elif thread_id not in self._last_access:
+                # The lookup created an empty entry for an unknown thread
+                self.storage.pop(thread_id, None)
+            return result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._expire(time.time())
+            saved = super().put(config, self._trim(checkpoint), metadata, new_versions)
+            self._prune(thread_id, config["configurable"].get("checkpoint_ns", ""))
+            self._touch(thread_id)
+            self._evict()
+            return saved
+
+    def put_writes(self, config, writes, task_id, task_path="") -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop(thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get checkpointer statistics."""
+        return {
+            "backend": self.name,
+            "threads": len(self._last_access),
+            "checkpoints": sum(len(saved) for ns in self.storage.values() for saved in ns.values()),
+            "blobs": len(self.blobs),
+            "max_threads": self.max_threads,
+            "max_messages": self.max_messages,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class SQLiteSaver(BoundedMemorySaver):
+    """
+    Checkpointer that persists the latest checkpoint of each thread to a
+    SQLite file shared by all workers on a host.
+
+    The bounded in-memory saver is the working set for running graphs;
+    every ``put`` writes the thread's newest checkpoint through to SQLite,
+    and a run starting on a thread reloads it whenever the file holds a
+    newer checkpoint than memory. Conversations therefore survive worker
+    recycling and may continue on any worker. The same TTL and thread
+    limit apply to the file.
+
+    The async methods the graph uses do the file I/O in a worker thread,
+    so a busy or slow disk never blocks the event loop; the in-memory
+    part stays on the loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+        self.restored = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-process connection; never reuse one inherited across fork."""
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS conversation_checkpoints ("
+                "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+                "payload_type TEXT NOT NULL, payload BLOB NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (thread_id, checkpoint_ns))"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS conversation_checkpoints_updated "
+                "ON conversation_checkpoints (updated_at)"
+            )
+            self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def _serialize(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Tuple[str, bytes]:
+        """A checkpoint and the blobs it references as one payload."""
+        checkpoint, metadata, parent_id = self.storage[thread_id][checkpoint_ns][checkpoint_id]
+        versions = self.serde.loads_typed(checkpoint)["channel_versions"]
+        blobs = [
+            [channel, version, list(self.blobs[(thread_id, checkpoint_ns, channel, version)])]
+            for channel, version in versions.items()
+            if (thread_id, checkpoint_ns, channel, version) in self.blobs
+        ]
+        return self.serde.dumps_typed({
+            "checkpoint": list(checkpoint),
+            "metadata": list(metadata),
+            "parent_id": parent_id,
+            "blobs": blobs
+        })
+
+    def _write(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        payload: Tuple[str, bytes]
+    ) -> None:
+        """Store a serialized checkpoint as the thread's row."""
+        payload_type, data = payload
+        now = time.time()
+        with self._db_lock:
+            db = self._connection()
+            # Writes may finish out of order; never replace a newer checkpoint
+            db.execute(
+                "INSERT INTO conversation_checkpoints VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(thread_id, checkpoint_ns) DO UPDATE SET "
+                "checkpoint_id = excluded.checkpoint_id, payload_type = excluded.payload_type, "
+                "payload = excluded.payload, updated_at = excluded.updated_at "
+                "WHERE excluded.checkpoint_id >= conversation_checkpoints.checkpoint_id",
+                (thread_id, checkpoint_ns, checkpoint_id, payload_type, data, now)
+            )
+            db.execute("DELETE FROM conversation_checkpoints WHERE updated_at < ?", (now - self.ttl,))
+            db.execute(
+                "DELETE FROM conversation_checkpoints WHERE rowid IN ("
+                "SELECT rowid FROM conversation_checkpoints ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_threads,)
+            )
+
+    def _load(self, thread_id: str, checkpoint_ns: str) -> Optional[Tuple[str, str, bytes]]:
+        """The thread's stored checkpoint row, unless it has expired."""
+        with self._db_lock:
+            return self._connection().execute(
+                "SELECT checkpoint_id, payload_type, payload FROM conversation_checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND updated_at >= ?",
+                (thread_id, checkpoint_ns, time.time() - self.ttl)
+            ).fetchone()
+
+    def _restore(self, thread_id: str, checkpoint_ns: str, row: Optional[Tuple[str, str, bytes]]) -> None:
+        """Load the stored checkpoint if it is newer than the one in memory."""
+        if row is None:
+            return
+
+        checkpoint_id, payload_type, payload = row
+        saved = self.storage.get(thread_id, {}).get(checkpoint_ns)
+        if saved and max(saved) >= checkpoint_id:
+            return
+
+        data = self.serde.loads_typed((payload_type, payload))
+        self._drop(thread_id)
+        self.storage[thread_id][checkpoint_ns][checkpoint_id] = (
+            tuple(data["checkpoint"]), tuple(data["metadata"]), data["parent_id"]
+        )
+        for channel, version, blob in data["blobs"]:
+            self.blobs[(thread_id, checkpoint_ns, channel, version)] = tuple(blob)
+        self._touch(thread_id)
+        self.restored += 1
+        logger.debug("checkpoint_restored", thread_id=thread_id, checkpoint_id=checkpoint_id)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        if not configurable.get("checkpoint_id"):
+            # Start of a run: another worker may have continued this thread
+            thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+            row = self._load(thread_id, checkpoint_ns)
+            with self._lock:
+                self._restore(thread_id, checkpoint_ns, row)
+        return super().get_tuple(config)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        if not configurable.get("checkpoint_id"):
+            thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+            row = await asyncio.to_thread(self._load, thread_id, checkpoint_ns)
+            with self._lock:
+                self._restore(thread_id, checkpoint_ns, row)
+        return BoundedMemorySaver.get_tuple(self, config)
+
+    def _put_in_memory(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> Tuple[RunnableConfig, Tuple[str, str, str, Tuple[str, bytes]]]:
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            configurable = saved["configurable"]
+            key = (configurable["thread_id"], configurable["checkpoint_ns"], configurable["checkpoint_id"])
+            return saved, (*key, self._serialize(*key))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        saved, row = self._put_in_memory(config, checkpoint, metadata, new_versions)
+        self._write(*row)
+        return saved
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        saved, row = self._put_in_memory(config, checkpoint, metadata, new_versions)
+        await asyncio.to_thread(self._write, *row)
+        return saved
+
+    def _delete_stored(self, thread_id: str) -> None:
+        with self._db_lock:
+            self._connection().execute(
+                "DELETE FROM conversation_checkpoints WHERE thread_id = ?", (thread_id,)
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+        self._delete_stored(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            BoundedMemorySaver.delete_thread(self, thread_id)
+        await asyncio.to_thread(self._delete_stored, thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._db_lock:
+            stats["stored_threads"] = self._connection().execute(
+                "SELECT COUNT(DISTINCT thread_id) FROM conversation_checkpoints"
+            ).fetchone()[0]
+        stats["restored"] = self.restored
+        return stats
+
+
+def create_checkpointer(backend: Optional[str] = None) -> BaseCheckpointSaver:
+    """
+    Build the conversation checkpointer selected by ``checkpointer_backend``.
+
+    Args:
+        backend: "memory" or "sqlite"; defaults to the configured backend
+
+    Returns:
+        A bounded checkpointer; falls back to memory if SQLite cannot be used
+    """
+    backend = (backend or settings.checkpointer_backend).lower()
+    bounds = {
+        "max_threads": settings.checkpointer_max_threads,
+        "max_messages": settings.checkpointer_max_messages,
+        "ttl": settings.checkpointer_ttl
+    }
+
+    if backend == "sqlite":
+        if not settings.checkpointer_path:
+            logger.warning("checkpointer_path_missing_using_memory")
+        else:
+            try:
+                saver = SQLiteSaver(settings.checkpointer_path, **bounds)
+                saver._connection()
+                logger.info("checkpointer_created", backend="sqlite", path=settings.checkpointer_path)
+                return saver
+            except sqlite3.Error as e:
+                logger.error("checkpointer_sqlite_failed_using_memory", error=str(e))
+    elif backend != "memory":
+        logger.warning("unknown_checkpointer_backend_using_memory", backend=backend)
+
+    return BoundedMemorySaver(**bounds)
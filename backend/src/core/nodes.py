@@ -1,12 +1,17 @@
 """LangGraph node implementations for agent workflow orchestration."""
 
-from typing import Dict, Any
+import asyncio
+import time
+import uuid
+from typing import Dict, Any, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
 import structlog
 
 from src.services.cached_vector_store import CachedVectorStore
-from src.services.query_analyzer import QueryAnalyzer
+from src.services.conversation_memory import ConversationMemory
+from src.services.query_analyzer import create_query_analyzer
+from src.services.reranker import LocalReranker, create_reranker
 from src.services.response_generator import ResponseGenerator
 from src.config import settings
 from .state import AgentState
@@ -18,8 +23,8 @@ logger = structlog.get_logger()
 class AnalysisNode(BaseNode):
     """Analyzes incoming queries to determine processing requirements."""
     
-    def __init__(self, llm: ChatOpenAI):
-        self.analyzer = QueryAnalyzer(llm)
+    def __init__(self, llm: ChatOpenAI, embedding_service=None):
+        self.analyzer = create_query_analyzer(llm, embedding_service)
     
     async def process(self, state: AgentState) -> Dict[str, Any]:
         """Analyze query and determine if retrieval is needed."""
@@ -40,18 +45,34 @@ class AnalysisNode(BaseNode):
 class RetrievalNode(BaseNode):
     """Handles context retrieval from the vector store."""
     
-    def __init__(self, vector_store: CachedVectorStore):
+    def __init__(self, vector_store: CachedVectorStore, reranker: Optional[LocalReranker] = None):
         self.vector_store = vector_store
+        self.reranker = reranker
     
     async def process(self, state: AgentState) -> Dict[str, Any]:
         """Retrieve relevant context from vector store."""
         try:
+            top_k = settings.max_search_results
             results = await self.vector_store.search(
                 query=state["query"],
-                top_k=settings.max_search_results,
-                threshold=settings.similarity_threshold
+                # Over-fetch so the reranker has candidates to choose from
+                top_k=max(top_k, self.reranker.candidates) if self.reranker else top_k,
+                threshold=settings.similarity_threshold,
+                metadata_filter=settings.retrieval_filter
             )
             
+            if self.reranker is not None:
+                results, report = self.reranker.rerank(state["query"], results, top_k)
+                logger.info(
+                    "context_reranked",
+                    candidates=report.candidates,
+                    selected=report.selected,
+                    rerank_ms=report.elapsed_ms,
+                    rank_changes=report.rank_changes,
+                    promoted=report.promoted,
+                    dropped=report.dropped
+                )
+            
             logger.info(
                 "context_retrieved",
                 query=state["query"][:100],
@@ -79,22 +100,42 @@ class ResponseNode(BaseNode):
     
     def __init__(self, llm: ChatOpenAI):
         self.generator = ResponseGenerator(llm)
+        self.memory = ConversationMemory(
+            llm,
+            self.generator.packer.counter,
+            window_turns=settings.conversation_memory_turns,
+            max_tokens=settings.conversation_memory_max_tokens,
+            summary_max_tokens=settings.conversation_summary_max_tokens
+        )
     
     async def process(self, state: AgentState) -> Dict[str, Any]:
-        """Generate response based on query and context."""
+        """Generate response based on query, context and conversation history."""
         try:
+            key = state.get("conversation_id") or ""
+            # A summary folded in the background after the previous turn
+            summary, summary_through = self.memory.collect(
+                key, state.get("conversation_summary"), state.get("summary_through")
+            )
             response = await self.generator.generate(
                 query=state["query"],
                 context=state.get("retrieved_context", []),
-                plan=state.get("response_plan")
+                plan=state.get("response_plan"),
+                history=self.memory.build(state["messages"], summary)
             )
             
+            # Explicit ids so the memory can remember how far it summarized
+            messages = state["messages"] + [
+                HumanMessage(content=state["query"], id=str(uuid.uuid4())),
+                AIMessage(content=response, id=str(uuid.uuid4()))
+            ]
+            # Summarizing turns that left the window must not delay the answer
+            self.memory.schedule_update(key, messages, summary, summary_through)
+            
             return {
                 "final_response": response,
-                "messages": state["messages"] + [
-                    HumanMessage(content=state["query"]),
-                    AIMessage(content=response)
-                ]
+                "messages": messages,
+                "conversation_summary": summary,
+                "summary_through": summary_through
             }
         except Exception as e:
             return self._handle_error(
@@ -119,6 +160,81 @@ class DirectResponseNode(BaseNode):
         }
 
 
+class SpeculativeRetrievalNode(BaseNode):
+    """
+    Runs query analysis and context retrieval concurrently.
+    
+    Retrieval starts before the analyzer has answered. When the answer is
+    "no" the retrieved context is discarded (or the search cancelled if
+    it is still running), so the analysis LLM call is no longer followed
+    by retrieval on the critical path.
+    """
+    
+    def __init__(self, analysis_node: AnalysisNode, retrieval_node: RetrievalNode):
+        self.analysis_node = analysis_node
+        self.retrieval_node = retrieval_node
+        self.runs = 0
+        self.used = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self.saved_ms = 0.0
+    
+    async def _timed_retrieval(self, state: AgentState):
+        started = time.perf_counter()
+        result = await self.retrieval_node.process(state)
+        return result, time.perf_counter() - started
+    
+    async def process(self, state: AgentState) -> Dict[str, Any]:
+        """Analyze the query while retrieval runs speculatively."""
+        retrieval = asyncio.create_task(self._timed_retrieval(state))
+        started = time.perf_counter()
+        try:
+            analysis = await self.analysis_node.process(state)
+        except BaseException:
+            retrieval.cancel()
+            raise
+        analysis_time = time.perf_counter() - started
+        self.runs += 1
+        
+        if not analysis.get("should_retrieve", False):
+            self.wasted += 1
+            if not retrieval.done():
+                retrieval.cancel()
+                self.cancelled += 1
+            logger.info("speculative_retrieval_discarded", query=state["query"][:100])
+            return {
+                **analysis,
+                "retrieval_complete": True,
+                "retrieved_context": [],
+                "messages": self._add_system_message(
+                    analysis.get("messages", state["messages"]),
+                    "Skipping retrieval - answering directly"
+                )
+            }
+        
+        retrieved, retrieval_time = await retrieval
+        self.used += 1
+        # Sequential execution would have paid for both
+        self.saved_ms += min(analysis_time, retrieval_time) * 1000
+        
+        return {
+            **analysis,
+            **retrieved,
+            "messages": analysis.get("messages", state["messages"]) + retrieved.get("messages", [])[-1:]
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """How often speculative retrieval paid off."""
+        return {
+            "runs": self.runs,
+            "used": self.used,
+            "wasted": self.wasted,
+            "cancelled": self.cancelled,
+            "waste_rate": round(self.wasted / self.runs * 100, 2) if self.runs else 0,
+            "average_saved_ms": round(self.saved_ms / self.used, 1) if self.used else 0
+        }
+
+
 class Nodes:
     """Node orchestrator providing backward compatibility and workflow management."""
     
@@ -130,17 +246,20 @@ class Nodes:
             model="gpt-4o-mini",
             temperature=0.2,
             timeout=settings.llm_timeout,
-            max_retries=2
+            max_retries=2,
+            # Report token usage (including cached prompt tokens) when streaming too
+            stream_usage=True
         )
         
         # Shared vector store with caching
         self.vector_store = CachedVectorStore(cache_ttl=300)
         
         # Initialize node instances
-        self._analysis_node = AnalysisNode(self.llm)
-        self._retrieval_node = RetrievalNode(self.vector_store)
+        self._analysis_node = AnalysisNode(self.llm, self.vector_store.embedding_service)
+        self._retrieval_node = RetrievalNode(self.vector_store, create_reranker())
         self._response_node = ResponseNode(self.llm)
         self._direct_node = DirectResponseNode()
+        self._speculative_node = SpeculativeRetrievalNode(self._analysis_node, self._retrieval_node)
     
     async def analyze_query(self, state: AgentState) -> Dict[str, Any]:
         """Delegate to AnalysisNode for backward compatibility."""
@@ -150,6 +269,24 @@ class Nodes:
         """Delegate to RetrievalNode for backward compatibility."""
         return await self._retrieval_node.process(state)
     
+    async def analyze_and_retrieve(self, state: AgentState) -> Dict[str, Any]:
+        """Delegate to SpeculativeRetrievalNode."""
+        return await self._speculative_node.process(state)
+    
+    def analyzer_stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the local query analyzer, if in use."""
+        analyzer = self._analysis_node.analyzer
+        return analyzer.stats() if hasattr(analyzer, "stats") else None
+    
+    def reranker_stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the retrieval reranker, if enabled."""
+        reranker = self._retrieval_node.reranker
+        return reranker.stats() if reranker is not None else None
+    
+    def speculation_stats(self) -> Dict[str, Any]:
+        """Statistics of speculative retrieval."""
+        return self._speculative_node.stats()
+    
     async def plan_and_generate_response(self, state: AgentState) -> Dict[str, Any]:
         """Combined planning and generation for optimized performance."""
         return await self._response_node.process(state)
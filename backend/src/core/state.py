@@ -11,6 +11,11 @@ class AgentState(TypedDict):
     # Core conversation state
     messages: Annotated[List[Dict[str, Any]], add_messages]
     
+    # Rolling summary of turns outside the memory window, and the id of
+    # the last answer folded into it
+    conversation_summary: Optional[str]
+    summary_through: Optional[str]
+    
     # Current user query
     query: str
     
@@ -10,6 +10,7 @@ from src.api.routes import chat, documents, search, health, admin
 from src.config import settings
 from src.utils import setup_logging
 from src.middleware import setup_security_middleware
+from src.core.agent import start_agent, shutdown_agent
 
 setup_logging()
 logger = structlog.get_logger()
@@ -25,9 +26,17 @@ async def lifespan(app: FastAPI):
         host=settings.api_host,
         port=settings.api_port
     )
+    
+    try:
+        await start_agent()
+    except Exception as e:
+        # Keep serving; the runtime is built lazily on the first request
+        logger.error("agent_startup_failed", error=str(e))
+    
     yield
     
     logger.info("application_shutting_down")
+    await shutdown_agent()
 
 app = FastAPI(
     title="Peterbot LangGraph API",
@@ -1,7 +1,17 @@
 """Request models for API endpoints."""
 
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Dict, Any, List, Literal
+
+from src.services.metadata_filter import parse_filter
+from src.utils.conversation_ids import is_issued, issue_conversation_id
+
+
+def _validate_filter(value: Optional[str]) -> Optional[str]:
+    if value is None or not value.strip():
+        return None
+    parse_filter(value)
+    return value
 
 
 class ChatRequest(BaseModel):
@@ -9,8 +19,12 @@ class ChatRequest(BaseModel):
     
     query: str = Field(..., min_length=1, description="User query")
     conversation_id: Optional[str] = Field(
-        default="default",
-        description="Conversation thread ID"
+        default=None,
+        validate_default=True,
+        description=(
+            "Conversation id returned by an earlier response; omitted or unknown "
+            "ids start a new conversation"
+        )
     )
     user_id: Optional[str] = Field(
         default="anonymous",
@@ -21,11 +35,23 @@ class ChatRequest(BaseModel):
         description="Additional context for the query"
     )
     
+    @field_validator("conversation_id", mode="after")
+    @classmethod
+    def assign_conversation_id(cls, value: Optional[str]) -> str:
+        """
+        Continue only conversations this server started.
+        
+        Missing, legacy ("default") and client-chosen ids get a fresh
+        thread, so visitors sending the same id never share history.
+        """
+        if not value or not is_issued(value):
+            return issue_conversation_id()
+        return value
+    
     class Config:
         json_schema_extra = {
             "example": {
                 "query": "Tell me about Peter's experience with Python",
-                "conversation_id": "conv_123",
                 "user_id": "user_456"
             }
         }
@@ -72,12 +98,99 @@ class SearchRequest(BaseModel):
         le=1.0,
         description="Minimum similarity threshold"
     )
+    consistency: Literal["cached", "strong"] = Field(
+        default="cached",
+        description=(
+            "cached: serve the in-memory index as is (may lag writes by the sync interval); "
+            "strong: apply changes committed to Firestore before searching"
+        )
+    )
+    filter: Optional[str] = Field(
+        default=None,
+        description=(
+            "Metadata filter, e.g. 'category in [skills, experience]' or "
+            "'category = projects and topic = ai_projects'"
+        )
+    )
+    mode: Optional[Literal["vector", "hybrid"]] = Field(
+        default=None,
+        description=(
+            "vector: rank by embedding similarity; hybrid: fuse it with BM25 keyword "
+            "ranking. Defaults to the server's SEARCH_MODE"
+        )
+    )
+    
+    @field_validator("filter", mode="after")
+    @classmethod
+    def validate_filter(cls, value: Optional[str]) -> Optional[str]:
+        """Reject malformed filter expressions up front."""
+        return _validate_filter(value)
     
     class Config:
         json_schema_extra = {
             "example": {
                 "query": "Python experience",
                 "top_k": 5,
+                "threshold": 0.7,
+                "consistency": "cached",
+                "filter": "category in [skills, experience]"
+            }
+        }
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for the batch search endpoint."""
+    
+    queries: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Search queries, answered in order"
+    )
+    top_k: Optional[int] = Field(
+        default=5,
+        ge=1,
+        le=20,
+        description="Number of results to return per query"
+    )
+    threshold: Optional[float] = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Minimum similarity threshold"
+    )
+    consistency: Literal["cached", "strong"] = Field(
+        default="cached",
+        description="As for /search; checked once for the whole batch"
+    )
+    filter: Optional[str] = Field(
+        default=None,
+        description="Metadata filter applied to every query, as for /search"
+    )
+    mode: Optional[Literal["vector", "hybrid"]] = Field(
+        default=None,
+        description="vector or hybrid ranking, as for /search"
+    )
+    
+    @field_validator("queries", mode="after")
+    @classmethod
+    def reject_blank_queries(cls, value: List[str]) -> List[str]:
+        """Every query must have text."""
+        if any(not query.strip() for query in value):
+            raise ValueError("queries must not be blank")
+        return value
+    
+    @field_validator("filter", mode="after")
+    @classmethod
+    def validate_filter(cls, value: Optional[str]) -> Optional[str]:
+        """Reject malformed filter expressions up front."""
+        return _validate_filter(value)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": ["Python experience", "React projects"],
+                "top_k": 3,
                 "threshold": 0.7
             }
-        }
\ No newline at end of file
+        }
@@ -9,7 +9,7 @@ class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
     
     response: str = Field(..., description="AI assistant response")
-    conversation_id: str = Field(..., description="Conversation thread ID")
+    conversation_id: str = Field(..., description="Conversation id; send it with the next question to continue")
     retrieved_context: List[Dict[str, Any]] = Field(
         default_factory=list,
         description="Retrieved documents used for response"
@@ -18,6 +18,10 @@ class ChatResponse(BaseModel):
         default_factory=datetime.utcnow,
         description="Response timestamp"
     )
+    token_usage: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="LLM token usage for this request, including provider-cached prompt tokens; None when served from cache"
+    )
     
     class Config:
         json_schema_extra = {
@@ -59,6 +63,14 @@ class SearchResult(BaseModel):
     id: str = Field(..., description="Document ID")
     text: str = Field(..., description="Document text")
     similarity: float = Field(..., description="Similarity score")
+    lexical_score: Optional[float] = Field(
+        default=None,
+        description="BM25 keyword score (hybrid search)"
+    )
+    score: Optional[float] = Field(
+        default=None,
+        description="Fused rank score the results are ordered by (hybrid search)"
+    )
     metadata: Dict[str, Any] = Field(
         default_factory=dict,
         description="Document metadata"
@@ -78,6 +90,16 @@ class SearchResponse(BaseModel):
     )
     query: str = Field(..., description="Original search query")
     total_results: int = Field(..., description="Total number of results")
+    consistency: str = Field(default="cached", description="Requested consistency")
+    mode: str = Field(default="vector", description="vector or hybrid ranking used")
+    served_by: Optional[str] = Field(
+        default=None,
+        description="cache, cache_verified (strong read) or firestore (cache unavailable)"
+    )
+    cache_age_seconds: Optional[float] = Field(
+        default=None,
+        description="Age of the index that served the request"
+    )
     
     class Config:
         json_schema_extra = {
@@ -91,7 +113,67 @@ class SearchResponse(BaseModel):
                     }
                 ],
                 "query": "Python experience",
-                "total_results": 1
+                "total_results": 1,
+                "consistency": "cached",
+                "served_by": "cache",
+                "cache_age_seconds": 42.0
+            }
+        }
+
+
+class BatchSearchResult(BaseModel):
+    """Results for one query of a batch."""
+    
+    query: str = Field(..., description="Search query")
+    results: List[SearchResult] = Field(
+        default_factory=list,
+        description="Search results"
+    )
+    total_results: int = Field(..., description="Number of results for this query")
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for the batch search endpoint."""
+    
+    results: List[BatchSearchResult] = Field(
+        default_factory=list,
+        description="Results per query, in request order"
+    )
+    total_queries: int = Field(..., description="Number of queries")
+    consistency: str = Field(default="cached", description="Requested consistency")
+    mode: str = Field(default="vector", description="vector or hybrid ranking used")
+    served_by: str = Field(..., description="cache or cache_verified (strong read)")
+    cache_age_seconds: Optional[float] = Field(
+        default=None,
+        description="Age of the index that served the request"
+    )
+    timing: Dict[str, float] = Field(
+        default_factory=dict,
+        description="embedding_ms, scoring_ms and total_ms for the whole batch"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "results": [
+                    {
+                        "query": "Python experience",
+                        "results": [
+                            {
+                                "id": "doc_1",
+                                "text": "Python expert with 5 years experience",
+                                "similarity": 0.95,
+                                "metadata": {"category": "skills"}
+                            }
+                        ],
+                        "total_results": 1
+                    }
+                ],
+                "total_queries": 1,
+                "consistency": "cached",
+                "served_by": "cache",
+                "cache_age_seconds": 42.0,
+                "timing": {"embedding_ms": 180.4, "scoring_ms": 0.9, "total_ms": 181.8}
             }
         }
 
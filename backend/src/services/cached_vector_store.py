@@ -1,87 +1,536 @@
 """Cached vector store for improved performance."""
 
 import asyncio
+import hashlib
+import json
 import time
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
+import numpy as np
 import structlog
+from src.config import settings
 from src.services.firebase_vector_store import FirebaseVectorStore
 from src.services.embeddings import EmbeddingService
+from src.services.vector_index import (
+    FlatIndex,
+    QuantizedIndex,
+    VectorIndex,
+    create_vector_index,
+    normalize_rows,
+    top_k_scores
+)
+from src.services.metadata_filter import MetadataFilter, MetadataIndex, parse_filter
+from src.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.services.vector_snapshot import VectorSnapshotStore
+from src.services.semantic_cache import invalidate_semantic_cache
+from src.services.vector_cache_sync import (
+    DocumentChange,
+    SnapshotListenerSync,
+    WatermarkPollingSync
+)
 
 logger = structlog.get_logger()
 
 
+class StaleCacheError(Exception):
+    """Raised when the vector cache is too old to serve and cannot be refreshed."""
+    pass
+
+
 class CachedVectorStore:
     """Vector store with local caching for improved search performance."""
     
-    def __init__(self, cache_ttl: int = 300):  # 5 minutes cache
-        self.firebase_store = FirebaseVectorStore()
-        self.embedding_service = EmbeddingService()
+    def __init__(
+        self,
+        cache_ttl: int = 300,  # 5 minutes cache
+        firebase_store: Optional[FirebaseVectorStore] = None,
+        embedding_service: Optional[EmbeddingService] = None,
+        snapshot_path: Optional[str] = None,
+        sync_mode: Optional[str] = None
+    ):
+        self.firebase_store = firebase_store or FirebaseVectorStore()
+        self.embedding_service = embedding_service or EmbeddingService()
         self.cache_ttl = cache_ttl
         self.documents_cache = None
+        self.embedding_matrix: Optional[np.ndarray] = None
+        self.index: VectorIndex = create_vector_index()
+        # Both hold another copy of the corpus per worker, so they are only
+        # built up front when configured and otherwise on first use
+        self.metadata_index: Optional[MetadataIndex] = None
+        self.lexical_index: Optional[BM25Index] = None
+        self._use_metadata_index = bool(settings.retrieval_filter)
+        self._use_lexical_index = settings.search_mode == "hybrid"
         self.cache_timestamp = 0
         self.cache_lock = asyncio.Lock()
         
-    async def _refresh_cache(self) -> None:
-        """Refresh the document cache from Firebase."""
-        try:
-            logger.info("refreshing_document_cache")
+        # Stale-while-revalidate: serve up to max_staleness while a
+        # background task refreshes anything older than cache_ttl
+        self.max_staleness = max(settings.vector_cache_max_staleness, cache_ttl)
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_failures = 0
+        self._next_refresh_at = 0.0
+        
+        # Share one memory-mapped snapshot between all workers on the host
+        snapshot_path = snapshot_path or settings.vector_snapshot_path
+        self.snapshot_store = VectorSnapshotStore(snapshot_path) if snapshot_path else None
+        if isinstance(self.index, QuantizedIndex) and self.snapshot_store is None:
+            # The codes are held next to the private float32 matrix the
+            # candidates are re-ranked against
+            logger.warning(
+                "vector_quantization_without_snapshot",
+                quantization=settings.vector_quantization,
+                detail="quantization adds memory unless VECTOR_SNAPSHOT_PATH is set"
+            )
+        
+        # "ttl" reloads everything on expiry; "listener" and "poll" keep the
+        # cache current by applying individual document changes
+        self.sync_mode = sync_mode or settings.vector_cache_sync
+        self._sync = None
+        
+        # Mutable index state used once incremental changes are applied
+        self._row_by_id: Optional[Dict[str, int]] = None
+        self._matrix_buffer: Optional[np.ndarray] = None
+        
+        # Detects reloads that picked up changes made elsewhere
+        self._corpus_fingerprint: Optional[str] = None
+    
+    def _cache_entry(self, doc_id: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the cached representation of a document, minus its embedding."""
+        return {
+            "id": doc_id,
+            "text": self.firebase_store.processor.extract_text_content(doc_data),
+            "metadata": doc_data.get("metadata", {}),
+            "created_at": doc_data.get("created_at"),
+            "updated_at": doc_data.get("updated_at")
+        }
+    
+    def _scan_collection(self) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Stream the whole collection into documents and an embedding matrix.
+        
+        Returns:
+            Tuple of (documents, matrix) where row i of the pre-normalized
+            float32 matrix belongs to documents[i]
+        """
+        # Access the collection through the firebase connection
+        collection = self.firebase_store.firebase.get_collection(self.firebase_store.collection_name)
+        docs = collection.stream()
+        
+        cached_docs = []
+        embeddings = []
+        dimension = None
+        for doc in docs:
+            doc_data = doc.to_dict()
             
-            # Access the collection through the firebase connection
-            collection = self.firebase_store.firebase.get_collection(self.firebase_store.collection_name)
-            docs = collection.stream()
+            # Use the document processor for consistency
+            embedding = self.firebase_store.processor.extract_embedding(doc_data)
             
-            cached_docs = []
-            for doc in docs:
-                doc_data = doc.to_dict()
+            if embedding:
+                dimension = dimension or len(embedding)
+                if len(embedding) != dimension:
+                    logger.warning(
+                        "cache_embedding_dimension_mismatch",
+                        document_id=doc.id,
+                        expected=dimension,
+                        actual=len(embedding)
+                    )
+                    continue
                 
-                # Use the document processor for consistency
-                embedding = self.firebase_store.processor.extract_embedding(doc_data)
-                
-                if embedding:
-                    text_content = self.firebase_store.processor.extract_text_content(doc_data)
-                    
-                    cached_docs.append({
-                        "id": doc.id,
-                        "text": text_content,
-                        "embedding": embedding,
-                        "metadata": doc_data.get("metadata", {}),
-                        "created_at": doc_data.get("created_at"),
-                        "updated_at": doc_data.get("updated_at")
-                    })
+                cached_docs.append(self._cache_entry(doc.id, doc_data))
+                embeddings.append(embedding)
+        
+        # One contiguous, pre-normalized float32 matrix so a search is a
+        # single matrix-vector product.
+        matrix = np.array(embeddings, dtype=np.float32).reshape(len(cached_docs), dimension or 0)
+        
+        return cached_docs, normalize_rows(matrix)
+    
+    @staticmethod
+    def _fingerprint(documents) -> str:
+        """Digest of document ids and update times."""
+        digest = hashlib.sha1()
+        for doc in documents:
+            digest.update(f"{doc['id']}\0{doc.get('updated_at')}\0".encode("utf-8"))
+        return digest.hexdigest()
+    
+    async def _refresh_cache(self, built_after: float = 0.0) -> bool:
+        """
+        Refresh the document cache from Firebase or the shared snapshot.
+        
+        The replacement is built off the event loop and swapped in with
+        one synchronous assignment, so searches see either the old or the
+        new index, never a mix.
+        
+        Args:
+            built_after: Reject a shared snapshot whose collection scan
+                started before this time and scan the collection instead
+        
+        Returns:
+            True if the cache was replaced
+        """
+        try:
+            logger.info("refreshing_document_cache", shared_snapshot=self.snapshot_store is not None)
+            
+            if self.snapshot_store is not None:
+                snapshot = await asyncio.to_thread(
+                    self.snapshot_store.acquire, self.cache_ttl, self._scan_collection, built_after
+                )
+                cached_docs, matrix = snapshot.documents, snapshot.matrix
+                # Expire together with the snapshot, not with this worker's load
+                cache_timestamp = snapshot.created_at
+            else:
+                cached_docs, matrix = await asyncio.to_thread(self._scan_collection)
+                cache_timestamp = time.time()
+            
+            index = create_vector_index()
+            await asyncio.to_thread(index.build, matrix)
+            metadata_index = lexical_index = fingerprint = None
+            if self._use_metadata_index:
+                metadata_index = MetadataIndex()
+                await asyncio.to_thread(metadata_index.build, cached_docs)
+            if self._use_lexical_index:
+                lexical_index = BM25Index()
+                await asyncio.to_thread(lexical_index.build, cached_docs)
+            if settings.semantic_cache_max_entries > 0:
+                # Only needed to invalidate the semantic cache
+                fingerprint = await asyncio.to_thread(self._fingerprint, cached_docs)
             
             self.documents_cache = cached_docs
-            self.cache_timestamp = time.time()
+            self.embedding_matrix = matrix
+            self.index = index
+            self.metadata_index = metadata_index
+            self.lexical_index = lexical_index
+            self.cache_timestamp = cache_timestamp
+            self._row_by_id = None
+            self._matrix_buffer = None
+            self._refresh_failures = 0
+            self._next_refresh_at = 0.0
+            
+            if self._corpus_fingerprint not in (None, fingerprint):
+                invalidate_semantic_cache("vector_cache_reloaded")
+            self._corpus_fingerprint = fingerprint
             
             logger.info(
                 "document_cache_refreshed", 
                 document_count=len(cached_docs),
                 cache_timestamp=self.cache_timestamp
             )
+            return True
             
         except Exception as e:
-            logger.error("cache_refresh_failed", error=str(e))
-            # Ensure cache is initialized even on failure
-            if self.documents_cache is None:
-                self.documents_cache = []
+            # Exponential backoff so a Firestore outage is not hammered
+            self._refresh_failures += 1
+            backoff = min(
+                settings.vector_cache_refresh_backoff * 2 ** (self._refresh_failures - 1),
+                self.cache_ttl
+            )
+            self._next_refresh_at = time.time() + backoff
+            logger.error(
+                "cache_refresh_failed",
+                error=str(e),
+                consecutive_failures=self._refresh_failures,
+                retry_in_seconds=backoff
+            )
+            return False
+    
+    def _cache_age(self) -> float:
+        return time.time() - self.cache_timestamp
     
     async def _ensure_cache_fresh(self) -> None:
-        """Ensure cache is fresh, refresh if needed."""
-        current_time = time.time()
+        """
+        Ensure the cache may be served, refreshing it if needed.
+        
+        Past the TTL the stale index keeps serving while a background task
+        rebuilds it. Only a missing cache, or one older than the max
+        staleness, makes the caller wait for a reload.
+        
+        Raises:
+            StaleCacheError: If no sufficiently fresh cache is available
+        """
+        if self._sync is not None and self._sync.healthy:
+            # Changes are streamed in; no periodic reload needed
+            return
+        
+        if self.documents_cache is not None and self._cache_age() <= self.max_staleness:
+            if self._cache_age() > self.cache_ttl:
+                self._schedule_refresh()
+            return
+        
+        async with self.cache_lock:
+            if self.documents_cache is None or self._cache_age() > self.max_staleness:
+                if time.time() < self._next_refresh_at:
+                    raise StaleCacheError("Vector cache refresh is backing off after failures")
+                if not await self._refresh_cache():
+                    raise StaleCacheError("Vector cache could not be refreshed")
+                await self._start_sync()
+    
+    def _schedule_refresh(self) -> None:
+        """Start a background refresh unless one is running or backing off."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.time() < self._next_refresh_at:
+            return
+        
+        self._refresh_task = asyncio.create_task(self._background_refresh())
+    
+    async def _background_refresh(self) -> None:
+        async with self.cache_lock:
+            if self._cache_age() <= self.cache_ttl:
+                # Refreshed by someone else meanwhile
+                return
+            
+            started = time.time()
+            refreshed = await self._refresh_cache()
+            
+            logger.info(
+                "background_cache_refresh_finished",
+                success=refreshed,
+                duration_ms=int((time.time() - started) * 1000)
+            )
+            if refreshed:
+                await self._start_sync()
+    
+    async def warm_up(self) -> None:
+        """Load the cache ahead of the first search."""
+        try:
+            await self._ensure_cache_fresh()
+        except Exception as e:
+            logger.warning("vector_cache_warm_up_failed", error=str(e))
+    
+    async def close(self) -> None:
+        """Cancel background refresh and stop synchronization."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        await self.stop_sync()
+    
+    async def _start_sync(self) -> None:
+        """Start incremental synchronization after the initial load."""
+        if self.sync_mode == "ttl" or (self._sync is not None and self._sync.healthy):
+            return
+        
+        await self.stop_sync()
+        collection = self.firebase_store.firebase.get_collection(self.firebase_store.collection_name)
+        
+        try:
+            if self.sync_mode == "listener":
+                self._sync = SnapshotListenerSync(collection, self.apply_changes, self.reconcile_snapshot)
+                self._sync.start()
+            elif self.sync_mode == "poll":
+                self._sync = WatermarkPollingSync(
+                    collection,
+                    self.apply_changes,
+                    self._known_ids,
+                    interval=settings.vector_cache_poll_interval,
+                    reconcile_interval=self.cache_ttl
+                )
+                self._sync.start(self._latest_update())
+            else:
+                logger.warning("unknown_vector_cache_sync_mode", mode=self.sync_mode)
+        except Exception as e:
+            # Fall back to TTL reloads
+            logger.error("vector_cache_sync_start_failed", mode=self.sync_mode, error=str(e))
+            self._sync = None
+    
+    async def stop_sync(self) -> None:
+        """Stop incremental synchronization, if running."""
+        if self._sync is not None:
+            await self._sync.stop()
+            self._sync = None
+    
+    def _known_ids(self) -> Set[str]:
+        return {doc["id"] for doc in self.documents_cache or []}
+    
+    def _latest_update(self) -> Optional[datetime]:
+        """Newest ``updated_at`` in the cache, used as the polling watermark."""
+        latest = None
+        for doc in self.documents_cache or []:
+            updated_at = doc.get("updated_at")
+            if isinstance(updated_at, str):
+                updated_at = datetime.fromisoformat(updated_at)
+            if isinstance(updated_at, datetime) and (latest is None or updated_at > latest):
+                latest = updated_at
+        return latest
+    
+    def _ensure_mutable(self) -> None:
+        """Switch from the loaded (possibly memory-mapped) index to a private, growable copy."""
+        if self._row_by_id is not None:
+            return
         
-        if (self.documents_cache is None or 
-            current_time - self.cache_timestamp > self.cache_ttl):
+        self.documents_cache = list(self.documents_cache)
+        self._matrix_buffer = np.array(self.embedding_matrix, dtype=np.float32, copy=True)
+        self._row_by_id = {doc["id"]: row for row, doc in enumerate(self.documents_cache)}
+    
+    def _upsert_row(self, doc_id: str, doc_data: Dict[str, Any]) -> None:
+        embedding = self.firebase_store.processor.extract_embedding(doc_data)
+        dimension = self._matrix_buffer.shape[1]
+        
+        if not embedding or (dimension and len(embedding) != dimension):
+            # Not searchable any more; make sure no stale row survives
+            self._remove_row(doc_id)
+            return
+        
+        vector = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        row = self._row_by_id.get(doc_id)
+        
+        if row is None:
+            row = len(self.documents_cache)
+            if not dimension or row == self._matrix_buffer.shape[0]:
+                # Amortized O(1) append: double the buffer when full
+                grown = np.zeros((max(16, row * 2), len(embedding)), dtype=np.float32)
+                grown[:row] = self._matrix_buffer[:row]
+                self._matrix_buffer = grown
+            self.documents_cache.append(self._cache_entry(doc_id, doc_data))
+            self._row_by_id[doc_id] = row
+        else:
+            self.documents_cache[row] = self._cache_entry(doc_id, doc_data)
+        
+        if self.metadata_index is not None:
+            self.metadata_index.set_row(row, self.documents_cache[row]["metadata"])
+        if self.lexical_index is not None:
+            self.lexical_index.set_row(row, self.documents_cache[row])
+        self._matrix_buffer[row] = vector
+        self.index.set_row(row, vector)
+    
+    def _remove_row(self, doc_id: str) -> None:
+        row = self._row_by_id.pop(doc_id, None)
+        if row is None:
+            return
+        
+        # Swap-remove keeps the live rows contiguous
+        last = len(self.documents_cache) - 1
+        if row != last:
+            moved = self.documents_cache[last]
+            self.documents_cache[row] = moved
+            self._matrix_buffer[row] = self._matrix_buffer[last]
+            self.index.set_row(row, self._matrix_buffer[row])
+            self._row_by_id[moved["id"]] = row
+        self.documents_cache.pop()
+        if self.metadata_index is not None:
+            self.metadata_index.remove_row(row)
+        if self.lexical_index is not None:
+            self.lexical_index.remove_row(row)
+        self.index.truncate(len(self.documents_cache))
+    
+    def apply_changes(self, changes: List[DocumentChange]) -> None:
+        """
+        Apply inserts, updates and deletes to the cached index in place.
+        
+        Must run on the event loop thread so it never interleaves with a
+        search.
+        """
+        if self.documents_cache is None:
+            # Not loaded yet; the initial load will include these changes
+            return
+        
+        try:
+            self._ensure_mutable()
+            
+            for change in changes:
+                if change.data is None:
+                    self._remove_row(change.document_id)
+                else:
+                    self._upsert_row(change.document_id, change.data)
             
+            self.embedding_matrix = self._matrix_buffer[:len(self.documents_cache)]
+            self.cache_timestamp = time.time()
+            self._corpus_fingerprint = ""  # unknown until the next full reload
+            invalidate_semantic_cache("documents_changed")
+            
+            logger.info(
+                "vector_cache_changes_applied",
+                change_count=len(changes),
+                removed=sum(1 for change in changes if change.data is None),
+                document_count=len(self.documents_cache)
+            )
+        except Exception as e:
+            logger.error("vector_cache_apply_failed", error=str(e))
+            self._invalidate()
+    
+    def _unchanged(self, cached: Optional[Dict[str, Any]], doc_id: str, doc_data: Dict[str, Any]) -> bool:
+        """Whether a document's data matches its cached row."""
+        if cached is None:
+            return False
+        # Snapshot rows went through JSON, so compare both sides that way
+        def comparable(entry):
+            return json.dumps(
+                [entry["text"], entry["metadata"], entry.get("updated_at")],
+                sort_keys=True,
+                default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value)
+            )
+        return comparable(cached) == comparable(self._cache_entry(doc_id, doc_data))
+    
+    def reconcile_snapshot(self, changes: List[DocumentChange]) -> None:
+        """
+        Apply a listener's initial snapshot of the whole collection.
+        
+        Only documents that differ from the cache, and removals of cached
+        documents the snapshot no longer lists, are applied. An unchanged
+        cache is left alone, so it keeps mapping the shared snapshot
+        instead of copying the matrix.
+        """
+        if self.documents_cache is None:
+            return
+        
+        cached = {doc["id"]: doc for doc in self.documents_cache}
+        listed = {change.document_id for change in changes}
+        stale = [
+            change for change in changes
+            if change.data is None
+            or not self._unchanged(cached.get(change.document_id), change.document_id, change.data)
+        ]
+        stale += [DocumentChange(doc_id, None) for doc_id in cached if doc_id not in listed]
+        
+        logger.info("vector_cache_initial_snapshot_reconciled", documents=len(changes), applied=len(stale))
+        if stale:
+            self.apply_changes(stale)
+    
+    async def _catch_up(self) -> int:
+        """
+        Apply every change committed to Firestore since the cache was built.
+        
+        Reads only documents updated past the cache's newest ``updated_at``
+        plus the collection's ids (no fields) to detect deletions, instead
+        of downloading every embedding. A cache without update times is
+        reloaded in full, from a shared snapshot only if that snapshot read
+        the collection after this call started.
+        
+        Returns:
+            Number of changes applied
+        """
+        watermark = self._latest_update()
+        if watermark is None:
+            requested_at = time.time()
             async with self.cache_lock:
-               
-                if (self.documents_cache is None or 
-                    current_time - self.cache_timestamp > self.cache_ttl):
-                    await self._refresh_cache()
+                if not await self._refresh_cache(built_after=requested_at):
+                    raise StaleCacheError("Vector cache could not be refreshed")
+            return len(self.documents_cache)
+        
+        collection = self.firebase_store.firebase.get_collection(self.firebase_store.collection_name)
+        # One-off poll with the polling sync's queries
+        checker = WatermarkPollingSync(collection, self.apply_changes, self._known_ids)
+        checker.watermark = watermark
+        
+        def fetch() -> List[DocumentChange]:
+            return checker.poll() + checker.reconcile()
+        
+        changes = await asyncio.to_thread(fetch)
+        if changes:
+            self.apply_changes(changes)
+        return len(changes)
     
     async def search(
         self,
         query: str,
         top_k: Optional[int] = None,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        consistency: str = "cached",
+        metadata_filter: Optional[str] = None,
+        mode: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar documents using cached data.
@@ -90,46 +539,82 @@ class CachedVectorStore:
             query: Query text
             top_k: Number of results to return
             threshold: Minimum similarity threshold
+            consistency: "cached" serves the index as it is; "strong" first
+                applies changes committed to Firestore since it was built
+            metadata_filter: Filter expression such as
+                ``category in [skills, experience]``; only matching rows
+                are scored
+            mode: "vector" ranks by cosine similarity; "hybrid" fuses it
+                with BM25 keyword ranking (defaults to ``search_mode``)
             
         Returns:
             List of matching documents with similarity scores
         """
+        results, _ = await self.search_with_info(query, top_k, threshold, consistency, metadata_filter, mode)
+        return results
+    
+    async def search_with_info(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        threshold: Optional[float] = None,
+        consistency: str = "cached",
+        metadata_filter: Optional[str] = None,
+        mode: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Search like ``search`` and also report how the request was served.
+        
+        Returns:
+            Tuple of (results, info) where info has ``served_by`` ("cache",
+            "cache_verified" after a strong check, or "firestore" when the
+            cache failed and the collection was scanned), ``consistency``,
+            ``mode``, ``cache_age_seconds``, ``applied_changes`` and, with
+            a filter, ``filtered_rows``
+        """
+        if consistency not in ("cached", "strong"):
+            raise ValueError(f"Unknown consistency: {consistency}")
+        mode = self._search_mode(mode)
+        parsed_filter = parse_filter(metadata_filter) if metadata_filter else None
+        
+        info = {"consistency": consistency, "mode": mode, "applied_changes": 0}
         try:
             start_time = time.time()
             
             # Use settings defaults if not provided
-            from src.config import settings
             top_k = top_k or settings.max_search_results
             threshold = threshold or settings.similarity_threshold
             
             # Ensure cache is fresh
             await self._ensure_cache_fresh()
+            if consistency == "strong":
+                info["applied_changes"] = await self._catch_up()
             
             # Generate query embedding
             query_embedding = await self.embedding_service.embed_text(query)
             
-            # Search through cached documents
-            results = []
-            for doc in self.documents_cache:
-                similarity = self.embedding_service.calculate_similarity(
-                    query_embedding,
-                    doc["embedding"]
+            # Snapshot together so a concurrent refresh cannot misalign rows
+            documents, matrix, index = self.documents_cache, self.embedding_matrix, self.index
+            lexical_index = self._lexical() if mode == "hybrid" else None
+            rows = self._filter_rows(parsed_filter)
+            if rows is not None:
+                info["filtered_rows"] = int(rows.shape[0])
+            
+            if mode == "hybrid":
+                candidates = top_k * settings.hybrid_candidate_factor
+                results = self._fuse(
+                    documents, matrix, lexical_index, query, query_embedding,
+                    self._top_k(index, matrix, query_embedding, candidates, rows),
+                    top_k, threshold, rows
+                )
+            else:
+                results = self._results(
+                    documents, self._top_k(index, matrix, query_embedding, top_k, rows), threshold
                 )
-                
-                if similarity >= threshold:
-                    results.append({
-                        "id": doc["id"],
-                        "text": doc["text"],
-                        "metadata": doc["metadata"],
-                        "similarity": similarity,
-                        "created_at": doc.get("created_at"),
-                        "updated_at": doc.get("updated_at")
-                    })
-            
-            results.sort(key=lambda x: x["similarity"], reverse=True)
-            results = results[:top_k]
             
             search_time = time.time() - start_time
+            info["served_by"] = "cache_verified" if consistency == "strong" else "cache"
+            info["cache_age_seconds"] = round(self._cache_age(), 1)
             
             logger.info(
                 "cached_search_completed",
@@ -137,16 +622,303 @@ class CachedVectorStore:
                 results_count=len(results),
                 search_time_ms=int(search_time * 1000),
                 top_similarity=results[0]["similarity"] if results else 0,
-                cache_doc_count=len(self.documents_cache)
+                cache_doc_count=len(self.documents_cache),
+                served_by=info["served_by"],
+                mode=mode,
+                applied_changes=info["applied_changes"],
+                filtered_rows=info.get("filtered_rows")
             )
             
-            return results
+            return results, info
             
         except Exception as e:
             logger.error("cached_search_failed", error=str(e), query=query[:100])
             
             logger.info("falling_back_to_firebase_search")
-            return await self.firebase_store.search(query, top_k, threshold)
+            # The collection scan ranks by similarity only
+            info.update(served_by="firestore", mode="vector", cache_age_seconds=None)
+            return await self.firebase_store.search(query, top_k, threshold, parsed_filter), info
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        threshold: Optional[float] = None,
+        consistency: str = "cached",
+        metadata_filter: Optional[str] = None,
+        mode: Optional[str] = None
+    ) -> Tuple[List[List[Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Search for several queries at once.
+        
+        All queries are embedded in one request and, with an exact index,
+        scored by one matrix-matrix product against the cached matrix.
+        There is no Firestore fallback; a batch scanning the collection
+        once per query would defeat its purpose.
+        
+        Args:
+            queries: Query texts
+            top_k: Number of results per query
+            threshold: Minimum similarity threshold
+            consistency: "cached" or "strong", as for ``search``
+            metadata_filter: Filter expression applied to every query
+            mode: "vector" or "hybrid", as for ``search``
+            
+        Returns:
+            Tuple of (results per query, info) where info is as for
+            ``search_with_info`` plus ``embedding_ms``, ``scoring_ms`` and
+            ``total_ms`` for the whole batch
+            
+        Raises:
+            StaleCacheError: If the index cannot be served
+        """
+        if consistency not in ("cached", "strong"):
+            raise ValueError(f"Unknown consistency: {consistency}")
+        mode = self._search_mode(mode)
+        parsed_filter = parse_filter(metadata_filter) if metadata_filter else None
+        
+        started = time.perf_counter()
+        top_k = top_k or settings.max_search_results
+        threshold = threshold or settings.similarity_threshold
+        candidates = top_k * settings.hybrid_candidate_factor if mode == "hybrid" else top_k
+        
+        await self._ensure_cache_fresh()
+        applied_changes = await self._catch_up() if consistency == "strong" else 0
+        
+        embedding_started = time.perf_counter()
+        embeddings = await self.embedding_service.embed_queries(queries)
+        scoring_started = time.perf_counter()
+        
+        documents, matrix, index = self.documents_cache, self.embedding_matrix, self.index
+        lexical_index = self._lexical() if mode == "hybrid" else None
+        rows = self._filter_rows(parsed_filter)
+        query_matrix = None
+        if matrix is None or matrix.shape[0] == 0 or (rows is not None and rows.shape[0] == 0):
+            ranked = [[] for _ in queries]
+        else:
+            query_matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(queries), -1)
+            if query_matrix.shape[1] != matrix.shape[1]:
+                raise ValueError(
+                    f"Query dimension {query_matrix.shape[1]} does not match "
+                    f"cached dimension {matrix.shape[1]}"
+                )
+            query_matrix = normalize_rows(query_matrix)
+            if rows is None:
+                ranked = index.search_batch(matrix, query_matrix, candidates)
+            else:
+                # Exact scoring of the selected rows only
+                ranked = [
+                    [(int(rows[row]), similarity) for row, similarity in pairs]
+                    for pairs in FlatIndex().search_batch(matrix[rows], query_matrix, candidates)
+                ]
+        
+        if mode == "hybrid" and query_matrix is not None:
+            results = [
+                self._fuse(documents, matrix, lexical_index, query, query_matrix[i], ranked[i], top_k, threshold, rows)
+                for i, query in enumerate(queries)
+            ]
+        else:
+            results = [self._results(documents, pairs, threshold) for pairs in ranked]
+        finished = time.perf_counter()
+        
+        info = {
+            "consistency": consistency,
+            "served_by": "cache_verified" if consistency == "strong" else "cache",
+            "mode": mode,
+            "applied_changes": applied_changes,
+            "cache_age_seconds": round(self._cache_age(), 1),
+            "filtered_rows": None if rows is None else int(rows.shape[0]),
+            "embedding_ms": round((scoring_started - embedding_started) * 1000, 2),
+            "scoring_ms": round((finished - scoring_started) * 1000, 2),
+            "total_ms": round((finished - started) * 1000, 2)
+        }
+        
+        logger.info(
+            "cached_batch_search_completed",
+            query_count=len(queries),
+            results_count=sum(len(r) for r in results),
+            cache_doc_count=len(documents),
+            **{key: info[key] for key in ("served_by", "mode", "embedding_ms", "scoring_ms", "total_ms")}
+        )
+        
+        return results, info
+    
+    @staticmethod
+    def _search_mode(mode: Optional[str]) -> str:
+        mode = mode or settings.search_mode
+        if mode not in ("vector", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        return mode
+    
+    @staticmethod
+    def _result(doc: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        return {
+            "id": doc["id"],
+            "text": doc["text"],
+            "metadata": doc["metadata"],
+            "similarity": similarity,
+            "created_at": doc.get("created_at"),
+            "updated_at": doc.get("updated_at")
+        }
+    
+    @classmethod
+    def _results(
+        cls,
+        documents: List[Dict[str, Any]],
+        ranked: List[tuple],
+        threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Result dicts for ranked (row, similarity) pairs above the threshold."""
+        results = []
+        for row, similarity in ranked:
+            if similarity < threshold:
+                break
+            results.append(cls._result(documents[row], similarity))
+        return results
+    
+    def _fuse(
+        self,
+        documents: List[Dict[str, Any]],
+        matrix: np.ndarray,
+        lexical_index: BM25Index,
+        query: str,
+        query_embedding,
+        vector_ranked: List[tuple],
+        top_k: int,
+        threshold: float,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid results: vector and BM25 rankings fused by reciprocal rank.
+        
+        A document enters the fusion through a similarity above the
+        threshold or through a BM25 score of at least
+        ``hybrid_min_lexical_score``, so exact names and terms that embed
+        poorly are found without lowering the similarity threshold. Terms
+        found in most documents score near zero and admit nothing.
+        
+        Args:
+            documents: Cached documents, row-aligned with ``matrix``
+            matrix: Normalized embedding matrix
+            lexical_index: BM25 index over the same rows
+            query: Query text
+            query_embedding: Query vector
+            vector_ranked: (row, similarity) candidates from the vector index
+            top_k: Number of results
+            threshold: Minimum similarity for the vector ranking
+            rows: Rows selected by a metadata filter
+            
+        Returns:
+            Result dicts in fused order with ``similarity``,
+            ``lexical_score`` and the fused ``score``
+        """
+        candidates = top_k * settings.hybrid_candidate_factor
+        similarities = dict(vector_ranked)
+        lexical = [
+            (row, score)
+            for row, score in lexical_index.search(
+                query, candidates, rows.tolist() if rows is not None else None
+            )
+            if score >= settings.hybrid_min_lexical_score
+        ]
+        lexical_scores = dict(lexical)
+        
+        fused = reciprocal_rank_fusion(
+            [[row for row, similarity in vector_ranked if similarity >= threshold], [row for row, _ in lexical]],
+            settings.hybrid_rrf_k
+        )[:top_k]
+        
+        # Keyword-only hits still report their cosine similarity
+        missing = [row for row, _ in fused if row not in similarities]
+        if missing and matrix is not None:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query_vector)
+            scores = matrix[missing] @ (query_vector / norm) if norm else np.zeros(len(missing))
+            similarities.update(zip(missing, scores.tolist()))
+        
+        results = []
+        for row, score in fused:
+            result = self._result(documents[row], float(similarities[row]))
+            result["lexical_score"] = round(lexical_scores.get(row, 0.0), 4)
+            result["score"] = score
+            results.append(result)
+        return results
+    
+    def _top_k(
+        self,
+        index: VectorIndex,
+        matrix: np.ndarray,
+        query_embedding: List[float],
+        top_k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """
+        Score cached rows through the configured index.
+        
+        With ``rows`` (a metadata filter's selection) only those rows are
+        scored, exactly; filtered sets are small enough not to need the
+        index.
+        
+        Returns:
+            (row index, similarity) pairs in descending similarity order
+        """
+        if matrix is None or matrix.shape[0] == 0:
+            return []
+        
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        if query_vector.shape[0] != matrix.shape[1]:
+            raise ValueError(
+                f"Query dimension {query_vector.shape[0]} does not match "
+                f"cached dimension {matrix.shape[1]}"
+            )
+        
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        
+        if rows is not None:
+            return top_k_scores(matrix[rows] @ (query_vector / norm), top_k, rows)
+        return index.search(matrix, query_vector / norm, top_k)
+    
+    def _filter_rows(self, metadata_filter: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Rows selected by the metadata index, or None to score every row."""
+        if metadata_filter is None:
+            return None
+        if self.metadata_index is None:
+            self._use_metadata_index = True
+            self.metadata_index = self._build_on_demand(MetadataIndex(), "metadata")
+        return self.metadata_index.rows(metadata_filter)
+    
+    def _lexical(self) -> BM25Index:
+        """The BM25 index, built on the first hybrid search if not configured."""
+        if self.lexical_index is None:
+            self._use_lexical_index = True
+            self.lexical_index = self._build_on_demand(BM25Index(), "lexical")
+        return self.lexical_index
+    
+    def _build_on_demand(self, index, kind: str):
+        # Built in place on the event loop: a thread could see the rows
+        # change under it, and it is a one-time cost per worker
+        started = time.perf_counter()
+        index.build(self.documents_cache or [])
+        logger.info(
+            "search_index_built_on_demand",
+            kind=kind,
+            document_count=len(self.documents_cache or []),
+            build_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+        return index
+    
+    def _invalidate(self) -> None:
+        """Force the next search to reload the cache."""
+        invalidate_semantic_cache("documents_changed")
+        if self._sync is not None and self._sync.healthy:
+            # The change will arrive through the sync channel
+            return
+        
+        self.cache_timestamp = 0
+        if self.snapshot_store is not None:
+            self.snapshot_store.invalidate()
     
     async def add_document(
         self,
@@ -156,8 +928,7 @@ class CachedVectorStore:
     ) -> str:
         """Add document and invalidate cache."""
         result = await self.firebase_store.add_document(text, metadata, document_id)
-       
-        self.cache_timestamp = 0
+        self._invalidate()
         logger.info("document_added_cache_invalidated", document_id=result)
         return result
     
@@ -169,16 +940,16 @@ class CachedVectorStore:
     ) -> bool:
         """Update document and invalidate cache."""
         result = await self.firebase_store.update_document(document_id, text, metadata)
-       
-        self.cache_timestamp = 0
+        self._invalidate()
         logger.info("document_updated_cache_invalidated", document_id=document_id)
         return result
     
     async def delete_document(self, document_id: str) -> bool:
         """Delete document and invalidate cache."""
         result = await self.firebase_store.delete_document(document_id)
-      
-        self.cache_timestamp = 0
+        if self._sync is not None:
+            self.apply_changes([DocumentChange(document_id, None)])
+        self._invalidate()
         logger.info("document_deleted_cache_invalidated", document_id=document_id)
         return result
     
@@ -186,7 +957,17 @@ class CachedVectorStore:
         """Get cache information for monitoring."""
         return {
             "cached_documents": len(self.documents_cache) if self.documents_cache else 0,
+            "index": self.index.stats(),
+            "metadata_fields": self.metadata_index.stats() if self.metadata_index is not None else None,
+            "lexical_index": self.lexical_index.stats() if self.lexical_index is not None else None,
+            "embedding_matrix_bytes": int(self.embedding_matrix.nbytes) if self.embedding_matrix is not None else 0,
             "cache_age_seconds": int(time.time() - self.cache_timestamp),
             "cache_ttl_seconds": self.cache_ttl,
-            "cache_fresh": time.time() - self.cache_timestamp < self.cache_ttl
+            "cache_fresh": time.time() - self.cache_timestamp < self.cache_ttl,
+            "max_staleness_seconds": self.max_staleness,
+            "refresh_in_progress": self._refresh_task is not None and not self._refresh_task.done(),
+            "refresh_failures": self._refresh_failures,
+            "shared_snapshot": self.snapshot_store.path if self.snapshot_store else None,
+            "sync_mode": self.sync_mode,
+            "sync_healthy": self._sync.healthy if self._sync is not None else False
         }
\ No newline at end of file
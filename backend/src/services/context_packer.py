@@ -0,0 +1,165 @@
+"""Token-budgeted packing of retrieved documents into prompt context."""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Set
+import structlog
+
+logger = structlog.get_logger()
+
+
+class TokenCounter:
+    """
+    Counts and truncates tokens with the model's tiktoken encoding.
+
+    tiktoken downloads its encodings on first use; when that is not
+    possible a conservative estimate of 4 characters per token is used.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning("tokenizer_unavailable_using_estimate", model=model, error=str(e))
+
+    def count(self, text: str) -> int:
+        """Number of tokens in ``text``."""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return -(-len(text) // self.CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of ``text`` within ``max_tokens``, cut at a word boundary."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= max_tokens:
+                return text
+            prefix = self.encoding.decode(tokens[:max_tokens])
+        else:
+            limit = max_tokens * self.CHARS_PER_TOKEN
+            if len(text) <= limit:
+                return text
+            prefix = text[:limit]
+
+        cut = prefix.rfind(" ")
+        return (prefix[:cut] if cut > len(prefix) // 2 else prefix).rstrip() + " …"
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model: str) -> TokenCounter:
+    """Shared token counter per model."""
+    return TokenCounter(model)
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextPacker:
+    """
+    Formats retrieved documents for the prompt within a token budget.
+
+    Documents are taken in descending similarity. Near-duplicates of an
+    already packed document (overlapping chunks) are skipped, only
+    whitelisted metadata keys are included, and the first document that
+    does not fit is truncated; everything ranked below it is dropped.
+    """
+
+    HEADER = "\n\nRelevant information:\n"
+
+    def __init__(
+        self,
+        counter: TokenCounter,
+        max_tokens: int = 1500,
+        metadata_keys: Sequence[str] = ("category", "topic"),
+        overlap_threshold: float = 0.8,
+        min_truncated_tokens: int = 32
+    ):
+        self.counter = counter
+        self.max_tokens = max_tokens
+        self.metadata_keys = list(metadata_keys)
+        self.overlap_threshold = overlap_threshold
+        self.min_truncated_tokens = min_truncated_tokens
+
+    def _is_duplicate(self, shingles: Set[str], packed: List[Set[str]]) -> bool:
+        for other in packed:
+            smaller = min(len(shingles), len(other))
+            if smaller and len(shingles & other) / smaller >= self.overlap_threshold:
+                return True
+        return False
+
+    def _format(self, text: str, metadata: Dict[str, Any]) -> str:
+        entry = f"- {text}\n"
+        for key in self.metadata_keys:
+            if metadata.get(key) not in (None, ""):
+                entry += f"  {key}: {metadata[key]}\n"
+        return entry
+
+    def pack(self, documents: List[Dict[str, Any]]) -> str:
+        """
+        Build the context string for the prompt.
+
+        Args:
+            documents: Retrieved documents with text, metadata and similarity
+
+        Returns:
+            Formatted context, or an empty string if nothing fits
+        """
+        if not documents:
+            return ""
+
+        # Hybrid results carry a fused rank score that supersedes similarity
+        ranked = sorted(documents, key=lambda doc: doc.get("score", doc.get("similarity", 0.0)), reverse=True)
+        budget = self.max_tokens - self.counter.count(self.HEADER)
+        entries: List[str] = []
+        packed: List[Set[str]] = []
+        duplicates = truncated = 0
+
+        for doc in ranked:
+            shingles = _shingles(doc["text"])
+            if self._is_duplicate(shingles, packed):
+                duplicates += 1
+                continue
+
+            metadata = doc.get("metadata") or {}
+            entry = self._format(doc["text"], metadata)
+            cost = self.counter.count(entry)
+
+            if cost > budget:
+                # Leave room for the truncation marker
+                room = budget - self.counter.count(self._format("", metadata)) - 2
+                if room >= self.min_truncated_tokens:
+                    entries.append(self._format(self.counter.truncate(doc["text"], room), metadata))
+                    truncated += 1
+                break
+
+            entries.append(entry)
+            packed.append(shingles)
+            budget -= cost
+
+        context = self.HEADER + "".join(entries) if entries else ""
+
+        logger.info(
+            "context_packed",
+            documents=len(documents),
+            packed=len(entries),
+            duplicates=duplicates,
+            truncated=truncated,
+            dropped=len(documents) - len(entries) - duplicates,
+            tokens=self.counter.count(context) if context else 0
+        )
+
+        return context
@@ -0,0 +1,219 @@
+"""Sliding-window conversation memory with a rolling summary."""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.constants import TAG_NOSTREAM
+import structlog
+
+from src.services.context_packer import TokenCounter
+from src.services.llm_usage import record_usage
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class ConversationTurn:
+    """One question and the answer given to it."""
+    question: HumanMessage
+    answer: AIMessage
+
+
+def conversation_turns(messages: Sequence[BaseMessage]) -> List[ConversationTurn]:
+    """Question/answer pairs in order; analysis notes and unanswered questions are skipped."""
+    turns = []
+    question = None
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            question = message
+        elif isinstance(message, AIMessage) and question is not None:
+            turns.append(ConversationTurn(question, message))
+            question = None
+    return turns
+
+
+class ConversationMemory:
+    """
+    History sent with each question: a rolling summary plus recent turns.
+
+    The window holds at most ``window_turns`` turns within ``max_tokens``;
+    the summary has its own cap, ``summary_max_tokens``, so a growing
+    summary never pushes an unsummarized turn out of the window. Turns
+    that leave the window are folded
+    into the summary once, by a short LLM call that extends the previous
+    summary, so a long conversation is never re-summarized from scratch.
+    ``summary_through`` is the id of the last answer already folded in.
+    
+    On the response path the fold runs in the background
+    (``schedule_update``) and its result is picked up when the
+    conversation's next turn starts (``collect``), so no answer waits for
+    the summary call.
+    """
+
+    SUMMARY_PROMPT = """You maintain a short running summary of a chat between a visitor and Peter's portfolio assistant.
+Extend the existing summary with the new exchanges. Keep names, topics and facts the visitor asked about or shared, and anything later questions may refer back to.
+Write at most {max_words} words in the language of the conversation. Reply with the summary only."""
+
+    def __init__(
+        self,
+        llm,
+        counter: TokenCounter,
+        window_turns: int = 3,
+        max_tokens: int = 800,
+        summary_max_tokens: int = 150,
+        max_pending: int = 1000
+    ):
+        self.llm = llm
+        self.counter = counter
+        self.window_turns = window_turns
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_pending = max_pending
+        # Conversation id -> (summary_through the fold started from, task)
+        self._pending: "OrderedDict[str, Tuple[Optional[str], asyncio.Task]]" = OrderedDict()
+
+    @staticmethod
+    def _summary_message(summary: str) -> SystemMessage:
+        return SystemMessage(content=f"Summary of the earlier conversation: {summary}")
+
+    def _turn_tokens(self, turn: ConversationTurn) -> int:
+        return self.counter.count(turn.question.content) + self.counter.count(turn.answer.content)
+
+    def split(
+        self, turns: List[ConversationTurn]
+    ) -> Tuple[List[ConversationTurn], List[ConversationTurn]]:
+        """Split turns into those outside the window and the recent ones kept verbatim."""
+        budget = self.max_tokens
+        start = len(turns)
+        while start > 0 and len(turns) - start < self.window_turns:
+            cost = self._turn_tokens(turns[start - 1])
+            if cost > budget:
+                break
+            budget -= cost
+            start -= 1
+        return turns[:start], turns[start:]
+
+    def build(self, messages: Sequence[BaseMessage], summary: Optional[str]) -> List[BaseMessage]:
+        """
+        History messages to place between the system prompt and the question.
+
+        Args:
+            messages: Conversation messages from the agent state
+            summary: Rolling summary of turns outside the window
+
+        Returns:
+            Summary and recent turns, oldest first
+        """
+        if self.window_turns <= 0:
+            return []
+        _, recent = self.split(conversation_turns(messages))
+        history: List[BaseMessage] = [self._summary_message(summary)] if summary else []
+        for turn in recent:
+            history += [HumanMessage(content=turn.question.content), AIMessage(content=turn.answer.content)]
+        return history
+
+    def _unsummarized(
+        self, messages: Sequence[BaseMessage], summary_through: Optional[str]
+    ) -> List[ConversationTurn]:
+        """Turns outside the window that are not in the summary yet."""
+        if self.window_turns <= 0:
+            return []
+        older, _ = self.split(conversation_turns(messages))
+        ids = [turn.answer.id for turn in older]
+        # A missing cursor was trimmed from the stored history together with
+        # everything before it, so all remaining older turns are new
+        return older[ids.index(summary_through) + 1:] if summary_through in ids else older
+
+    def schedule_update(
+        self,
+        key: str,
+        messages: Sequence[BaseMessage],
+        summary: Optional[str],
+        summary_through: Optional[str]
+    ) -> None:
+        """
+        Start ``update`` in the background for conversation ``key``.
+
+        At most one fold runs per conversation; while it runs, later turns
+        wait for the next one. Nothing is started if no turn left the window.
+        """
+        running = self._pending.get(key)
+        if running is not None and not running[1].done():
+            return
+        if not self._unsummarized(messages, summary_through):
+            return
+
+        task = asyncio.create_task(self.update(messages, summary, summary_through))
+        self._pending[key] = (summary_through, task)
+        self._pending.move_to_end(key)
+        while len(self._pending) > self.max_pending:
+            _, (_, oldest) = self._pending.popitem(last=False)
+            oldest.cancel()
+
+    def collect(
+        self, key: str, summary: Optional[str], summary_through: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Summary state for the conversation's next turn.
+
+        Returns the result of a finished background fold, or the given
+        state if none finished. A fold started from a different
+        ``summary_through`` (the thread moved on, e.g. in another worker)
+        is discarded.
+        """
+        pending = self._pending.get(key)
+        if pending is None or not pending[1].done():
+            return summary, summary_through
+
+        started_from, task = self._pending.pop(key)
+        if task.cancelled() or task.exception() is not None or started_from != summary_through:
+            return summary, summary_through
+        return task.result()
+
+    async def update(
+        self,
+        messages: Sequence[BaseMessage],
+        summary: Optional[str],
+        summary_through: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Fold turns that left the window into the summary.
+
+        Args:
+            messages: Conversation messages including the latest turn
+            summary: Current rolling summary
+            summary_through: Id of the last answer already in the summary
+
+        Returns:
+            The new summary and ``summary_through``; unchanged if nothing
+            left the window or summarizing failed
+        """
+        pending = self._unsummarized(messages, summary_through)
+        if not pending:
+            return summary, summary_through
+
+        exchanges = "\n".join(
+            f"Visitor: {turn.question.content}\nAssistant: {turn.answer.content}" for turn in pending
+        )
+        prompt = [
+            SystemMessage(content=self.SUMMARY_PROMPT.format(max_words=int(self.summary_max_tokens * 0.75))),
+            HumanMessage(content=f"EXISTING SUMMARY:\n{summary or '(none)'}\n\nNEW EXCHANGES:\n{exchanges}")
+        ]
+        try:
+            # Not part of the answer, so keep it out of streamed tokens
+            response = await self.llm.ainvoke(prompt, config={"tags": [TAG_NOSTREAM]})
+        except Exception as e:
+            logger.warning("conversation_summary_failed", error=str(e), pending_turns=len(pending))
+            return summary, summary_through
+
+        record_usage(response, "conversation_summary")
+        new_summary = self.counter.truncate(response.content.strip(), self.summary_max_tokens)
+
+        logger.info(
+            "conversation_summary_updated",
+            folded_turns=len(pending),
+            summary_tokens=self.counter.count(new_summary)
+        )
+        return new_summary, pending[-1].answer.id
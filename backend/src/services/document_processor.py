@@ -2,8 +2,11 @@
 
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+import numpy as np
 import structlog
 
+from src.services.quantization import create_quantizer
+
 logger = structlog.get_logger()
 
 
@@ -14,6 +17,11 @@ class DocumentProcessor:
     EMBEDDING_FIELDS = ["embedding", "embeddings", "vector"]
     TEXT_FIELDS = ["text", "content", "chunk", "document", "data"]
     
+    # Compact embedding codes used by the quantized first-pass search
+    QUANTIZED_FIELD = "embedding_quantized"
+    QUANTIZED_SCALE_FIELD = "embedding_scale"
+    QUANTIZATION_FIELD = "embedding_quantization"
+    
     @classmethod
     def prepare_document_data(
         cls,
@@ -32,8 +40,28 @@ class DocumentProcessor:
             "embedding": embedding,
             "metadata": metadata or {},
             "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            **cls.quantized_fields(embedding)
+        }
+    
+    @classmethod
+    def quantized_fields(cls, embedding: List[float]) -> Dict[str, Any]:
+        """Compact code fields for an embedding, empty when quantization is off."""
+        quantizer = create_quantizer()
+        if quantizer is None:
+            return {}
+        
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        codes, scales = quantizer.encode(vector / norm if norm else vector)
+        
+        fields = {
+            cls.QUANTIZED_FIELD: quantizer.to_bytes(codes[0]),
+            cls.QUANTIZATION_FIELD: quantizer.name
         }
+        if scales is not None:
+            fields[cls.QUANTIZED_SCALE_FIELD] = float(scales[0])
+        return fields
     
     @classmethod
     def extract_embedding(cls, doc_data: Dict[str, Any]) -> Optional[List[float]]:
@@ -75,6 +103,6 @@ class DocumentProcessor:
         """Remove large fields from document data for API responses."""
         sanitized = doc_data.copy()
         # Remove embedding vectors (too large for responses)
-        for field in cls.EMBEDDING_FIELDS:
+        for field in cls.EMBEDDING_FIELDS + [cls.QUANTIZED_FIELD, cls.QUANTIZED_SCALE_FIELD]:
             sanitized.pop(field, None)
         return sanitized
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""Micro-batching of concurrent embedding requests."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+EmbedMany = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batch calls.
+
+    Requests are collected for up to ``window_ms`` milliseconds, or until
+    ``max_batch_size`` distinct texts are waiting, and then sent through
+    one ``embed_many`` call. Identical texts that are queued or already in
+    flight share a single future.
+    """
+
+    def __init__(
+        self,
+        embed_many: EmbedMany,
+        window_ms: float = 5.0,
+        max_batch_size: int = 64
+    ):
+        self.embed_many = embed_many
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queued: Dict[str, asyncio.Future] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.texts_sent = 0
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Drop state that belongs to a previous event loop."""
+        if self._loop is not loop:
+            self._loop = loop
+            self._queued = {}
+            self._in_flight = {}
+            self._timer = None
+            self._tasks = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text as part of the next batch."""
+        self._bind(asyncio.get_running_loop())
+        self.requests += 1
+
+        future = self._queued.get(text) or self._in_flight.get(text)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            future = self._loop.create_future()
+            # Mark exceptions as retrieved even if every waiter was cancelled
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._queued[text] = future
+
+            if len(self._queued) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = self._loop.call_later(self.window, self._flush)
+
+        # One caller cancelling must not cancel the shared result
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._queued = self._queued, {}
+        if not batch:
+            return
+
+        self._in_flight.update(batch)
+        task = self._loop.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        self.batches += 1
+        self.texts_sent += len(texts)
+
+        try:
+            embeddings = await self.embed_many(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+
+            for text, embedding in zip(texts, embeddings):
+                if not batch[text].done():
+                    batch[text].set_result(embedding)
+
+            logger.debug("embedding_batch_sent", batch_size=len(texts))
+
+        except Exception as e:
+            logger.error("embedding_batch_failed", error=str(e), batch_size=len(texts))
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for text in texts:
+                if self._in_flight.get(text) is batch[text]:
+                    del self._in_flight[text]
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching statistics."""
+        return {
+            "requests": self.requests,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "texts_sent": self.texts_sent,
+            "average_batch_size": round(self.texts_sent / self.batches, 2) if self.batches else 0,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size
+        }
+
+
+def create_embedding_batcher(embed_many: EmbedMany) -> Optional[EmbeddingBatcher]:
+    """
+    Batcher for one embedding client, or None when batching is disabled.
+
+    Each EmbeddingService owns its batcher, so a service rebuilt with a new
+    model or key (e.g. by ``reload_agent``) never sends through the old
+    client.
+    """
+    if settings.embedding_batch_window_ms <= 0:
+        return None
+    return EmbeddingBatcher(
+        embed_many,
+        window_ms=settings.embedding_batch_window_ms,
+        max_batch_size=settings.embedding_batch_max_size
+    )
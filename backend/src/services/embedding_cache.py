@@ -0,0 +1,183 @@
+"""LRU + TTL cache for query embeddings with an optional on-disk tier."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+def normalize_query(text: str) -> str:
+    """Normalize text so trivially different spellings share a cache entry."""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded in-memory cache of query embeddings.
+
+    Entries are keyed by (model, normalized text), evicted least recently
+    used once either ``max_entries`` or ``max_bytes`` is exceeded, and
+    expire after ``ttl`` seconds. With ``path`` set, entries are also
+    written to a SQLite file so a restarted worker starts warm.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: int = 86400,
+        path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Cache key for a model and raw query text."""
+        digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def _entry_bytes(self, key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key)
+
+    def _store(self, key: str, vector: np.ndarray, created_at: float) -> None:
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= self._entry_bytes(key, previous[0])
+
+        self.entries[key] = (vector, created_at)
+        self.total_bytes += self._entry_bytes(key, vector)
+
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            old_key, (old_vector, _) = self.entries.popitem(last=False)
+            self.total_bytes -= self._entry_bytes(old_key, old_vector)
+            self.evictions += 1
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[np.ndarray, float]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("embedding_cache_disk_read_failed", error=str(e))
+            return None
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32), row[1]
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, if present and fresh."""
+        key = self.make_key(model, text)
+        now = time.time()
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].tolist()
+
+            entry = self._load_from_disk(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._store(key, entry[0], entry[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[0].tolist()
+
+            self.misses += 1
+            return None
+
+    def set(self, model: str, text: str, embedding: List[float]) -> None:
+        """Cache a query embedding in memory and, if configured, on disk."""
+        key = self.make_key(model, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        created_at = time.time()
+
+        with self._lock:
+            self._store(key, vector, created_at)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                        (key, vector.tobytes(), created_at)
+                    )
+                    self._db.execute(
+                        "DELETE FROM query_embeddings WHERE created_at < ?",
+                        (created_at - self.ttl,)
+                    )
+                except sqlite3.Error as e:
+                    logger.warning("embedding_cache_disk_write_failed", error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total_requests = self.hits + self.misses
+        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hit_rate, 2),
+            "evictions": self.evictions,
+            "cache_size": len(self.entries),
+            "cache_bytes": self.total_bytes,
+            "disk_tier": self._db is not None
+        }
+
+    def clear(self) -> None:
+        """Drop all entries from memory and disk."""
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings")
+        logger.info("embedding_cache_cleared")
+
+
+# Shared by every EmbeddingService in the process
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+
+
+def get_query_embedding_cache() -> Optional[QueryEmbeddingCache]:
+    """Process-wide query embedding cache, or None when disabled."""
+    global _query_embedding_cache
+    if _query_embedding_cache is None and settings.embedding_cache_max_entries > 0:
+        _query_embedding_cache = QueryEmbeddingCache(
+            max_entries=settings.embedding_cache_max_entries,
+            max_bytes=settings.embedding_cache_max_bytes,
+            ttl=settings.embedding_cache_ttl,
+            path=settings.embedding_cache_path
+        )
+    return _query_embedding_cache
@@ -4,6 +4,8 @@ from typing import List, Union
 import numpy as np
 from langchain_openai import OpenAIEmbeddings
 from src.config import settings
+from src.services.embedding_batcher import create_embedding_batcher
+from src.services.embedding_cache import get_query_embedding_cache
 import structlog
 
 logger = structlog.get_logger()
@@ -18,25 +20,44 @@ class EmbeddingService:
             openai_api_key=settings.openai_api_key,
             model=settings.embedding_model
         )
+        self.model = settings.embedding_model
+        self.query_cache = get_query_embedding_cache()
+        # Concurrent embed_text calls are coalesced into aembed_documents batches
+        self.batcher = create_embedding_batcher(self.embeddings.aembed_documents)
         logger.info(
             "embedding_service_initialized",
             model=settings.embedding_model,
             dimension=settings.vector_dimension
         )
     
-    async def embed_text(self, text: str) -> List[float]:
+    async def embed_text(self, text: str, use_cache: bool = True) -> List[float]:
         """
         Create embedding for a single text.
         
         Args:
             text: Text to embed
+            use_cache: Serve repeated queries from the query embedding cache;
+                disable for document texts that are embedded once
             
         Returns:
             List of floats representing the embedding
         """
         try:
-            embedding = await self.embeddings.aembed_query(text)
+            cache = self.query_cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(self.model, text)
+                if cached is not None:
+                    logger.debug("query_embedding_cache_hit", text_length=len(text))
+                    return cached
+            
+            if self.batcher is not None:
+                embedding = await self.batcher.embed(text)
+            else:
+                embedding = await self.embeddings.aembed_query(text)
             logger.debug("text_embedded", text_length=len(text))
+            
+            if cache is not None:
+                cache.set(self.model, text, embedding)
             return embedding
         except Exception as e:
             logger.error("embedding_failed", error=str(e), text=text[:100])
@@ -60,6 +81,38 @@ class EmbeddingService:
             logger.error("batch_embedding_failed", error=str(e), count=len(texts))
             raise
     
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries with one API call, reusing cached embeddings.
+        
+        Cache misses are deduplicated and sent in a single
+        ``aembed_documents`` request.
+        
+        Args:
+            texts: Query texts, possibly repeated
+            
+        Returns:
+            One embedding per input text, in order
+        """
+        cache = self.query_cache
+        found = {}
+        if cache is not None:
+            for text in texts:
+                if text not in found:
+                    cached = cache.get(self.model, text)
+                    if cached is not None:
+                        found[text] = cached
+        
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            for text, embedding in zip(missing, await self.embed_texts(missing)):
+                found[text] = embedding
+                if cache is not None:
+                    cache.set(self.model, text, embedding)
+        
+        logger.debug("queries_embedded", count=len(texts), cache_hits=len(found) - len(missing))
+        return [found[text] for text in texts]
+    
     def calculate_similarity(
         self,
         embedding1: Union[List[float], np.ndarray],
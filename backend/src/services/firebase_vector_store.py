@@ -8,6 +8,7 @@ from src.config import settings
 from src.services.embeddings import EmbeddingService
 from src.services.firebase_connection import FirebaseConnection
 from src.services.document_processor import DocumentProcessor
+from src.services.metadata_filter import MetadataFilter
 from src.services.vector_search_engine import VectorSearchEngine
 
 logger = structlog.get_logger()
@@ -43,7 +44,7 @@ class FirebaseVectorStore:
     ) -> str:
         """Add document with automatic embedding generation."""
         try:
-            embedding = await self.embedding_service.embed_text(text)
+            embedding = await self.embedding_service.embed_text(text, use_cache=False)
             doc_data = self.processor.prepare_document_data(text, embedding, metadata)
             
             collection = self.firebase.get_collection(self.collection_name)
@@ -71,23 +72,26 @@ class FirebaseVectorStore:
         self,
         query: str,
         top_k: Optional[int] = None,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        metadata_filter: Optional[MetadataFilter] = None
     ) -> List[Dict[str, Any]]:
-        """Execute semantic similarity search."""
+        """Execute semantic similarity search, optionally restricted by metadata."""
         try:
             top_k = top_k or settings.max_search_results
             threshold = threshold or settings.similarity_threshold
             
-            # Stream documents for memory efficiency
             collection = self.firebase.get_collection(self.collection_name)
-            documents = [(doc.id, doc.to_dict()) for doc in collection.stream()]
             
-            # Delegate to search engine
-            results = await self.search_engine.execute_similarity_search(
-                query, documents, top_k, threshold
-            )
+            if self.search_engine.quantizer is not None:
+                # Stream compact codes only; fetch full vectors for candidates
+                return await self.search_engine.execute_quantized_search(
+                    query, collection, top_k, threshold, metadata_filter
+                )
             
-            return results
+            # Stream the whole collection and rank exactly
+            return await self.search_engine.execute_collection_search(
+                query, collection, top_k, threshold, metadata_filter
+            )
             
         except Exception as e:
             logger.error("search_failed", error=str(e), query=query[:100])
@@ -107,8 +111,12 @@ class FirebaseVectorStore:
             update_data = {"updated_at": datetime.utcnow()}
             
             if text is not None:
-                embedding = await self.embedding_service.embed_text(text)
-                update_data.update({"text": text, "embedding": embedding})
+                embedding = await self.embedding_service.embed_text(text, use_cache=False)
+                update_data.update({
+                    "text": text,
+                    "embedding": embedding,
+                    **self.processor.quantized_fields(embedding)
+                })
             
             if metadata is not None:
                 update_data["metadata"] = metadata
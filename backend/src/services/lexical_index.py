@@ -0,0 +1,181 @@
+"""In-memory BM25 index over the cached documents, for hybrid retrieval."""
+
+import math
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.services.metadata_filter import metadata_values
+
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it me my of on or
+tell that the this to was what which who with you your yours about
+att av berätta de den det din dina ditt du en ett för har hur i jag kan med mig min
+mina mitt och om på som till vad var vilka vilken vilket är
+""".split())
+
+# Longest first; only stripped when at least MIN_STEM characters remain
+SUFFIXES = (
+    "heterna", "heten", "heter", "arna", "erna", "orna", "ande", "ende", "ing",
+    "het", "are", "ers", "ies", "ar", "er", "or", "en", "et", "ed", "es", "s"
+)
+MIN_STEM = 4
+
+_TOKEN = re.compile(r"\w+")
+
+
+def stem(token: str) -> str:
+    """Light Swedish/English suffix stripping so inflections share a term."""
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed word tokens without stopwords or single characters."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return [stem(token) for token in _TOKEN.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def document_tokens(doc: Dict[str, Any]) -> List[str]:
+    """Tokens of a document's text and scalar metadata values."""
+    tokens = tokenize(doc.get("text") or "")
+    for _, value in metadata_values(doc.get("metadata")):
+        tokens += tokenize(value.replace("_", " "))
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the rows of the vector cache.
+
+    Like ``MetadataIndex`` it is keyed by matrix row and follows the
+    cache's row operations, so documents added or removed through the
+    incremental sync are searchable immediately without a rebuild.
+    Document text and scalar metadata values are indexed.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._row_terms: List[Dict[str, int]] = []
+        self._row_lengths: List[int] = []
+        self._total_length = 0
+
+    def build(self, documents: List[Dict[str, Any]]) -> None:
+        """Index every cached document; row i belongs to documents[i]."""
+        self.postings = {}
+        self._row_terms = []
+        self._row_lengths = []
+        self._total_length = 0
+        for row, doc in enumerate(documents):
+            self.set_row(row, doc)
+
+    def _unlink(self, row: int) -> None:
+        for term in self._row_terms[row]:
+            rows = self.postings[term]
+            del rows[row]
+            if not rows:
+                del self.postings[term]
+        self._total_length -= self._row_lengths[row]
+
+    def _link(self, row: int, terms: Dict[str, int], length: int) -> None:
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[row] = count
+        self._row_terms[row] = terms
+        self._row_lengths[row] = length
+        self._total_length += length
+
+    def set_row(self, row: int, doc: Dict[str, Any]) -> None:
+        """Index a new or changed row."""
+        if row < len(self._row_terms):
+            self._unlink(row)
+        else:
+            missing = row + 1 - len(self._row_terms)
+            self._row_terms.extend({} for _ in range(missing))
+            self._row_lengths.extend([0] * missing)
+
+        terms: Dict[str, int] = {}
+        tokens = document_tokens(doc)
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        self._link(row, terms, len(tokens))
+
+    def remove_row(self, row: int) -> None:
+        """Remove ``row``, moving the last row into its place."""
+        last = len(self._row_terms) - 1
+        self._unlink(row)
+        if row != last:
+            terms, length = self._row_terms[last], self._row_lengths[last]
+            self._unlink(last)
+            self._link(row, terms, length)
+        self._row_terms.pop()
+        self._row_lengths.pop()
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        rows: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Score rows containing any query term.
+
+        Args:
+            query: Query text
+            top_k: Number of results
+            rows: Restrict scoring to these rows (a metadata filter)
+
+        Returns:
+            (row, BM25 score) pairs in descending score order
+        """
+        size = len(self._row_terms)
+        if size == 0 or top_k <= 0:
+            return []
+
+        allowed: Optional[Set[int]] = set(rows) if rows is not None else None
+        average_length = self._total_length / size or 1.0
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, count in postings.items():
+                if allowed is not None and row not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._row_lengths[row] / average_length)
+                scores[row] = scores.get(row, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size for monitoring."""
+        return {
+            "documents": len(self._row_terms),
+            "terms": len(self.postings),
+            "average_length": round(self._total_length / len(self._row_terms), 1) if self._row_terms else 0
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked lists of rows by reciprocal rank.
+
+    Args:
+        rankings: Rows in rank order, one list per retriever
+        k: Damping constant; larger values flatten the rank weights
+
+    Returns:
+        (row, fused score) pairs in descending fused score order
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
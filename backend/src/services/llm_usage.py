@@ -0,0 +1,85 @@
+"""Per-request accounting of LLM token usage, including provider-cached tokens."""
+
+from contextvars import ContextVar
+from typing import Dict, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+# OpenAI caches a prompt prefix only once the prompt reaches this size
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+_request_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_request_usage", default=None)
+
+
+def start_usage_tracking() -> Dict[str, int]:
+    """
+    Start collecting usage for the current request.
+
+    Graph nodes run in copies of the caller's context, so they all add to
+    the returned dict.
+    """
+    usage = {"llm_calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+    _request_usage.set(usage)
+    return usage
+
+
+def extract_usage(message) -> Dict[str, int]:
+    """
+    Token counts reported with an LLM response.
+
+    Reads LangChain's ``usage_metadata`` and falls back to OpenAI's raw
+    ``token_usage``; ``cached_input_tokens`` is the part of the prompt
+    served from the provider's prefix cache.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return {
+            "input_tokens": usage.get("input_tokens", 0),
+            "cached_input_tokens": details.get("cache_read", 0) or 0,
+            "output_tokens": usage.get("output_tokens", 0)
+        }
+
+    raw = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return {
+        "input_tokens": raw.get("prompt_tokens", 0),
+        "cached_input_tokens": (raw.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0,
+        "output_tokens": raw.get("completion_tokens", 0)
+    }
+
+
+def record_usage(message, operation: str) -> Dict[str, int]:
+    """Log one call's usage and add it to the current request's totals."""
+    usage = extract_usage(message)
+
+    logger.info("llm_usage", operation=operation, **usage)
+
+    totals = _request_usage.get()
+    if totals is not None:
+        totals["llm_calls"] += 1
+        for key, value in usage.items():
+            totals[key] += value
+    return usage
+
+
+def log_static_prefix(operation: str, tokens: int) -> bool:
+    """
+    Log the size of a call's static prompt prefix.
+
+    The static prompts are sent first so the provider can cache them, but
+    OpenAI only does so for prompts of at least ``PROMPT_CACHE_MIN_TOKENS``.
+    Below that ``cached_input_tokens`` stays 0 for the call.
+
+    Returns:
+        Whether the prefix alone is long enough to be cached
+    """
+    cacheable = tokens >= PROMPT_CACHE_MIN_TOKENS
+    logger.info(
+        "static_prompt_prefix",
+        operation=operation,
+        tokens=tokens,
+        cacheable=cacheable,
+        cache_min_tokens=PROMPT_CACHE_MIN_TOKENS
+    )
+    return cacheable
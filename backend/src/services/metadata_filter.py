@@ -0,0 +1,168 @@
+"""Metadata filter expressions and the inverted index that evaluates them."""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+
+
+def normalize_value(value: Any) -> str:
+    """Case-insensitive string form used for both indexing and matching."""
+    return str(value).strip().lower()
+
+
+def metadata_values(metadata: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    (field, value) pairs a document is indexed under.
+
+    Scalars give one pair; lists such as ``tags`` give one per element.
+    Nested objects are not indexed.
+    """
+    pairs = []
+    for field, value in (metadata or {}).items():
+        items = value if isinstance(value, (list, tuple, set)) else [value]
+        for item in items:
+            if isinstance(item, (str, int, float, bool)):
+                pairs.append((field, normalize_value(item)))
+    return pairs
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """
+    Conjunction of per-field conditions; each field matches any of its values.
+
+    ``category in [skills, experience] and topic = python`` keeps documents
+    whose category is skills or experience and whose topic is python.
+    """
+    conditions: Tuple[Tuple[str, FrozenSet[str]], ...]
+    expression: str = ""
+
+    def matches(self, metadata: Optional[Dict[str, Any]]) -> bool:
+        """Whether a document's metadata satisfies the filter."""
+        present: Dict[str, Set[str]] = {}
+        for field, value in metadata_values(metadata):
+            present.setdefault(field, set()).add(value)
+        return all(present.get(field, set()) & values for field, values in self.conditions)
+
+
+_CLAUSE = re.compile(
+    r"^(?P<field>[A-Za-z_][\w.]*)\s*"
+    r"(?:(?i:in)\s*\[(?P<values>[^\]]*)\]|==?\s*(?P<value>\"[^\"]*\"|'[^']*'|[^\s\[\]\"',]+))$"
+)
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+def _unquote(token: str) -> str:
+    token = token.strip()
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'":
+        return token[1:-1]
+    return token
+
+
+@lru_cache(maxsize=256)
+def parse_filter(expression: str) -> MetadataFilter:
+    """
+    Parse a filter expression.
+
+    Clauses are ``field in [a, b]`` or ``field = a``, joined by ``and``.
+    Values may be quoted and are compared case-insensitively.
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    conditions: Dict[str, FrozenSet[str]] = {}
+    for clause in _AND.split(expression.strip()):
+        match = _CLAUSE.match(clause.strip())
+        if match is None:
+            raise ValueError(f"Invalid filter clause: {clause.strip()!r}")
+
+        if match.group("values") is not None:
+            values = [_unquote(v) for v in match.group("values").split(",") if v.strip()]
+        else:
+            values = [_unquote(match.group("value"))]
+        if not values:
+            raise ValueError(f"Empty value list in filter clause: {clause.strip()!r}")
+
+        field = match.group("field")
+        normalized = frozenset(normalize_value(v) for v in values)
+        # Repeating a field narrows it, like any other conjunction
+        conditions[field] = conditions[field] & normalized if field in conditions else normalized
+
+    return MetadataFilter(tuple(sorted(conditions.items())), expression.strip())
+
+
+class MetadataIndex:
+    """
+    Per-field inverted index from metadata values to matrix rows.
+
+    Rows are positions in the vector cache's embedding matrix, so a
+    filtered search only scores the rows the index selects. The index
+    follows the cache's row operations: ``set_row`` for inserts and
+    updates and ``remove_row`` for its swap-remove.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[int]]] = {}
+        self._row_pairs: List[List[Tuple[str, str]]] = []
+
+    def build(self, documents: List[Dict[str, Any]]) -> None:
+        """Index every cached document; row i belongs to documents[i]."""
+        self.postings = {}
+        self._row_pairs = []
+        for row, doc in enumerate(documents):
+            self.set_row(row, doc.get("metadata"))
+
+    def _unlink(self, row: int) -> None:
+        for field, value in self._row_pairs[row]:
+            rows = self.postings[field][value]
+            rows.discard(row)
+            if not rows:
+                del self.postings[field][value]
+                if not self.postings[field]:
+                    del self.postings[field]
+
+    def _link(self, row: int, pairs: List[Tuple[str, str]]) -> None:
+        for field, value in pairs:
+            self.postings.setdefault(field, {}).setdefault(value, set()).add(row)
+        self._row_pairs[row] = pairs
+
+    def set_row(self, row: int, metadata: Optional[Dict[str, Any]]) -> None:
+        """Index a new or changed row."""
+        if row < len(self._row_pairs):
+            self._unlink(row)
+        else:
+            self._row_pairs.extend([] for _ in range(row + 1 - len(self._row_pairs)))
+        self._link(row, metadata_values(metadata))
+
+    def remove_row(self, row: int) -> None:
+        """Remove ``row``, moving the last row into its place."""
+        last = len(self._row_pairs) - 1
+        self._unlink(row)
+        if row != last:
+            pairs = self._row_pairs[last]
+            self._unlink(last)
+            self._link(row, pairs)
+        self._row_pairs.pop()
+
+    def rows(self, metadata_filter: MetadataFilter) -> np.ndarray:
+        """Sorted rows matching the filter."""
+        selected: Optional[Set[int]] = None
+        # Most selective field first keeps the intersections small
+        candidates = sorted(
+            (
+                set().union(*(self.postings.get(field, {}).get(value, set()) for value in values))
+                for field, values in metadata_filter.conditions
+            ),
+            key=len
+        )
+        for rows in candidates:
+            selected = rows if selected is None else selected & rows
+            if not selected:
+                break
+        return np.fromiter(sorted(selected or ()), dtype=np.int64)
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed fields and their number of distinct values."""
+        return {field: len(values) for field, values in self.postings.items()}
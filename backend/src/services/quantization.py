@@ -0,0 +1,116 @@
+"""Compact embedding codes for first-pass scans with float re-ranking."""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import numpy as np
+
+from src.config import settings
+
+
+# Bits set per byte value, for Hamming distances on packed sign codes
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+class Quantizer(ABC):
+    """
+    Encodes normalized float vectors into compact codes.
+
+    Codes are only used to pick candidates; final similarities always
+    come from the full-precision vectors.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Return (codes, scales) for the rows of ``matrix``."""
+        pass
+
+    @abstractmethod
+    def score(
+        self,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        query_vector: np.ndarray
+    ) -> np.ndarray:
+        """Approximate similarity of a normalized query to every code row."""
+        pass
+
+    def to_bytes(self, code: np.ndarray) -> bytes:
+        """Serialize one row's code for storage."""
+        return code.tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        """Deserialize one row's code."""
+        return np.frombuffer(data, dtype=self.dtype)
+
+
+class Int8Quantizer(Quantizer):
+    """
+    Symmetric scalar quantization with one scale per vector: 4x smaller
+    than float32 and close to exact ranking.
+    """
+
+    name = "int8"
+    dtype = np.int8
+
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        matrix = np.atleast_2d(matrix)
+        if matrix.shape[0] == 0:
+            # max() has no identity, so an empty collection needs its own path
+            return np.zeros(matrix.shape, dtype=np.int8), np.zeros(0, dtype=np.float32)
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def score(
+        self,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        query_vector: np.ndarray,
+        chunk_size: int = 8192
+    ) -> np.ndarray:
+        # BLAS has no int8 GEMV; widen in chunks to keep temporaries small
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], chunk_size):
+            block = codes[start:start + chunk_size].astype(np.float32)
+            scores[start:start + chunk_size] = block @ query_vector
+        return scores * scales
+
+
+class BinaryQuantizer(Quantizer):
+    """
+    One sign bit per dimension: 32x smaller than float32. Similarity is
+    estimated from the fraction of agreeing signs.
+    """
+
+    name = "binary"
+    dtype = np.uint8
+
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        return np.packbits(np.atleast_2d(matrix) > 0, axis=1), None
+
+    def score(
+        self,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        query_vector: np.ndarray
+    ) -> np.ndarray:
+        query_code = np.packbits(query_vector > 0)
+        distances = _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1)
+        return 1.0 - 2.0 * distances.astype(np.float32) / query_vector.shape[0]
+
+
+def create_quantizer(kind: Optional[str] = None) -> Optional[Quantizer]:
+    """Create the quantizer configured by ``vector_quantization``, if any."""
+    kind = (kind or settings.vector_quantization).lower()
+
+    if kind in ("", "none"):
+        return None
+    if kind == "int8":
+        return Int8Quantizer()
+    if kind == "binary":
+        return BinaryQuantizer()
+
+    raise ValueError(f"Unknown vector quantization: {kind}")
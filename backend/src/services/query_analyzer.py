@@ -1,10 +1,15 @@
 """Query analysis service for determining retrieval requirements."""
 
-from typing import Tuple
+from typing import Dict, Any, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 import structlog
 
+from src.config import settings
+from src.services.context_packer import get_token_counter
+from src.services.llm_usage import log_static_prefix, record_usage
+from src.services.retrieval_classifier import RetrievalClassifier, load_retrieval_classifier
+
 logger = structlog.get_logger()
 
 
@@ -36,6 +41,10 @@ class QueryAnalyzer:
     
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
+        counter = get_token_counter(getattr(llm, "model_name", None) or "gpt-4o-mini")
+        self.prefix_cacheable = log_static_prefix(
+            "query_analysis", counter.count(self.RETRIEVAL_REQUIRED_PROMPT)
+        )
     
     async def requires_retrieval(self, query: str) -> Tuple[bool, str]:
         """
@@ -51,6 +60,7 @@ class QueryAnalyzer:
             ]
             
             response = await self.llm.ainvoke(messages)
+            record_usage(response, "query_analysis")
             should_retrieve = response.content.strip().lower() == "yes"
             
             analysis_reason = "retrieve" if should_retrieve else "direct answer"
@@ -67,4 +77,90 @@ class QueryAnalyzer:
         except Exception as e:
             logger.error("query_analysis_failed", error=str(e))
            
-            return True, "analysis_error"
\ No newline at end of file
+            return True, "analysis_error"
+
+
+class LocalQueryAnalyzer:
+    """
+    Decides retrieval with a local classifier, asking the LLM analyzer
+    only when the classifier is not confident.
+    
+    When the classifier uses query embeddings, the embedding is computed
+    through the shared embedding service, so retrieval for the same query
+    is served from the query embedding cache.
+    """
+    
+    def __init__(
+        self,
+        classifier: RetrievalClassifier,
+        fallback: QueryAnalyzer,
+        embedding_service=None,
+        min_confidence: float = 0.8
+    ):
+        self.classifier = classifier
+        self.fallback = fallback
+        self.embedding_service = embedding_service
+        self.min_confidence = min_confidence
+        self.local_decisions = 0
+        self.fallbacks = 0
+    
+    async def requires_retrieval(self, query: str) -> Tuple[bool, str]:
+        """
+        Determine if a query requires retrieval from the knowledge base.
+        
+        Returns:
+            Tuple of (should_retrieve, analysis_reason)
+        """
+        try:
+            embedding = None
+            if self.classifier.use_embedding:
+                embedding = await self.embedding_service.embed_text(query)
+            probability = self.classifier.predict_proba(query, embedding)
+        except Exception as e:
+            logger.error("local_query_analysis_failed", error=str(e))
+            probability = 0.5
+        
+        confidence = max(probability, 1 - probability)
+        if confidence < self.min_confidence:
+            self.fallbacks += 1
+            logger.info("query_analysis_fallback", query=query[:100], probability=round(probability, 3))
+            return await self.fallback.requires_retrieval(query)
+        
+        self.local_decisions += 1
+        should_retrieve = probability >= 0.5
+        
+        logger.info(
+            "query_analyzed_locally",
+            query=query[:100],
+            should_retrieve=should_retrieve,
+            probability=round(probability, 3)
+        )
+        
+        return should_retrieve, "retrieve" if should_retrieve else "direct answer"
+    
+    def stats(self) -> Dict[str, Any]:
+        """How many decisions avoided the LLM."""
+        total = self.local_decisions + self.fallbacks
+        return {
+            "local_decisions": self.local_decisions,
+            "llm_fallbacks": self.fallbacks,
+            "local_rate": round(self.local_decisions / total * 100, 2) if total else 0,
+            "uses_embedding": self.classifier.use_embedding
+        }
+
+
+def create_query_analyzer(llm: ChatOpenAI, embedding_service=None, backend: Optional[str] = None):
+    """Create the analyzer configured by ``query_analyzer_backend``."""
+    backend = (backend or settings.query_analyzer_backend).lower()
+    
+    if backend == "llm":
+        return QueryAnalyzer(llm)
+    if backend == "local":
+        return LocalQueryAnalyzer(
+            load_retrieval_classifier(),
+            QueryAnalyzer(llm),
+            embedding_service,
+            settings.query_analyzer_min_confidence
+        )
+    
+    raise ValueError(f"Unknown query analyzer backend: {backend}")
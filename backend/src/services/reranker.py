@@ -0,0 +1,155 @@
+"""Local re-ranking of over-fetched retrieval candidates."""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.services.lexical_index import document_tokens, tokenize
+from src.services.metadata_filter import metadata_values, normalize_value
+
+
+@dataclass
+class RerankReport:
+    """What a re-ranking pass did to the candidate list."""
+    candidates: int
+    selected: int
+    elapsed_ms: float
+    # (document id, rank before, rank after) for selected documents that moved
+    rank_changes: List[Tuple[str, int, int]] = field(default_factory=list)
+    # Selected from beyond the first ``selected`` candidates
+    promoted: List[str] = field(default_factory=list)
+    # In the first ``selected`` candidates but left out
+    dropped: List[str] = field(default_factory=list)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class LocalReranker:
+    """
+    Re-score retrieval candidates without another model call.
+
+    Relevance is the candidate's similarity plus ``lexical_weight`` times
+    the share of query terms the document contains, plus any metadata
+    boosts (``{"category=experience": 0.05}``). The final k are picked
+    by maximal marginal relevance over document term sets, so with
+    ``mmr_lambda`` below 1 near-duplicates give way to documents adding
+    something new. Everything runs on the candidates' text and metadata.
+    """
+
+    def __init__(
+        self,
+        candidates: int = 20,
+        lexical_weight: float = 0.3,
+        mmr_lambda: float = 0.7,
+        metadata_boosts: Optional[Dict[str, float]] = None
+    ):
+        self.candidates = candidates
+        self.lexical_weight = lexical_weight
+        self.mmr_lambda = mmr_lambda
+        self.metadata_boosts = {}
+        for key, boost in (metadata_boosts or {}).items():
+            name, _, value = key.partition("=")
+            self.metadata_boosts[(name.strip(), normalize_value(value))] = boost
+
+        self.runs = 0
+        self.total_ms = 0.0
+        self.reordered = 0
+        self.promoted = 0
+
+    def _boost(self, doc: Dict[str, Any]) -> float:
+        if not self.metadata_boosts:
+            return 0.0
+        return sum(self.metadata_boosts.get(pair, 0.0) for pair in set(metadata_values(doc.get("metadata"))))
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int
+    ) -> Tuple[List[Dict[str, Any]], RerankReport]:
+        """
+        Pick the best ``top_k`` candidates.
+
+        Args:
+            query: Query text
+            candidates: Retrieved documents in retrieval order
+            top_k: Number of documents to keep
+
+        Returns:
+            Tuple of (selected documents in their new order, report). Each
+            selected document gets ``rerank_score``, also stored as
+            ``score`` so the context packer keeps this order.
+        """
+        started = time.perf_counter()
+        query_terms = set(tokenize(query))
+        terms = [set(document_tokens(doc)) for doc in candidates]
+
+        relevance = []
+        for doc, doc_terms in zip(candidates, terms):
+            overlap = len(query_terms & doc_terms) / len(query_terms) if query_terms else 0.0
+            relevance.append(doc.get("similarity", 0.0) + self.lexical_weight * overlap + self._boost(doc))
+
+        # Greedy maximal marginal relevance; ties keep retrieval order
+        order: List[int] = []
+        remaining = list(range(len(candidates)))
+        while remaining and len(order) < top_k:
+            best = max(
+                remaining,
+                key=lambda i: self.mmr_lambda * relevance[i]
+                - (1 - self.mmr_lambda) * max((_jaccard(terms[i], terms[j]) for j in order), default=0.0)
+            )
+            order.append(best)
+            remaining.remove(best)
+
+        selected = []
+        for i in order:
+            doc = dict(candidates[i])
+            doc["rerank_score"] = round(relevance[i], 6)
+            doc["score"] = doc["rerank_score"]
+            selected.append(doc)
+
+        kept = len(order)
+        report = RerankReport(
+            candidates=len(candidates),
+            selected=kept,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+            rank_changes=[
+                (candidates[before]["id"], before + 1, after + 1)
+                for after, before in enumerate(order) if before != after
+            ],
+            promoted=[candidates[i]["id"] for i in order if i >= kept],
+            dropped=[candidates[i]["id"] for i in range(kept) if i not in order]
+        )
+
+        self.runs += 1
+        self.total_ms += report.elapsed_ms
+        self.reordered += bool(report.rank_changes)
+        self.promoted += len(report.promoted)
+        return selected, report
+
+    def stats(self) -> Dict[str, Any]:
+        """How much re-ranking costs and how often it changes the result."""
+        return {
+            "runs": self.runs,
+            "candidates": self.candidates,
+            "average_ms": round(self.total_ms / self.runs, 3) if self.runs else 0,
+            "reorder_rate": round(self.reordered / self.runs * 100, 2) if self.runs else 0,
+            "promoted_documents": self.promoted
+        }
+
+
+def create_reranker(enabled: Optional[bool] = None) -> Optional[LocalReranker]:
+    """The reranker configured by the ``rerank_*`` settings, or None when disabled."""
+    if not (settings.rerank_enabled if enabled is None else enabled):
+        return None
+    return LocalReranker(
+        candidates=settings.rerank_candidates,
+        lexical_weight=settings.rerank_lexical_weight,
+        mmr_lambda=settings.rerank_mmr_lambda,
+        metadata_boosts=settings.rerank_metadata_boosts
+    )
@@ -1,10 +1,14 @@
 """Response generation service for creating personalized AI responses."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 import structlog
 
+from src.config import settings
+from src.services.context_packer import ContextPacker, get_token_counter
+from src.services.llm_usage import log_static_prefix, record_usage
+
 logger = structlog.get_logger()
 
 
@@ -53,30 +57,35 @@ class ResponseGenerator:
     - Share your enthusiasm for web development and AI
     - Be genuine and authentic
 
-    Language: Respond in the same language as the question (Swedish or English)"""
+    Language: Respond in the same language as the question (Swedish or English)
+
+    Using the database information:
+    - The user message lists AVAILABLE INFORMATION FROM MY DATABASE, then the USER QUESTION
+    - Answer ONLY using that information. Do NOT add any technologies, skills, or experience that is not explicitly mentioned in it
+    - If asked about something not in the database, say "I haven't added that information yet"
+    - If no information was found: for a CV-related question, say "I haven't added that information to my knowledge base yet."; if it is off-topic, politely decline"""
     
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
+        self.packer = ContextPacker(
+            get_token_counter(getattr(llm, "model_name", None) or "gpt-4o-mini"),
+            max_tokens=settings.context_max_tokens,
+            metadata_keys=settings.context_metadata_keys
+        )
+        self.prefix_cacheable = log_static_prefix(
+            "response_generation", self.packer.counter.count(self.SYSTEM_PROMPT)
+        )
     
     def _format_context(self, context: List[Dict[str, Any]]) -> str:
-        """Format retrieved context into a readable string."""
-        if not context:
-            return ""
-        
-        formatted = "\n\nRelevant information:\n"
-        for doc in context:
-            formatted += f"- {doc['text']}\n"
-            if doc.get("metadata"):
-                for key, value in doc["metadata"].items():
-                    formatted += f"  {key}: {value}\n"
-        
-        return formatted
+        """Format retrieved context into a readable string within the token budget."""
+        return self.packer.pack(context)
     
     async def generate(
         self, 
         query: str, 
         context: List[Dict[str, Any]] = None,
-        plan: str = None
+        plan: str = None,
+        history: Optional[List[BaseMessage]] = None
     ) -> str:
         """
         Generate a personalized response based on query and context.
@@ -85,6 +94,7 @@ class ResponseGenerator:
             query: User's query
             context: Retrieved context documents
             plan: Response plan (optional)
+            history: Earlier conversation from ``ConversationMemory`` (optional)
         
         Returns:
             Generated response string
@@ -92,31 +102,35 @@ class ResponseGenerator:
         try:
             context_str = self._format_context(context or [])
             
+            # Static instructions live only in the system prompt, sent first
+            # and byte-identical on every call; per-request text comes last.
+            # The prompt is below OpenAI's 1024-token caching minimum, so
+            # this only pays off once it grows (see prefix_cacheable).
             if context_str:
-                user_prompt = f"""USER QUESTION: {query}
-
-AVAILABLE INFORMATION FROM MY DATABASE:
+                user_prompt = f"""AVAILABLE INFORMATION FROM MY DATABASE:
 {context_str}
 
-IMPORTANT: Answer ONLY using the information above. Do NOT add any technologies, skills, or experience that is not explicitly mentioned in the database information above. If asked about something not in the database, say "I haven't added that information yet"."""
+USER QUESTION: {query}"""
             else:
-                user_prompt = f"""USER QUESTION: {query}
+                user_prompt = f"""AVAILABLE INFORMATION FROM MY DATABASE:
+No relevant information was found in my database for this question.
 
-NOTE: No relevant information was found in my database for this question.
-If this is a CV-related question, say "I haven't added that information to my knowledge base yet."
-If this is off-topic, politely decline."""
+USER QUESTION: {query}"""
             
             messages = [
                 SystemMessage(content=self.SYSTEM_PROMPT),
+                *(history or []),
                 HumanMessage(content=user_prompt)
             ]
             
             response = await self.llm.ainvoke(messages)
+            record_usage(response, "response_generation")
             
             logger.info(
                 "response_generated",
                 query=query[:100],
                 context_count=len(context or []),
+                history_messages=len(history or []),
                 response_length=len(response.content)
             )
             
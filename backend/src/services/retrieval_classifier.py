@@ -0,0 +1,219 @@
+"""Local classifier deciding whether a query needs knowledge-base retrieval."""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+DEFAULT_DATASET = Path(__file__).parent / "data" / "retrieval_queries.jsonl"
+
+# Keyword and regex features, English and Swedish
+FEATURE_PATTERNS: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("greeting", re.compile(
+        r"^\W*(hej|hello|hi|hey|hallå|tjena|tja|yo|good\s+morning|god\s+(morgon|kväll|dag))"
+        r"(\s+(there|där|peter))?\W*$"
+    )),
+    ("thanks_or_bye", re.compile(
+        r"^\W*(tack|thanks|thank\s+you|ok|okej|bye|hej\s+då)(\s+(så\s+mycket|a\s+lot))?\W*$"
+    )),
+    ("second_person", re.compile(r"\b(you|your|yours|du|din|ditt|dina|dig)\b")),
+    ("peter", re.compile(r"\bpeter('?s)?\b")),
+    ("profile_topic", re.compile(
+        r"(stack|skill|kompetens|erfarenhet|experience|project|projekt|portfolio|programm|"
+        r"språk|language|framework|ramverk|editor|tool|verktyg|\bwork|jobb|career|karriär|"
+        r"educat|utbild|stud|certif|course|kurs|python|react|typescript|fastapi|langgraph|"
+        r"firebase|docker|cloud|databas|database|backend|frontend|\bapi|\bai\b|machine\s+learning|"
+        r"develop|utvecklare|chatbot|hobb|intress|styrk|strength)"
+    )),
+    ("contact", re.compile(
+        r"(contact|kontakt|e-?mail|mejl|linkedin|github|phone|telefon|hire|anställ|freelance|reference)"
+    )),
+    ("personal", re.compile(r"(how\s+old|gammal|\blive\b|\bbor\b|where\s+.*from|background|bakgrund)")),
+    ("off_topic", re.compile(
+        r"(weather|väder|news|nyheter|politic|politik|president|capital|huvudstad|recipe|recept|"
+        r"cook|joke|skämt|bitcoin|stock\s+market|football|fotboll|translate|översätt|movie|"
+        r"moon|quantum|hamlet|melodifestivalen|what\s+time|\d+\s*[-+*/]\s*\d+)"
+    )),
+    ("question", re.compile(r"\?")),
+]
+
+
+def keyword_features(query: str) -> np.ndarray:
+    """Binary pattern matches plus simple length features."""
+    text = " ".join(query.lower().split())
+    words = len(text.split())
+    values = [1.0 if pattern.search(text) else 0.0 for _, pattern in FEATURE_PATTERNS]
+    values.append(1.0 if words <= 2 else 0.0)
+    values.append(np.log1p(words) / 3)
+    return np.asarray(values, dtype=np.float32)
+
+
+def load_labeled_queries(path: Optional[Path] = None) -> Tuple[List[str], List[bool]]:
+    """Load the labeled query set, one ``{"query", "retrieve"}`` object per line."""
+    queries, labels = [], []
+    with open(path or DEFAULT_DATASET, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                queries.append(item["query"])
+                labels.append(bool(item["retrieve"]))
+    return queries, labels
+
+
+class RetrievalClassifier:
+    """
+    Logistic regression over keyword features and, optionally, the query
+    embedding.
+
+    ``predict_proba`` returns the probability that retrieval is needed;
+    callers treat probabilities near 0.5 as low confidence.
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: float,
+        use_embedding: bool = False,
+        embedding_model: Optional[str] = None
+    ):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.use_embedding = use_embedding
+        self.embedding_model = embedding_model
+
+    @staticmethod
+    def _features(query: str, embedding: Optional[List[float]]) -> np.ndarray:
+        features = keyword_features(query)
+        if embedding is None:
+            return features
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return np.concatenate([features, vector / norm if norm else vector])
+
+    def predict_proba(self, query: str, embedding: Optional[List[float]] = None) -> float:
+        """Probability that ``query`` needs retrieval."""
+        if self.use_embedding and embedding is None:
+            raise ValueError("This classifier needs the query embedding")
+        features = self._features(query, embedding if self.use_embedding else None)
+        return float(1.0 / (1.0 + np.exp(-(features @ self.weights + self.bias))))
+
+    @classmethod
+    def fit(
+        cls,
+        queries: List[str],
+        labels: List[bool],
+        embeddings: Optional[List[List[float]]] = None,
+        embedding_model: Optional[str] = None,
+        l2: float = 0.01,
+        iterations: int = 500,
+        learning_rate: float = 0.5
+    ) -> "RetrievalClassifier":
+        """
+        Train with full-batch gradient descent on the logistic loss.
+
+        Args:
+            queries: Training queries
+            labels: Whether each query needs retrieval
+            embeddings: Query embeddings; keyword features only if omitted
+            embedding_model: Model that produced ``embeddings``
+            l2: L2 regularization strength
+            iterations: Gradient steps
+            learning_rate: Step size
+
+        Returns:
+            Trained classifier
+        """
+        X = np.stack([
+            cls._features(query, embeddings[i] if embeddings is not None else None)
+            for i, query in enumerate(queries)
+        ])
+        y = np.asarray(labels, dtype=np.float32)
+        weights = np.zeros(X.shape[1], dtype=np.float32)
+        bias = 0.0
+
+        for _ in range(iterations):
+            predictions = 1.0 / (1.0 + np.exp(-(X @ weights + bias)))
+            error = predictions - y
+            weights -= learning_rate * (X.T @ error / len(y) + l2 * weights)
+            bias -= learning_rate * float(error.mean())
+
+        return cls(weights, bias, embeddings is not None, embedding_model)
+
+    def evaluate(
+        self,
+        queries: List[str],
+        labels: List[bool],
+        embeddings: Optional[List[List[float]]] = None,
+        min_confidence: float = 0.8
+    ) -> Dict[str, Any]:
+        """Accuracy overall and on the confident predictions a caller would keep."""
+        probabilities = np.asarray([
+            self.predict_proba(query, embeddings[i] if embeddings is not None else None)
+            for i, query in enumerate(queries)
+        ])
+        y = np.asarray(labels)
+        predicted = probabilities >= 0.5
+        confident = np.maximum(probabilities, 1 - probabilities) >= min_confidence
+
+        return {
+            "samples": len(y),
+            "accuracy": round(float((predicted == y).mean()), 4),
+            "false_skips": int((~predicted & y).sum()),
+            "coverage": round(float(confident.mean()), 4),
+            "confident_accuracy": round(float((predicted == y)[confident].mean()), 4) if confident.any() else None
+        }
+
+    def save(self, path: str) -> None:
+        """Write the model to an ``.npz`` file."""
+        np.savez(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            use_embedding=np.bool_(self.use_embedding),
+            embedding_model=np.str_(self.embedding_model or "")
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RetrievalClassifier":
+        """Read a model written by ``save``."""
+        with np.load(path) as data:
+            return cls(
+                data["weights"],
+                float(data["bias"]),
+                bool(data["use_embedding"]),
+                str(data["embedding_model"]) or None
+            )
+
+
+def load_retrieval_classifier(path: Optional[str] = None) -> RetrievalClassifier:
+    """
+    Load the trained model configured by ``retrieval_classifier_path``.
+
+    Without one, or if it was trained on another embedding model, a
+    keyword-only model is fitted on the shipped labeled set instead,
+    which takes milliseconds.
+    """
+    path = path or settings.retrieval_classifier_path
+    if path and Path(path).exists():
+        classifier = RetrievalClassifier.load(path)
+        if not classifier.use_embedding or classifier.embedding_model == settings.embedding_model:
+            logger.info("retrieval_classifier_loaded", path=path, use_embedding=classifier.use_embedding)
+            return classifier
+        logger.warning(
+            "retrieval_classifier_model_mismatch",
+            path=path,
+            trained_on=classifier.embedding_model,
+            configured=settings.embedding_model
+        )
+
+    queries, labels = load_labeled_queries()
+    classifier = RetrievalClassifier.fit(queries, labels)
+    logger.info("retrieval_classifier_trained", samples=len(queries), use_embedding=False)
+    return classifier
@@ -0,0 +1,147 @@
+"""Response cache keyed by query-embedding similarity."""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+import numpy as np
+import structlog
+
+from src.config import settings
+from src.services.vector_index import normalize_rows
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class SemanticCacheEntry:
+    """A cached answer and the query it was generated for."""
+    query: str
+    response: str
+    retrieved_ids: List[str]
+    created_at: float
+
+
+@dataclass
+class SemanticCacheHit:
+    """A lookup result with the similarity that matched it."""
+    entry: SemanticCacheEntry
+    similarity: float
+
+
+class SemanticResponseCache:
+    """
+    Serves answers for queries that are near-duplicates of earlier ones.
+
+    Query embeddings live in one normalized float32 matrix, so a lookup is
+    a single matrix-vector product over all entries. Slots are reused
+    oldest first once ``max_entries`` is reached. Because answers depend
+    on the knowledge base, the whole cache is dropped whenever documents
+    change.
+    """
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.95, ttl: int = 300):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectors: Optional[np.ndarray] = None
+        self.created_at = np.zeros(max_entries, dtype=np.float64)
+        self.entries: List[Optional[SemanticCacheEntry]] = [None] * max_entries
+        self._next_slot = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        return normalize_rows(np.asarray(embedding, dtype=np.float32).copy())
+
+    def get(self, embedding: List[float]) -> Optional[SemanticCacheHit]:
+        """Return the most similar fresh entry above the threshold, if any."""
+        query_vector = self._normalize(embedding)
+        if self.vectors is None or self.vectors.shape[1] != query_vector.shape[0]:
+            self.misses += 1
+            return None
+
+        scores = self.vectors @ query_vector
+        # Empty and expired slots can never match
+        scores[self.created_at < time.time() - self.ttl] = -np.inf
+
+        slot = int(np.argmax(scores))
+        similarity = float(scores[slot])
+        if similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return SemanticCacheHit(self.entries[slot], similarity)
+
+    def set(
+        self,
+        embedding: List[float],
+        query: str,
+        response: str,
+        retrieved_ids: Optional[List[str]] = None
+    ) -> None:
+        """Cache the response generated for a query embedding."""
+        vector = self._normalize(embedding)
+        if self.vectors is None or self.vectors.shape[1] != vector.shape[0]:
+            # First entry, or the embedding model changed
+            self.vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self.clear()
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.max_entries
+
+        entry = SemanticCacheEntry(query, response, list(retrieved_ids or []), time.time())
+        self.vectors[slot] = vector
+        self.created_at[slot] = entry.created_at
+        self.entries[slot] = entry
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.created_at[:] = 0
+        self.entries = [None] * self.max_entries
+        self._next_slot = 0
+
+    def invalidate(self, reason: str) -> None:
+        """Drop all entries because the knowledge base changed."""
+        if any(entry is not None for entry in self.entries):
+            self.clear()
+            self.invalidations += 1
+            logger.info("semantic_cache_invalidated", reason=reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total_requests = self.hits + self.misses
+        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(hit_rate, 2),
+            "invalidations": self.invalidations,
+            "cache_size": int(np.count_nonzero(self.created_at > time.time() - self.ttl)),
+            "threshold": self.threshold
+        }
+
+
+# Shared by every request in the process
+_semantic_response_cache: Optional[SemanticResponseCache] = None
+
+
+def get_semantic_response_cache() -> Optional[SemanticResponseCache]:
+    """Process-wide semantic response cache, or None when disabled."""
+    global _semantic_response_cache
+    if _semantic_response_cache is None and settings.semantic_cache_max_entries > 0:
+        _semantic_response_cache = SemanticResponseCache(
+            max_entries=settings.semantic_cache_max_entries,
+            threshold=settings.semantic_cache_threshold,
+            ttl=settings.semantic_cache_ttl
+        )
+    return _semantic_response_cache
+
+
+def invalidate_semantic_cache(reason: str) -> None:
+    """Drop cached answers after the knowledge base changed."""
+    if _semantic_response_cache is not None:
+        _semantic_response_cache.invalidate(reason)
@@ -0,0 +1,167 @@
+"""Incremental synchronization of the vector cache with Firestore."""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable, NamedTuple, Optional, Set
+from google.cloud.firestore_v1.base_query import FieldFilter
+import structlog
+
+logger = structlog.get_logger()
+
+
+class DocumentChange(NamedTuple):
+    """A single collection change; ``data`` is None for removals."""
+    document_id: str
+    data: Optional[Dict[str, Any]]
+
+
+ApplyChanges = Callable[[List[DocumentChange]], None]
+
+
+class SnapshotListenerSync:
+    """
+    Pushes collection changes from a Firestore ``on_snapshot`` listener.
+
+    Firestore invokes the callback on its own thread, so every batch is
+    handed to the event loop and applied there, never concurrently with a
+    search.
+
+    The first callback lists every existing document as added. It is
+    passed to ``reconcile`` instead of ``apply`` so the cache, loaded just
+    before, only takes the documents that actually differ.
+    """
+
+    def __init__(self, collection, apply: ApplyChanges, reconcile: Optional[ApplyChanges] = None):
+        self.collection = collection
+        self.apply = apply
+        self.reconcile = reconcile
+        self._initial = True
+        self._watch = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.last_event_at: Optional[float] = None
+
+    def start(self) -> None:
+        """Subscribe to the collection on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._initial = True
+        self._watch = self.collection.on_snapshot(self._on_snapshot)
+        logger.info("vector_cache_listener_started")
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        batch = [
+            DocumentChange(
+                change.document.id,
+                None if change.type.name == "REMOVED" else change.document.to_dict()
+            )
+            for change in changes
+        ]
+        self.last_event_at = time.time()
+        initial, self._initial = self._initial, False
+        if self._loop is None or self._loop.is_closed():
+            return
+        if initial and self.reconcile is not None:
+            self._loop.call_soon_threadsafe(self.reconcile, batch)
+        elif batch:
+            self._loop.call_soon_threadsafe(self.apply, batch)
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the listener is still delivering changes."""
+        return self._watch is not None and getattr(self._watch, "is_active", True)
+
+    async def stop(self) -> None:
+        """Unsubscribe from the collection."""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+            logger.info("vector_cache_listener_stopped")
+
+
+class WatermarkPollingSync:
+    """
+    Polls for documents whose ``updated_at`` is past the last seen value.
+
+    Polling cannot observe deletions, so every ``reconcile_interval``
+    seconds the collection's ids (no fields) are compared with the cache.
+    """
+
+    def __init__(
+        self,
+        collection,
+        apply: ApplyChanges,
+        known_ids: Callable[[], Set[str]],
+        interval: float = 5.0,
+        reconcile_interval: float = 300.0
+    ):
+        self.collection = collection
+        self.apply = apply
+        self.known_ids = known_ids
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self.watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_reconcile = time.time()
+        self.last_success_at: Optional[float] = None
+
+    def start(self, watermark: Optional[datetime] = None) -> None:
+        """Start polling from ``watermark`` on the running event loop."""
+        self.watermark = watermark
+        self.last_success_at = time.time()
+        self._task = asyncio.create_task(self._run())
+        logger.info("vector_cache_poller_started", watermark=str(watermark))
+
+    def poll(self) -> List[DocumentChange]:
+        """Fetch documents updated since the watermark. Blocking."""
+        query = self.collection
+        if self.watermark is not None:
+            query = query.where(filter=FieldFilter("updated_at", ">", self.watermark))
+
+        changes = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            updated_at = data.get("updated_at")
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+            changes.append(DocumentChange(doc.id, data))
+        return changes
+
+    def reconcile(self) -> List[DocumentChange]:
+        """Return removals for cached ids no longer in the collection. Blocking."""
+        remote_ids = {doc.id for doc in self.collection.select([]).stream()}
+        return [DocumentChange(doc_id, None) for doc_id in self.known_ids() - remote_ids]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                changes = await asyncio.to_thread(self.poll)
+                if time.time() - self._last_reconcile >= self.reconcile_interval:
+                    changes += await asyncio.to_thread(self.reconcile)
+                    self._last_reconcile = time.time()
+                if changes:
+                    self.apply(changes)
+                self.last_success_at = time.time()
+            except Exception as e:
+                logger.error("vector_cache_poll_failed", error=str(e))
+
+    @property
+    def healthy(self) -> bool:
+        """Whether polling has succeeded recently."""
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self.last_success_at is not None
+            and time.time() - self.last_success_at < max(self.interval * 3, 30)
+        )
+
+    async def stop(self) -> None:
+        """Cancel the polling task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("vector_cache_poller_stopped")
@@ -0,0 +1,369 @@
+"""Pluggable nearest-neighbour indexes over a normalized embedding matrix."""
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Set, Tuple
+import numpy as np
+import structlog
+
+from src.config import settings
+from src.services.quantization import Quantizer, create_quantizer
+
+logger = structlog.get_logger()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize matrix rows in place so a dot product is a cosine."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k_scores(
+    scores: np.ndarray,
+    k: int,
+    rows: Optional[np.ndarray] = None
+) -> List[Tuple[int, float]]:
+    """
+    Select the k best scores with argpartition instead of a full sort.
+
+    Args:
+        scores: Similarity per candidate, clamped to [0, 1] in place
+        k: Number of results
+        rows: Matrix row of each candidate, if scores is a subset
+
+    Returns:
+        (row, similarity) pairs in descending similarity order
+    """
+    if scores.shape[0] == 0 or k <= 0:
+        return []
+
+    # Same [0, 1] clamp as EmbeddingService.calculate_similarity
+    np.clip(scores, 0.0, 1.0, out=scores)
+
+    k = min(k, scores.shape[0])
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    labels = rows[best] if rows is not None else best
+
+    return [(int(row), float(scores[i])) for row, i in zip(labels, best)]
+
+
+class VectorIndex(ABC):
+    """
+    Index over the rows of a normalized embedding matrix.
+
+    The matrix itself is owned by the caller and passed to ``search``, so
+    an index only keeps the structure it needs to prune candidates. Rows
+    are identified by position; callers report every row write with
+    ``set_row`` and every shrink with ``truncate``.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def build(self, matrix: np.ndarray) -> None:
+        """(Re)build the index for all rows of ``matrix``."""
+        pass
+
+    @abstractmethod
+    def set_row(self, row: int, vector: np.ndarray) -> None:
+        """Register a new or changed normalized vector at ``row``."""
+        pass
+
+    @abstractmethod
+    def truncate(self, size: int) -> None:
+        """Forget rows at positions ``size`` and beyond."""
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        matrix: np.ndarray,
+        query_vector: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """Return (row, similarity) pairs for a normalized query."""
+        pass
+
+    def search_batch(
+        self,
+        matrix: np.ndarray,
+        query_vectors: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Search once per row of ``query_vectors``; exact indexes score them together."""
+        return [self.search(matrix, query_vector, top_k) for query_vector in query_vectors]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index parameters for monitoring."""
+        return {"type": self.name}
+
+
+class FlatIndex(VectorIndex):
+    """Exact search: one matrix-vector product over every row."""
+
+    name = "flat"
+
+    def build(self, matrix: np.ndarray) -> None:
+        pass
+
+    def set_row(self, row: int, vector: np.ndarray) -> None:
+        pass
+
+    def truncate(self, size: int) -> None:
+        pass
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query_vector: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        return top_k_scores(matrix @ query_vector, top_k)
+
+    def search_batch(
+        self,
+        matrix: np.ndarray,
+        query_vectors: np.ndarray,
+        top_k: int,
+        max_scores: int = 1 << 24
+    ) -> List[List[Tuple[int, float]]]:
+        """One matrix-matrix product per chunk of queries, bounded to ``max_scores`` floats."""
+        chunk_size = max(1, max_scores // max(matrix.shape[0], 1))
+        results = []
+        for start in range(0, query_vectors.shape[0], chunk_size):
+            block = query_vectors[start:start + chunk_size] @ matrix.T
+            results.extend(top_k_scores(scores, top_k) for scores in block)
+        return results
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: rows are bucketed by their nearest k-means centroid
+    and a query only scores the ``nprobe`` closest buckets.
+
+    Recall/latency is tuned with ``nprobe`` (more buckets, better recall)
+    and ``nlist`` (more, smaller buckets). Below ``min_size`` rows the
+    index searches exhaustively, which is faster for small corpora.
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 8,
+        min_size: int = 2048,
+        train_iterations: int = 10,
+        seed: int = 0
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_size = min_size
+        self.train_iterations = train_iterations
+        self.rng = np.random.default_rng(seed)
+
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._dirty: Set[int] = set()
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Nearest centroid per vector, chunked to bound temporary memory."""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk_size):
+            block = vectors[start:start + chunk_size] @ self.centroids.T
+            labels[start:start + chunk_size] = np.argmax(block, axis=1)
+        return labels
+
+    def _train(self, matrix: np.ndarray, nlist: int) -> None:
+        """Spherical k-means on a sample of rows."""
+        sample_size = min(matrix.shape[0], nlist * 256)
+        sample = matrix[self.rng.choice(matrix.shape[0], sample_size, replace=False)]
+        centroids = sample[self.rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            self.centroids = centroids
+            labels = self._assign(sample)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            # Re-seed empty clusters with random sample rows
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = sample[self.rng.choice(sample_size, len(empty))]
+            centroids = normalize_rows(sums)
+
+        self.centroids = centroids
+
+    def build(self, matrix: np.ndarray) -> None:
+        size = matrix.shape[0]
+        if size < self.min_size:
+            self.centroids = None
+            self.assignments = np.zeros(size, dtype=np.int32)
+            self._lists = []
+            self._dirty = set()
+            return
+
+        nlist = self.nlist or max(1, int(np.sqrt(size)))
+        nlist = min(nlist, size)
+        self._train(matrix, nlist)
+        self.assignments = self._assign(matrix)
+        self._lists = [np.zeros(0, dtype=np.int64)] * nlist
+        self._dirty = set(range(nlist))
+
+        logger.info("ivf_index_built", rows=size, nlist=nlist, nprobe=self.nprobe)
+
+    def set_row(self, row: int, vector: np.ndarray) -> None:
+        if row >= self.assignments.shape[0]:
+            grown = np.zeros(max(row + 1, self.assignments.shape[0] * 2), dtype=np.int32)
+            grown[:self.assignments.shape[0]] = self.assignments
+            self.assignments = grown
+        if self.centroids is None:
+            return
+
+        previous = int(self.assignments[row])
+        label = int(np.argmax(self.centroids @ vector))
+        self.assignments[row] = label
+        self._dirty.update((previous, label))
+
+    def truncate(self, size: int) -> None:
+        if self.centroids is not None and size < self.assignments.shape[0]:
+            self._dirty.update(int(label) for label in np.unique(self.assignments[size:]))
+        self.assignments = self.assignments[:size]
+
+    def _list(self, label: int, size: int) -> np.ndarray:
+        """Rows of one bucket, recomputed only after it changed."""
+        if label in self._dirty:
+            self._lists[label] = np.flatnonzero(self.assignments[:size] == label)
+            self._dirty.discard(label)
+        return self._lists[label]
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query_vector: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        if self.centroids is None:
+            return top_k_scores(matrix @ query_vector, top_k)
+
+        size = matrix.shape[0]
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+
+        rows = np.concatenate([self._list(int(label), size) for label in probes])
+        rows = rows[rows < size]
+
+        return top_k_scores(matrix[rows] @ query_vector, top_k, rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "type": self.name,
+            "nlist": 0 if self.centroids is None else int(self.centroids.shape[0]),
+            "nprobe": self.nprobe,
+            "exhaustive": self.centroids is None
+        }
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Exhaustive scan over compact codes, then exact re-ranking of the best
+    ``top_k * rerank_factor`` candidates against the float matrix.
+
+    Only the candidate rows of the float matrix are touched, so when it
+    is the memory-mapped snapshot most of it never has to be resident.
+    """
+
+    name = "quantized"
+
+    def __init__(self, quantizer: Quantizer, rerank_factor: int = 4):
+        self.quantizer = quantizer
+        self.rerank_factor = max(1, rerank_factor)
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.size = 0
+
+    def build(self, matrix: np.ndarray) -> None:
+        self.codes, self.scales = self.quantizer.encode(matrix)
+        self.size = matrix.shape[0]
+
+    def set_row(self, row: int, vector: np.ndarray) -> None:
+        code, scale = self.quantizer.encode(vector)
+        if self.codes is None or self.codes.shape[1] != code.shape[1]:
+            self.codes = np.zeros((0, code.shape[1]), dtype=code.dtype)
+            self.scales = None if scale is None else np.zeros(0, dtype=np.float32)
+            self.size = 0
+
+        if row >= self.codes.shape[0]:
+            capacity = max(16, row + 1, self.codes.shape[0] * 2)
+            codes = np.zeros((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+            codes[:self.codes.shape[0]] = self.codes
+            self.codes = codes
+            if self.scales is not None:
+                scales = np.ones(capacity, dtype=np.float32)
+                scales[:self.scales.shape[0]] = self.scales
+                self.scales = scales
+
+        self.codes[row] = code[0]
+        if self.scales is not None:
+            self.scales[row] = scale[0]
+        self.size = max(self.size, row + 1)
+
+    def truncate(self, size: int) -> None:
+        self.size = min(self.size, size)
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query_vector: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        size = min(self.size, matrix.shape[0])
+        if size == 0 or top_k <= 0:
+            return []
+
+        scales = None if self.scales is None else self.scales[:size]
+        approximate = self.quantizer.score(self.codes[:size], scales, query_vector)
+
+        candidates = min(size, top_k * self.rerank_factor)
+        rows = np.argpartition(-approximate, candidates - 1)[:candidates]
+        rows.sort()  # sequential access into the float matrix
+
+        return top_k_scores(matrix[rows] @ query_vector, top_k, rows)
+
+    def stats(self) -> Dict[str, Any]:
+        code_bytes = 0 if self.codes is None else int(self.codes[:self.size].nbytes)
+        return {
+            "type": self.name,
+            "quantization": self.quantizer.name,
+            "rerank_factor": self.rerank_factor,
+            "code_bytes": code_bytes
+        }
+
+
+def create_vector_index(index_type: Optional[str] = None) -> VectorIndex:
+    """Create the index configured by ``vector_index_type``."""
+    index_type = (index_type or settings.vector_index_type).lower()
+
+    if index_type == "flat":
+        quantizer = create_quantizer()
+        if quantizer is not None:
+            return QuantizedIndex(quantizer, settings.vector_rerank_factor)
+        return FlatIndex()
+    if index_type == "ivf":
+        if create_quantizer() is not None:
+            logger.warning(
+                "vector_quantization_ignored",
+                index_type=index_type,
+                quantization=settings.vector_quantization,
+                detail="quantization applies to the flat index only"
+            )
+        return IVFIndex(
+            nlist=settings.vector_index_nlist,
+            nprobe=settings.vector_index_nprobe,
+            min_size=settings.vector_index_min_size
+        )
+
+    raise ValueError(f"Unknown vector index type: {index_type}")
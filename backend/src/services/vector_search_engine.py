@@ -1,9 +1,17 @@
 """Vector search engine for semantic similarity operations."""
 
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
 import structlog
+from src.config import settings
 from src.services.embeddings import EmbeddingService
 from src.services.document_processor import DocumentProcessor
+from src.services.metadata_filter import MetadataFilter
+from src.services.quantization import create_quantizer
+from src.services.vector_index import FlatIndex, normalize_rows, top_k_scores
 
 logger = structlog.get_logger()
 
@@ -11,9 +19,172 @@ logger = structlog.get_logger()
 class VectorSearchEngine:
     """High-performance vector similarity search engine."""
     
+    # How long searches stay on the exact path after finding too many
+    # documents without codes, before the codes are checked again
+    UNCODED_RECHECK_SECONDS = 300
+    
     def __init__(self, embedding_service: EmbeddingService):
         self.embedding_service = embedding_service
         self.processor = DocumentProcessor()
+        self.quantizer = create_quantizer()
+        self._exact_until = 0.0
+    
+    def _rank(
+        self,
+        query_embedding: List[float],
+        documents: List[Tuple[str, Dict[str, Any]]],
+        top_k: int,
+        threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Score documents exactly with one matrix product and keep the top_k."""
+        # Documents are streamed fresh for every call, so there is no
+        # index to reuse.
+        candidates = []
+        embeddings = []
+        for doc_id, doc_data in documents:
+            doc_embedding = self.processor.extract_embedding(doc_data)
+            if doc_embedding and len(doc_embedding) == len(query_embedding):
+                candidates.append((doc_id, doc_data))
+                embeddings.append(doc_embedding)
+        
+        query_vector = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        matrix = normalize_rows(
+            np.array(embeddings, dtype=np.float32).reshape(len(embeddings), len(query_embedding))
+        )
+        
+        results = []
+        for row, similarity in FlatIndex().search(matrix, query_vector, top_k):
+            if similarity < threshold:
+                break
+            doc_id, doc_data = candidates[row]
+            results.append(
+                self.processor.format_search_result(doc_id, doc_data, similarity)
+            )
+        
+        return results
+    
+    async def execute_quantized_search(
+        self,
+        query: str,
+        collection,
+        top_k: int,
+        threshold: float,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Two-phase search over a Firestore collection.
+        
+        Streams only the compact codes of every document, picks the best
+        ``top_k * vector_rerank_factor`` by approximate similarity, then
+        fetches those documents in full and ranks them exactly. Documents
+        stored before quantization was enabled have no codes and are always
+        re-ranked. With a metadata filter, documents that do not match are
+        skipped before scoring; ``metadata`` is streamed with the codes.
+        
+        Fetching uncoded documents by id costs one round trip per 30, so
+        while more than ``vector_quantization_max_uncoded`` of the
+        collection lacks codes (the backfill script has not run) the exact
+        full-collection search is used instead.
+        """
+        if time.time() < self._exact_until:
+            return await self.execute_collection_search(query, collection, top_k, threshold, metadata_filter)
+        
+        try:
+            query_embedding = await self.embedding_service.embed_text(query)
+            query_vector = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+            
+            fields = [
+                self.processor.QUANTIZED_FIELD,
+                self.processor.QUANTIZED_SCALE_FIELD,
+                self.processor.QUANTIZATION_FIELD
+            ]
+            if metadata_filter is not None:
+                fields.append("metadata")
+            
+            coded_ids, codes, scales, uncoded_ids = [], [], [], []
+            for doc in collection.select(fields).stream():
+                doc_data = doc.to_dict()
+                if metadata_filter is not None and not metadata_filter.matches(doc_data.get("metadata")):
+                    continue
+                code = doc_data.get(self.processor.QUANTIZED_FIELD)
+                if code and doc_data.get(self.processor.QUANTIZATION_FIELD) == self.quantizer.name:
+                    code = self.quantizer.from_bytes(code)
+                    if codes and code.shape != codes[0].shape:
+                        uncoded_ids.append(doc.id)
+                        continue
+                    coded_ids.append(doc.id)
+                    codes.append(code)
+                    scales.append(doc_data.get(self.processor.QUANTIZED_SCALE_FIELD, 1.0))
+                else:
+                    uncoded_ids.append(doc.id)
+            
+            scanned = len(coded_ids) + len(uncoded_ids)
+            if scanned and len(uncoded_ids) / scanned > settings.vector_quantization_max_uncoded:
+                self._exact_until = time.time() + self.UNCODED_RECHECK_SECONDS
+                logger.warning(
+                    "quantized_search_backfill_incomplete",
+                    uncoded_documents=len(uncoded_ids),
+                    scanned_documents=scanned,
+                    hint="run scripts/backfill_quantized_embeddings.py"
+                )
+                return await self.execute_collection_search(query, collection, top_k, threshold, metadata_filter)
+            
+            candidate_ids = list(uncoded_ids)
+            if codes:
+                approximate = self.quantizer.score(
+                    np.stack(codes), np.asarray(scales, dtype=np.float32), query_vector
+                )
+                best = top_k_scores(approximate, top_k * settings.vector_rerank_factor)
+                candidate_ids += [coded_ids[row] for row, _ in best]
+            
+            documents = self._fetch_documents(collection, candidate_ids)
+            results = self._rank(query_embedding, documents, top_k, threshold)
+            
+            logger.info(
+                "quantized_search_completed",
+                quantization=self.quantizer.name,
+                coded_documents=len(coded_ids),
+                uncoded_documents=len(uncoded_ids),
+                reranked=len(documents)
+            )
+            self._log_search_metrics(query, results, len(coded_ids) + len(uncoded_ids))
+            
+            return results
+            
+        except Exception as e:
+            logger.error("quantized_search_failed", error=str(e), query=query[:100])
+            raise
+    
+    def _fetch_documents(
+        self,
+        collection,
+        document_ids: List[str],
+        batch_size: int = 30
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Fetch full documents by id, batched to Firestore's 'in' query limit."""
+        documents = []
+        for start in range(0, len(document_ids), batch_size):
+            refs = [collection.document(doc_id) for doc_id in document_ids[start:start + batch_size]]
+            query = collection.where(filter=FieldFilter(FieldPath.document_id(), "in", refs))
+            documents.extend((doc.id, doc.to_dict()) for doc in query.stream())
+        return documents
+    
+    async def execute_collection_search(
+        self,
+        query: str,
+        collection,
+        top_k: int,
+        threshold: float,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """Exact search over the whole collection, streamed in one query."""
+        documents = [(doc.id, doc.to_dict()) for doc in collection.stream()]
+        if metadata_filter is not None:
+            documents = [
+                (doc_id, data) for doc_id, data in documents
+                if metadata_filter.matches(data.get("metadata"))
+            ]
+        return await self.execute_similarity_search(query, documents, top_k, threshold)
     
     async def execute_similarity_search(
         self,
@@ -38,29 +209,9 @@ class VectorSearchEngine:
           
             query_embedding = await self.embedding_service.embed_text(query)
             
-            results = []
-            processed_count = 0
-            
-            for doc_id, doc_data in documents:
-                processed_count += 1
-                
-                doc_embedding = self.processor.extract_embedding(doc_data)
-                
-                if doc_embedding:
-                    similarity = self.embedding_service.calculate_similarity(
-                        query_embedding, doc_embedding
-                    )
-                    
-                    if similarity >= threshold:
-                        result = self.processor.format_search_result(
-                            doc_id, doc_data, similarity
-                        )
-                        results.append(result)
-            
-            results.sort(key=lambda x: x["similarity"], reverse=True)
-            results = results[:top_k]
+            results = self._rank(query_embedding, documents, top_k, threshold)
             
-            self._log_search_metrics(query, results, processed_count)
+            self._log_search_metrics(query, results, len(documents))
             
             return results
             
@@ -0,0 +1,264 @@
+"""Memory-mapped vector snapshot shared by all workers on a host."""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a snapshot file is missing, truncated or incompatible."""
+    pass
+
+
+# File layout (little endian):
+#   header | id table | text table | record table | padding | float32 matrix
+# A string table is (count + 1) uint64 offsets followed by a UTF-8 blob, so
+# row i is blob[offsets[i]:offsets[i + 1]] and can be decoded on demand.
+MAGIC = b"PBVS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIId4Q")
+MATRIX_ALIGNMENT = 64
+
+
+def _encode_table(values: List[str]) -> bytes:
+    """Encode strings as an offset array followed by a UTF-8 blob."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets.tobytes() + b"".join(encoded)
+
+
+class _StringTable:
+    """Read-only view over an encoded string table inside a buffer."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int):
+        self.buffer = buffer
+        self.offsets = np.frombuffer(buffer, dtype="<u8", count=count + 1, offset=offset)
+        self.blob_start = offset + self.offsets.nbytes
+
+    def __getitem__(self, index: int) -> str:
+        start = self.blob_start + int(self.offsets[index])
+        end = self.blob_start + int(self.offsets[index + 1])
+        return self.buffer[start:end].decode("utf-8")
+
+
+class SnapshotDocuments(Sequence):
+    """
+    Lazy document list backed by a snapshot.
+
+    Rows are decoded only when indexed, so a worker holding the snapshot
+    keeps a handful of Python objects alive instead of the whole corpus.
+    """
+
+    def __init__(self, ids: _StringTable, texts: _StringTable, records: _StringTable, count: int):
+        self._ids = ids
+        self._texts = texts
+        self._records = records
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot document index out of range")
+
+        record = json.loads(self._records[index])
+        return {
+            "id": self._ids[index],
+            "text": self._texts[index],
+            "metadata": record.get("metadata", {}),
+            "created_at": record.get("created_at"),
+            "updated_at": record.get("updated_at")
+        }
+
+
+@dataclass
+class VectorSnapshot:
+    """A mapped snapshot: lazy documents plus a read-only embedding matrix."""
+
+    documents: SnapshotDocuments
+    matrix: np.ndarray
+    created_at: float
+
+    def age(self) -> float:
+        """Seconds since the snapshot was built."""
+        return time.time() - self.created_at
+
+
+def write_snapshot(
+    path: str,
+    documents: List[Dict[str, Any]],
+    matrix: np.ndarray,
+    created_at: Optional[float] = None
+) -> None:
+    """
+    Atomically write documents and their embedding matrix to ``path``.
+
+    The file is written next to the target and renamed into place, so
+    readers either see the previous snapshot or the complete new one.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    count = len(documents)
+    dimension = matrix.shape[1] if matrix.ndim == 2 else 0
+
+    if matrix.shape[0] != count:
+        raise ValueError(f"Matrix has {matrix.shape[0]} rows for {count} documents")
+
+    ids = _encode_table([str(doc["id"]) for doc in documents])
+    texts = _encode_table([doc.get("text") or "" for doc in documents])
+    records = _encode_table([
+        json.dumps(
+            {
+                "metadata": doc.get("metadata") or {},
+                "created_at": doc.get("created_at"),
+                "updated_at": doc.get("updated_at")
+            },
+            default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value)
+        )
+        for doc in documents
+    ])
+
+    ids_offset = HEADER.size
+    texts_offset = ids_offset + len(ids)
+    records_offset = texts_offset + len(texts)
+    matrix_offset = records_offset + len(records)
+    matrix_offset += -matrix_offset % MATRIX_ALIGNMENT
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, count, dimension,
+        created_at if created_at is not None else time.time(),
+        ids_offset, texts_offset, records_offset, matrix_offset
+    )
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(ids)
+        handle.write(texts)
+        handle.write(records)
+        handle.write(b"\0" * (matrix_offset - records_offset - len(records)))
+        handle.write(matrix.tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+    logger.info(
+        "vector_snapshot_written",
+        path=path,
+        document_count=count,
+        dimension=dimension,
+        size_bytes=matrix_offset + matrix.nbytes
+    )
+
+
+def read_snapshot(path: str) -> VectorSnapshot:
+    """Map a snapshot file read-only without copying the matrix."""
+    try:
+        with open(path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError) as e:
+        raise SnapshotFormatError(f"Cannot map snapshot {path}: {e}")
+
+    if len(buffer) < HEADER.size:
+        raise SnapshotFormatError(f"Snapshot {path} is truncated")
+
+    (magic, version, _, count, dimension, created_at,
+     ids_offset, texts_offset, records_offset, matrix_offset) = HEADER.unpack_from(buffer, 0)
+
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotFormatError(f"Snapshot {path} has unsupported format {magic!r} v{version}")
+    if matrix_offset + count * dimension * 4 > len(buffer):
+        raise SnapshotFormatError(f"Snapshot {path} is truncated")
+
+    matrix = np.frombuffer(
+        buffer, dtype="<f4", count=count * dimension, offset=matrix_offset
+    ).reshape(count, dimension)
+
+    documents = SnapshotDocuments(
+        _StringTable(buffer, ids_offset, count),
+        _StringTable(buffer, texts_offset, count),
+        _StringTable(buffer, records_offset, count),
+        count
+    )
+
+    return VectorSnapshot(documents=documents, matrix=matrix, created_at=created_at)
+
+
+class VectorSnapshotStore:
+    """
+    Coordinates one snapshot file between processes on the same host.
+
+    Workers first try the existing file; only when it is missing or older
+    than ``max_age`` does a worker take an exclusive file lock and rebuild.
+    Others block on the same lock and then map the file that was written,
+    so one expiry costs one collection scan per host.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    def _try_read(self, max_age: float, built_after: float) -> Optional[VectorSnapshot]:
+        try:
+            snapshot = read_snapshot(self.path)
+        except SnapshotFormatError:
+            return None
+        if snapshot.age() > max_age or snapshot.created_at < built_after:
+            return None
+        return snapshot
+
+    def acquire(
+        self,
+        max_age: float,
+        build: Callable[[], Tuple[List[Dict[str, Any]], np.ndarray]],
+        built_after: float = 0.0
+    ) -> VectorSnapshot:
+        """
+        Return a snapshot no older than ``max_age``, building it if needed.
+
+        A snapshot's ``created_at`` is the time its collection scan
+        started, so with ``built_after`` only a snapshot that read the
+        collection after that moment is accepted.
+
+        Blocking; call it from a worker thread in async code.
+        """
+        snapshot = self._try_read(max_age, built_after)
+        if snapshot is not None:
+            return snapshot
+
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                # Another process may have rebuilt while we waited
+                snapshot = self._try_read(max_age, built_after)
+                if snapshot is not None:
+                    logger.info("vector_snapshot_reused", path=self.path)
+                    return snapshot
+
+                started = time.time()
+                documents, matrix = build()
+                write_snapshot(self.path, documents, matrix, created_at=started)
+                return read_snapshot(self.path)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def invalidate(self) -> None:
+        """Remove the snapshot so the next acquire rebuilds it."""
+        try:
+            os.unlink(self.path)
+            logger.info("vector_snapshot_invalidated", path=self.path)
+        except FileNotFoundError:
+            pass
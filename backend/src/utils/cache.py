@@ -1,10 +1,18 @@
-"""Simple in-memory cache for common queries and responses."""
+"""Response caches for common queries: per-worker memory or shared per host."""
 
+import asyncio
 import hashlib
+import heapq
+import os
+import sqlite3
+import threading
 import time
-from typing import Optional, Dict, Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from dataclasses import dataclass
 import structlog
+from src.config import settings
 
 logger = structlog.get_logger()
 
@@ -14,27 +22,112 @@ class CacheEntry:
     value: str
     timestamp: float
     ttl: int  # Time to live in seconds
+    size: int = 0  # Approximate bytes held by key and value
+    
+    @property
+    def expires_at(self) -> float:
+        return self.timestamp + self.ttl
     
     def is_expired(self) -> bool:
         """Check if cache entry is expired."""
         return time.time() - self.timestamp > self.ttl
 
-class SimpleCache:
-    """Simple in-memory cache for responses."""
+class CacheBackend(ABC):
+    """
+    Storage for cached responses, keyed by normalized query.
     
-    def __init__(self, default_ttl: int = 300):  
-        self.cache: Dict[str, CacheEntry] = {}
-        self.default_ttl = default_ttl
-        self.hits = 0
-        self.misses = 0
+    ``SimpleCache`` is private to one worker; ``SQLiteCache`` and
+    ``RedisCache`` are shared, so a hit, a clear or the statistics cover
+    every worker that uses the same store. Shared backends do I/O, so
+    they set ``blocking`` and the async helpers below call them from a
+    worker thread.
+    """
+    
+    name = "base"
+    default_ttl = 300
+    blocking = False
     
     def _generate_key(self, query: str) -> str:
         """Generate cache key from query."""
         return hashlib.md5(query.lower().strip().encode()).hexdigest()
     
+    @abstractmethod
+    def get(self, query: str) -> Optional[str]:
+        """Get cached response for query."""
+        pass
+    
+    @abstractmethod
+    def set(self, query: str, response: str, ttl: Optional[int] = None) -> None:
+        """Cache response for query."""
+        pass
+    
+    @abstractmethod
+    def clear_expired(self) -> int:
+        """Clear expired entries and return count removed."""
+        pass
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        pass
+
+
+class SimpleCache(CacheBackend):
+    """
+    Bounded in-memory LRU cache for responses.
+    
+    Entries are evicted least recently used once ``max_entries`` or
+    ``max_bytes`` is exceeded. Expiry times are kept in a min-heap, so
+    each operation only pops the entries that have actually expired
+    instead of scanning the whole cache.
+    """
+    
+    name = "memory"
+    
+    def __init__(
+        self,
+        default_ttl: int = 300,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024
+    ):
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # (expires_at, key); stale items for overwritten keys are skipped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _remove(self, key: str) -> CacheEntry:
+        entry = self.cache.pop(key)
+        self.total_bytes -= entry.size
+        return entry
+    
+    def _expire(self, now: float) -> int:
+        """Remove every entry whose expiry time has passed."""
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                removed += 1
+        self.expirations += removed
+        return removed
+    
     def get(self, query: str) -> Optional[str]:
         """Get cached response for query."""
         key = self._generate_key(query)
+        self._expire(time.time())
         entry = self.cache.get(key)
         
         if entry is None:
@@ -42,12 +135,7 @@ class SimpleCache:
             logger.debug("cache_miss", query=query[:50], key=key[:8])
             return None
         
-        if entry.is_expired():
-            del self.cache[key]
-            self.misses += 1
-            logger.debug("cache_expired", query=query[:50], key=key[:8])
-            return None
-        
+        self.cache.move_to_end(key)
         self.hits += 1
         logger.info("cache_hit", query=query[:50], key=key[:8])
         return entry.value
@@ -56,12 +144,34 @@ class SimpleCache:
         """Cache response for query."""
         key = self._generate_key(query)
         ttl = ttl or self.default_ttl
+        now = time.time()
+        self._expire(now)
+        
+        if key in self.cache:
+            self._remove(key)
         
-        self.cache[key] = CacheEntry(
+        entry = CacheEntry(
             value=response,
-            timestamp=time.time(),
-            ttl=ttl
+            timestamp=now,
+            ttl=ttl,
+            size=len(key) + len(response.encode("utf-8"))
         )
+        self.cache[key] = entry
+        self.total_bytes += entry.size
+        heapq.heappush(self._expiry_heap, (entry.expires_at, key))
+        
+        while self.cache and (
+            len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self.cache)))
+            self.evictions += 1
+        
+        # Overwrites and evictions leave dead heap items; compact occasionally
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._expiry_heap = [
+                (entry.expires_at, key) for key, entry in self.cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
         
         logger.info(
             "cache_set",
@@ -73,18 +183,12 @@ class SimpleCache:
     
     def clear_expired(self) -> int:
         """Clear expired entries and return count removed."""
-        expired_keys = [
-            key for key, entry in self.cache.items() 
-            if entry.is_expired()
-        ]
+        removed_count = self._expire(time.time())
         
-        for key in expired_keys:
-            del self.cache[key]
+        if removed_count:
+            logger.info("cache_cleanup", removed_count=removed_count)
         
-        if expired_keys:
-            logger.info("cache_cleanup", removed_count=len(expired_keys))
-        
-        return len(expired_keys)
+        return removed_count
     
     def stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -92,38 +196,450 @@ class SimpleCache:
         hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
         
         return {
+            "backend": self.name,
             "hits": self.hits,
             "misses": self.misses,
             "hit_rate": round(hit_rate, 2),
-            "cache_size": len(self.cache)
+            "cache_size": len(self.cache),
+            "cache_bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations
         }
     
     def clear(self) -> None:
         """Clear all cache entries."""
         self.cache.clear()
+        self._expiry_heap = []
+        self.total_bytes = 0
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
         logger.info("cache_cleared")
 
-# Global cache instance
-_response_cache = SimpleCache(default_ttl=300) 
+class SQLiteCache(CacheBackend):
+    """
+    Response cache in a SQLite file shared by all workers on a host.
+    
+    WAL mode lets readers proceed while one worker writes. Lookups are
+    plain reads that never wait for the write lock; writes run in an
+    immediate transaction, so they are atomic across processes. Hit and
+    miss counters live in the database too, giving one statistics view
+    for the host. A lookup's counter and last-access updates are kept in
+    the worker and written in one batch at most every ``flush_interval``
+    seconds, and before the worker's own writes and statistics.
+    """
+    
+    name = "sqlite"
+    blocking = True
+    
+    def __init__(
+        self,
+        path: str,
+        default_ttl: int = 300,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        flush_interval: float = 1.0
+    ):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_access: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Per-process connection; never reuse one inherited across fork."""
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "last_access REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS response_cache_expiry ON response_cache (expires_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS response_cache_access ON response_cache (last_access)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache_counters "
+                "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            if self._pid is not None:
+                # Lookups batched by the parent are the parent's to write
+                self._pending_counts.clear()
+                self._pending_access.clear()
+            self._db, self._pid = db, os.getpid()
+        return self._db
+    
+    def _transaction(self, work, wait: bool = True):
+        """
+        Run ``work(db)`` in one immediate transaction.
+        
+        Pending lookup updates are written in the same transaction. With
+        ``wait=False`` a busy database raises at once instead of blocking
+        for the connection timeout.
+        """
+        with self._lock:
+            db = self._connection()
+            if not wait:
+                db.execute("PRAGMA busy_timeout = 0")
+            try:
+                db.execute("BEGIN IMMEDIATE")
+            finally:
+                if not wait:
+                    db.execute("PRAGMA busy_timeout = 5000")
+            try:
+                self._write_pending(db)
+                result = work(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._pending_counts.clear()
+            self._pending_access.clear()
+            self._flushed_at = time.monotonic()
+            return result
+    
+    def _write_pending(self, db: sqlite3.Connection) -> None:
+        for name, amount in self._pending_counts.items():
+            self._count(db, name, amount)
+        db.executemany(
+            "UPDATE response_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+            [(accessed, key) for key, accessed in self._pending_access.items()]
+        )
+    
+    def flush(self, wait: bool = True) -> None:
+        """Write the batched hit/miss counters and last-access times."""
+        if self._pending_counts or self._pending_access:
+            self._transaction(lambda db: None, wait=wait)
+    
+    @staticmethod
+    def _count(db: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        if amount:
+            db.execute(
+                "INSERT INTO response_cache_counters VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+    
+    def _expire(self, db: sqlite3.Connection, now: float) -> int:
+        removed = db.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,)).rowcount
+        self._count(db, "expirations", removed)
+        return removed
+    
+    def get(self, query: str) -> Optional[str]:
+        key = self._generate_key(query)
+        now = time.time()
+        
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value FROM response_cache WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row is None:
+                    self._pending_counts["misses"] = self._pending_counts.get("misses", 0) + 1
+                else:
+                    self._pending_counts["hits"] = self._pending_counts.get("hits", 0) + 1
+                    self._pending_access[key] = now
+        except sqlite3.Error as e:
+            logger.warning("cache_backend_read_failed", backend=self.name, error=str(e))
+            return None
+        
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            try:
+                # Another worker is writing: keep the batch for next time
+                self.flush(wait=False)
+            except sqlite3.Error as e:
+                logger.debug("cache_access_flush_deferred", backend=self.name, error=str(e))
+        
+        if row is None:
+            logger.debug("cache_miss", query=query[:50], key=key[:8])
+            return None
+        logger.info("cache_hit", query=query[:50], key=key[:8])
+        return row[0]
+    
+    def set(self, query: str, response: str, ttl: Optional[int] = None) -> None:
+        key = self._generate_key(query)
+        ttl = ttl or self.default_ttl
+        size = len(key) + len(response.encode("utf-8"))
+        
+        def work(db):
+            now = time.time()
+            self._expire(db, now)
+            db.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+                (key, response, now + ttl, now, size)
+            )
+            
+            count, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+            ).fetchone()
+            evicted = []
+            if count > self.max_entries or total > self.max_bytes:
+                for old_key, old_size in db.execute(
+                    "SELECT key, size FROM response_cache ORDER BY last_access"
+                ):
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    evicted.append((old_key,))
+                    count -= 1
+                    total -= old_size
+                db.executemany("DELETE FROM response_cache WHERE key = ?", evicted)
+                self._count(db, "evictions", len(evicted))
+            return count
+        
+        try:
+            cache_size = self._transaction(work)
+        except sqlite3.Error as e:
+            logger.warning("cache_backend_write_failed", backend=self.name, error=str(e))
+            return
+        
+        logger.info("cache_set", query=query[:50], key=key[:8], ttl=ttl, cache_size=cache_size)
+    
+    def clear_expired(self) -> int:
+        removed_count = self._transaction(lambda db: self._expire(db, time.time()))
+        if removed_count:
+            logger.info("cache_cleanup", removed_count=removed_count)
+        return removed_count
+    
+    def stats(self) -> Dict[str, Any]:
+        def work(db):
+            counters = dict(db.execute("SELECT name, value FROM response_cache_counters"))
+            size, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache WHERE expires_at >= ?",
+                (time.time(),)
+            ).fetchone()
+            return counters, size, total
+        
+        counters, size, total = self._transaction(work)
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+        
+        return {
+            "backend": self.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hit_rate, 2),
+            "cache_size": size,
+            "cache_bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+            "path": self.path
+        }
+    
+    def clear(self) -> None:
+        def work(db):
+            db.execute("DELETE FROM response_cache")
+            db.execute("DELETE FROM response_cache_counters")
+        
+        self._transaction(work)
+        logger.info("cache_cleared", backend=self.name)
+
+
+class RedisCache(CacheBackend):
+    """
+    Response cache in Redis (or any server speaking its protocol).
+    
+    Expiry is delegated to Redis with ``SET ... EX``; size bounds are the
+    server's job (``maxmemory`` with an LRU policy), not enforced here.
+    """
+    
+    name = "redis"
+    blocking = True
+    
+    def __init__(self, client, default_ttl: int = 300, prefix: str = "peterbot:response:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self._stats_key = f"{prefix}__stats__"
+    
+    def _redis_key(self, query: str) -> str:
+        return self.prefix + self._generate_key(query)
+    
+    def get(self, query: str) -> Optional[str]:
+        key = self._redis_key(query)
+        try:
+            value = self.client.get(key)
+            self.client.hincrby(self._stats_key, "hits" if value is not None else "misses", 1)
+        except Exception as e:
+            logger.warning("cache_backend_read_failed", backend=self.name, error=str(e))
+            return None
+        
+        if value is None:
+            logger.debug("cache_miss", query=query[:50], key=key[-8:])
+            return None
+        logger.info("cache_hit", query=query[:50], key=key[-8:])
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+    
+    def set(self, query: str, response: str, ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.default_ttl
+        try:
+            self.client.set(self._redis_key(query), response, ex=ttl)
+        except Exception as e:
+            logger.warning("cache_backend_write_failed", backend=self.name, error=str(e))
+            return
+        logger.info("cache_set", query=query[:50], ttl=ttl)
+    
+    def clear_expired(self) -> int:
+        # Redis expires keys itself
+        return 0
+    
+    def _keys(self) -> List[str]:
+        return [
+            key for key in self.client.scan_iter(match=f"{self.prefix}*")
+            if key not in (self._stats_key, self._stats_key.encode("utf-8"))
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        counters = {
+            (name.decode("utf-8") if isinstance(name, bytes) else name): int(value)
+            for name, value in self.client.hgetall(self._stats_key).items()
+        }
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+        
+        return {
+            "backend": self.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hit_rate, 2),
+            "cache_size": len(self._keys())
+        }
+    
+    def clear(self) -> None:
+        keys = self._keys()
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(self._stats_key)
+        logger.info("cache_cleared", backend=self.name)
+
+
+def create_response_cache(backend: Optional[str] = None) -> CacheBackend:
+    """Create the response cache configured by ``response_cache_backend``."""
+    backend = (backend or settings.response_cache_backend).lower()
+    
+    if backend == "memory":
+        return SimpleCache(
+            default_ttl=300,
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes
+        )
+    if backend == "sqlite":
+        if not settings.response_cache_path:
+            raise ValueError("RESPONSE_CACHE_PATH is required for the sqlite response cache")
+        return SQLiteCache(
+            settings.response_cache_path,
+            default_ttl=300,
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes
+        )
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise ValueError("The redis response cache requires the 'redis' package") from e
+        return RedisCache(redis.Redis.from_url(
+            settings.response_cache_redis_url,
+            socket_timeout=settings.response_cache_redis_timeout,
+            socket_connect_timeout=settings.response_cache_redis_timeout
+        ))
+    
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+_response_cache: Optional[CacheBackend] = None
+
+
+def get_response_cache() -> CacheBackend:
+    """
+    Return the process-wide response cache, building it on first use.
+    
+    A backend that cannot be created (missing path, package or server)
+    is logged and replaced by a per-worker memory cache, so the service
+    still starts and answers without a shared cache.
+    """
+    global _response_cache
+    if _response_cache is None:
+        try:
+            _response_cache = create_response_cache()
+        except Exception as e:
+            logger.error(
+                "response_cache_backend_failed",
+                backend=settings.response_cache_backend,
+                error=str(e)
+            )
+            _response_cache = create_response_cache("memory")
+    return _response_cache
 
 def get_cached_response(query: str) -> Optional[str]:
     """Get cached response for query."""
-    return _response_cache.get(query)
+    return get_response_cache().get(query)
+
+def response_cache_key(query: str) -> str:
+    """Key under which a query's response is cached."""
+    return get_response_cache()._generate_key(query)
 
 def cache_response(query: str, response: str, ttl: int = 300) -> None:
     """Cache response for query."""
-    _response_cache.set(query, response, ttl)
+    get_response_cache().set(query, response, ttl)
 
 def get_cache_stats() -> Dict[str, Any]:
     """Get cache statistics."""
-    return _response_cache.stats()
+    return get_response_cache().stats()
 
 def clear_cache() -> None:
     """Clear all cached responses."""
-    _response_cache.clear()
+    get_response_cache().clear()
 
 def cleanup_expired() -> int:
     """Clean up expired cache entries."""
-    return _response_cache.clear_expired()
\ No newline at end of file
+    return get_response_cache().clear_expired()
+
+
+async def _call_off_loop(call: Callable[[CacheBackend], Any]) -> Any:
+    """
+    Run ``call`` against the response cache without blocking the loop.
+    
+    The memory cache is called inline; SQLite and Redis calls (and the
+    first-use construction, which may open the database) run in a thread.
+    """
+    cache = _response_cache
+    if cache is None:
+        cache = await asyncio.to_thread(get_response_cache)
+    if cache.blocking:
+        return await asyncio.to_thread(call, cache)
+    return call(cache)
+
+async def aget_cached_response(query: str) -> Optional[str]:
+    """Get cached response for query from async code."""
+    return await _call_off_loop(lambda cache: cache.get(query))
+
+async def acache_response(query: str, response: str, ttl: int = 300) -> None:
+    """Cache response for query from async code."""
+    await _call_off_loop(lambda cache: cache.set(query, response, ttl))
+
+async def aget_cache_stats() -> Dict[str, Any]:
+    """Get cache statistics from async code."""
+    return await _call_off_loop(lambda cache: cache.stats())
+
+async def aclear_cache() -> None:
+    """Clear all cached responses from async code."""
+    await _call_off_loop(lambda cache: cache.clear())
+
+async def acleanup_expired() -> int:
+    """Clean up expired cache entries from async code."""
+    return await _call_off_loop(lambda cache: cache.clear_expired())
@@ -0,0 +1,39 @@
+"""Server-issued conversation ids."""
+
+import hashlib
+import hmac
+import uuid
+
+from src.config import settings
+
+PREFIX = "conv_"
+
+
+def _key() -> bytes:
+    # Every worker derives the same key, so any worker accepts an id
+    secret = settings.conversation_id_secret or f"conversation-id:{settings.openai_api_key}"
+    return hashlib.sha256(secret.encode("utf-8")).digest()
+
+
+def _signature(token: str) -> str:
+    return hmac.new(_key(), token.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+
+def issue_conversation_id() -> str:
+    """A new conversation id signed by this server."""
+    token = uuid.uuid4().hex
+    return f"{PREFIX}{token}_{_signature(token)}"
+
+
+def is_issued(conversation_id: str) -> bool:
+    """
+    Whether ``conversation_id`` was issued by this server.
+    
+    Only issued ids may continue a conversation. A client-chosen id such
+    as a fixed string shared by every visitor would otherwise give each
+    visitor the others' history.
+    """
+    if not conversation_id.startswith(PREFIX):
+        return False
+    token, _, signature = conversation_id[len(PREFIX):].partition("_")
+    return bool(token) and hmac.compare_digest(signature, _signature(token))
@@ -0,0 +1,83 @@
+"""Coalescing of identical concurrent calls into one shared execution."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+import structlog
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight execution and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one execution per key at a time.
+
+    The first caller for a key starts ``fn`` as a task of its own; callers
+    arriving while it runs await the same task. A caller that is cancelled
+    (e.g. the client disconnected) stops waiting without affecting the
+    others, and the execution is only cancelled once nobody is waiting.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.shared = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the in-flight execution for ``key``, starting one if needed.
+
+        Args:
+            key: Identity of the call; equal keys share one execution
+            fn: Coroutine factory, only invoked by the first caller
+
+        Returns:
+            The execution's result; its exception is raised to every caller
+        """
+        call = self._calls.get(key)
+        if call is None or call.task.get_loop() is not asyncio.get_running_loop():
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.shared += 1
+            logger.debug("single_flight_joined", key=key[:8], waiters=call.waiters + 1)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                self.abandoned += 1
+                logger.info("single_flight_abandoned", key=key[:8])
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Retrieve the exception so it is not reported when nobody awaited it
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing statistics."""
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._calls)
+        }
@@ -0,0 +1,184 @@
+"""
+Shared fixtures for offline unit tests.
+
+Settings are loaded at import time, so placeholder credentials are set
+before anything under src/ is imported. Firestore and OpenAI are replaced
+by small in-process fakes.
+"""
+
+import operator
+import os
+import threading
+
+for _name in (
+    "OPENAI_API_KEY",
+    "FIREBASE_PROJECT_ID",
+    "FIREBASE_PRIVATE_KEY_ID",
+    "FIREBASE_PRIVATE_KEY",
+    "FIREBASE_CLIENT_EMAIL",
+    "FIREBASE_CLIENT_ID",
+    "FIREBASE_CLIENT_CERT_URL",
+):
+    os.environ.setdefault(_name, "test")
+
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from src.services.document_processor import DocumentProcessor
+
+
+class FakeSnapshot:
+    """Minimal stand-in for a Firestore DocumentSnapshot."""
+
+    def __init__(self, doc_id: str, data: Dict[str, Any]):
+        self.id = doc_id
+        self._data = data
+        self.exists = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+
+class FakeChange:
+    """Stand-in for a Firestore DocumentChange delivered to listeners."""
+
+    def __init__(self, kind: str, snapshot: FakeSnapshot):
+        self.type = SimpleNamespace(name=kind)
+        self.document = snapshot
+
+
+class FakeWatch:
+    def __init__(self):
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class FakeQuery:
+    """Result of where()/select() on a FakeCollection."""
+
+    def __init__(self, snapshots: List[FakeSnapshot]):
+        self.snapshots = snapshots
+
+    def stream(self):
+        return list(self.snapshots)
+
+
+class FakeCollection:
+    """
+    In-memory Firestore collection supporting stream(), where(),
+    select() and on_snapshot(). set()/delete() notify listeners from a
+    background thread like the real client does.
+    """
+
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.stream_calls = 0
+        self.listeners = []
+
+    def stream(self):
+        self.stream_calls += 1
+        return [FakeSnapshot(doc_id, data) for doc_id, data in self.docs.items()]
+
+    def where(self, filter):
+        ops = {">": operator.gt, ">=": operator.ge, "==": operator.eq}
+        compare = ops[filter.op_string]
+        return FakeQuery([
+            FakeSnapshot(doc_id, data) for doc_id, data in self.docs.items()
+            if filter.field_path in data and compare(data[filter.field_path], filter.value)
+        ])
+
+    def select(self, fields):
+        return FakeQuery([FakeSnapshot(doc_id, {}) for doc_id in self.docs])
+
+    def on_snapshot(self, callback):
+        """Like Firestore, first deliver every existing document as added"""
+        watch = FakeWatch()
+        self.listeners.append((callback, watch))
+        snapshots = [FakeSnapshot(doc_id, data) for doc_id, data in self.docs.items()]
+        thread = threading.Thread(
+            target=callback, args=(snapshots, [FakeChange("ADDED", snapshot) for snapshot in snapshots], None)
+        )
+        thread.start()
+        thread.join()
+        return watch
+
+    def _notify(self, change: FakeChange):
+        for callback, watch in self.listeners:
+            if watch.is_active:
+                thread = threading.Thread(target=callback, args=([], [change], None))
+                thread.start()
+                thread.join()
+
+    def set(self, doc_id: str, data: Dict[str, Any]):
+        kind = "MODIFIED" if doc_id in self.docs else "ADDED"
+        self.docs[doc_id] = data
+        self._notify(FakeChange(kind, FakeSnapshot(doc_id, data)))
+
+    def delete(self, doc_id: str):
+        data = self.docs.pop(doc_id)
+        self._notify(FakeChange("REMOVED", FakeSnapshot(doc_id, data)))
+
+
+class FakeFirebase:
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+
+    def get_collection(self, name: str) -> FakeCollection:
+        return self.collection
+
+
+class FakeFirebaseStore:
+    """Duck-typed FirebaseVectorStore backed by a FakeCollection."""
+
+    def __init__(self, collection: FakeCollection):
+        self.firebase = FakeFirebase(collection)
+        self.collection_name = "test"
+        self.processor = DocumentProcessor()
+
+
+class FakeEmbeddingService:
+    """Returns pre-registered vectors instead of calling OpenAI."""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+        self.calls: List[str] = []
+        self.batches = 0
+
+    async def embed_text(self, text: str) -> List[float]:
+        self.calls.append(text)
+        return self.vectors[text]
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.calls.extend(texts)
+        return [self.vectors[text] for text in texts]
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        self.batches += 1
+        return await self.embed_texts(texts)
+
+
+@pytest.fixture
+def fake_collection() -> FakeCollection:
+    collection = FakeCollection()
+    collection.docs = {
+        "python": {"text": "Python and FastAPI", "embedding": [1.0, 0.0, 0.0],
+                   "metadata": {"category": "skills"}},
+        "react": {"text": "React and TypeScript", "embedding": [0.0, 1.0, 0.0],
+                  "metadata": {"category": "skills"}},
+        "contact": {"text": "Reach me on LinkedIn", "embedding": [0.0, 0.0, 2.0],
+                    "metadata": {"category": "contact"}},
+    }
+    return collection
+
+
+@pytest.fixture
+def fake_embeddings() -> FakeEmbeddingService:
+    return FakeEmbeddingService({
+        "backend": [0.9, 0.1, 0.0],
+        "frontend": [0.1, 0.9, 0.0],
+        "linkedin": [0.0, 0.0, 1.0],
+    })
@@ -0,0 +1,162 @@
+"""
+Offline tests for the agent runtime and streaming runs.
+"""
+
+from itertools import cycle
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.core import agent, nodes
+
+
+class FakeVectorStore:
+    instances = 0
+
+    def __init__(self):
+        FakeVectorStore.instances += 1
+        self.closed = False
+        self.embedding_service = None
+
+    async def search(self, query, top_k=None, threshold=None, **kwargs):
+        return [{"id": "python", "text": "Python and FastAPI", "similarity": 0.9, "metadata": {}}]
+
+    async def warm_up(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+def fake_llm(**kwargs):
+    replies = cycle([AIMessage(content="yes"), AIMessage(content="I work with Python daily")])
+    return GenericFakeChatModel(messages=replies)
+
+
+@pytest.fixture
+async def fake_agent(monkeypatch):
+    monkeypatch.setattr(nodes, "ChatOpenAI", fake_llm)
+    monkeypatch.setattr(nodes, "CachedVectorStore", lambda **kwargs: FakeVectorStore())
+    monkeypatch.setattr(agent.settings, "query_analyzer_backend", "llm")
+    FakeVectorStore.instances = 0
+    await agent.shutdown_agent()
+    yield
+    await agent.shutdown_agent()
+
+
+async def test_stream_agent_emits_retrieval_before_tokens(fake_agent):
+    """Retrieval metadata arrives first, then answer chunks, then done"""
+    events = [event async for event in agent.stream_agent("What is your stack?", "conv-1")]
+    kinds = [event["event"] for event in events]
+
+    assert kinds[0] == "retrieval"
+    assert events[0]["data"]["retrieved_context"][0]["id"] == "python"
+    assert kinds.count("token") > 1
+    assert kinds[-1] == "done"
+    assert "".join(e["data"]["text"] for e in events if e["event"] == "token") == "I work with Python daily"
+    assert events[-1]["data"]["response"] == "I work with Python daily"
+
+
+async def test_runtime_is_built_once_per_process(fake_agent):
+    """Consecutive runs reuse the same graph and services"""
+    await agent.start_agent()
+    runtime = agent.get_agent_runtime()
+
+    first = await agent.run_agent("What is your stack?", "conv-1")
+    second = await agent.run_agent("Which frameworks?", "conv-2")
+
+    assert first["response"] == second["response"] == "I work with Python daily"
+    assert agent.get_agent_runtime() is runtime
+    assert FakeVectorStore.instances == 1
+
+
+async def test_reload_swaps_runtime_and_keeps_checkpoints(fake_agent):
+    """Reloading closes the old services and carries conversations over"""
+    old = agent.get_agent_runtime()
+    await agent.run_agent("What is your stack?", "conv-1")
+
+    new = await agent.reload_agent(reload_config=False)
+
+    assert new is agent.get_agent_runtime() and new is not old
+    assert old.vector_store.closed
+    assert new.checkpointer is old.checkpointer
+    state = await new.app.aget_state({"configurable": {"thread_id": "conv-1"}})
+    assert state.values["query"] == "What is your stack?"
+
+
+async def test_reload_warms_new_runtime_before_swapping(fake_agent, monkeypatch):
+    """Requests keep using the old runtime until the new cache is warm"""
+    old = agent.get_agent_runtime()
+    serving_during_warm_up = []
+
+    async def warm_up():
+        serving = agent.get_agent_runtime()
+        serving_during_warm_up.append((serving, serving.vector_store.closed))
+
+    monkeypatch.setattr(FakeVectorStore, "warm_up", lambda self: warm_up())
+
+    new = await agent.reload_agent(reload_config=False)
+
+    assert serving_during_warm_up == [(old, False)]
+    assert agent.get_agent_runtime() is new and old.vector_store.closed
+
+
+async def test_speculative_mode_uses_retrieval_when_needed(fake_agent, monkeypatch):
+    """Retrieval runs alongside analysis and its context is kept on yes"""
+    monkeypatch.setattr(agent.settings, "agent_speculative_retrieval", True)
+
+    result = await agent.run_agent("What is your stack?", "conv-1")
+
+    assert result["retrieved_context"][0]["id"] == "python"
+    assert result["response"] == "I work with Python daily"
+    stats = agent.get_agent_runtime().stats()
+    assert stats["execution_mode"] == "speculative"
+    assert stats["speculation_stats"]["used"] == 1
+    assert stats["speculation_stats"]["wasted"] == 0
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+async def test_failed_retrieval_still_answers(fake_agent, monkeypatch, speculative):
+    """A store that raises leaves the answer to the model in both modes"""
+    async def failing_search(self, query, top_k=None, threshold=None, **kwargs):
+        raise RuntimeError("firestore unavailable")
+
+    monkeypatch.setattr(FakeVectorStore, "search", failing_search)
+    monkeypatch.setattr(agent.settings, "agent_speculative_retrieval", speculative)
+
+    result = await agent.run_agent("What is your stack?", "conv-1")
+
+    assert result["response"] == "I work with Python daily"
+    assert result["retrieved_context"] == []
+
+
+async def test_speculative_mode_discards_unneeded_context(fake_agent, monkeypatch):
+    """A no from the analyzer drops the speculative context and counts it"""
+    def no_llm(**kwargs):
+        replies = cycle([AIMessage(content="no"), AIMessage(content="Hello there")])
+        return GenericFakeChatModel(messages=replies)
+
+    monkeypatch.setattr(nodes, "ChatOpenAI", no_llm)
+    monkeypatch.setattr(agent.settings, "agent_speculative_retrieval", True)
+
+    events = [event async for event in agent.stream_agent("Hi", "conv-2")]
+
+    assert events[0] == {"event": "retrieval", "data": {"retrieved_context": []}}
+    assert events[-1]["data"]["response"] == "Hello there"
+    stats = agent.get_agent_runtime().stats()["speculation_stats"]
+    assert stats["wasted"] == 1 and stats["waste_rate"] == 100
+
+
+async def test_recorded_turns_join_the_conversation(fake_agent):
+    """Answers given outside the graph are stored in the caller's thread"""
+    assert not await agent.has_conversation_history("conv-1")
+
+    await agent.record_turn("Hi", "Hello! Ask me about Peter.", "conv-1")
+
+    assert await agent.has_conversation_history("conv-1")
+    state = await agent.get_agent_runtime().app.aget_state({"configurable": {"thread_id": "conv-1"}})
+    assert [m.content for m in state.values["messages"]] == ["Hi", "Hello! Ask me about Peter."]
+
+    result = await agent.run_agent("What is your stack?", "conv-1")
+    assert result["messages"][0].content == "Hi"
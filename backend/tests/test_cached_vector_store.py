@@ -0,0 +1,163 @@
+"""
+Offline tests for the cached vector store's matrix-based search.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.services.cached_vector_store import CachedVectorStore
+from tests.conftest import FakeFirebaseStore
+
+
+def make_store(collection, embeddings) -> CachedVectorStore:
+    return CachedVectorStore(
+        firebase_store=FakeFirebaseStore(collection),
+        embedding_service=embeddings
+    )
+
+
+async def test_refresh_builds_normalized_float32_matrix(fake_collection, fake_embeddings):
+    """Cache keeps one contiguous, unit-norm float32 matrix"""
+    store = make_store(fake_collection, fake_embeddings)
+    await store._refresh_cache()
+
+    assert store.embedding_matrix.dtype == np.float32
+    assert store.embedding_matrix.shape == (3, 3)
+    assert store.embedding_matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(np.linalg.norm(store.embedding_matrix, axis=1), 1.0, rtol=1e-6)
+    assert all("embedding" not in doc for doc in store.documents_cache)
+
+
+async def test_search_ranks_by_cosine(fake_collection, fake_embeddings):
+    """Top-k is ordered by similarity and respects the threshold"""
+    store = make_store(fake_collection, fake_embeddings)
+
+    results = await store.search("backend", top_k=2, threshold=0.05)
+    assert [r["id"] for r in results] == ["python", "react"]
+    assert results[0]["similarity"] > results[1]["similarity"]
+
+    results = await store.search("linkedin", top_k=5, threshold=0.5)
+    assert [r["id"] for r in results] == ["contact"]
+    assert abs(results[0]["similarity"] - 1.0) < 1e-6
+
+
+async def test_search_skips_mismatched_dimensions(fake_collection, fake_embeddings):
+    """Documents with a different embedding size are left out of the matrix"""
+    fake_collection.docs["broken"] = {"text": "bad", "embedding": [1.0, 0.0]}
+    store = make_store(fake_collection, fake_embeddings)
+    await store._refresh_cache()
+
+    assert [doc["id"] for doc in store.documents_cache] == ["python", "react", "contact"]
+
+
+async def test_stale_cache_serves_while_refreshing(fake_collection, fake_embeddings):
+    """An expired cache answers immediately and is swapped in the background"""
+    store = make_store(fake_collection, fake_embeddings)
+    await store.search("backend", top_k=1, threshold=0.5)
+
+    fake_collection.docs["python"]["embedding"] = [0.0, 0.0, 1.0]
+    store.cache_timestamp -= store.cache_ttl + 1
+
+    results = await store.search("backend", top_k=1, threshold=0.5)
+    assert [r["id"] for r in results] == ["python"]
+    assert store._refresh_task is not None
+
+    await store._refresh_task
+    results = await store.search("backend", top_k=1, threshold=0.5)
+    assert results == []
+    assert fake_collection.stream_calls == 2
+
+
+async def test_refresh_failure_backs_off(fake_collection, fake_embeddings):
+    """Failed refreshes are retried only after the backoff window"""
+    store = make_store(fake_collection, fake_embeddings)
+    await store.search("backend", top_k=1, threshold=0.5)
+
+    fake_collection.stream = lambda: (_ for _ in ()).throw(RuntimeError("firestore down"))
+    store.cache_timestamp -= store.cache_ttl + 1
+
+    await store.search("backend", top_k=1, threshold=0.5)
+    await store._refresh_task
+    assert store._refresh_failures == 1
+    assert store._next_refresh_at > 0
+
+    failed_task = store._refresh_task
+    results = await store.search("backend", top_k=1, threshold=0.5)
+    assert store._refresh_task is failed_task
+    assert [r["id"] for r in results] == ["python"]
+
+
+async def test_cached_consistency_serves_index_as_is(fake_collection, fake_embeddings):
+    """A cached read does not see writes made behind the index's back"""
+    store = make_store(fake_collection, fake_embeddings)
+    await store.search("frontend", top_k=1, threshold=0.5)
+    fake_collection.docs["vue"] = {"text": "Vue", "embedding": [0.1, 1.0, 0.0]}
+
+    results, info = await store.search_with_info("frontend", top_k=3, threshold=0.5)
+
+    assert [r["id"] for r in results] == ["react"]
+    assert info["served_by"] == "cache" and info["applied_changes"] == 0
+    assert fake_collection.stream_calls == 1
+
+
+async def test_strong_consistency_applies_new_writes_without_full_scan(fake_collection, fake_embeddings):
+    """A strong read picks up updates and deletes through the watermark and id queries"""
+    loaded_at = datetime(2024, 1, 1)
+    for data in fake_collection.docs.values():
+        data["updated_at"] = loaded_at
+    store = make_store(fake_collection, fake_embeddings)
+    await store.search("frontend", top_k=1, threshold=0.5)
+
+    fake_collection.docs["vue"] = {
+        "text": "Vue", "embedding": [0.1, 1.0, 0.0], "updated_at": loaded_at + timedelta(minutes=1)
+    }
+    del fake_collection.docs["react"]
+
+    results, info = await store.search_with_info("frontend", top_k=3, threshold=0.5, consistency="strong")
+
+    assert [r["id"] for r in results] == ["vue"]
+    assert info["served_by"] == "cache_verified" and info["applied_changes"] == 2
+    assert fake_collection.stream_calls == 1
+
+
+async def test_batch_search_embeds_once_and_matches_single_search(fake_collection, fake_embeddings):
+    """A batch uses one embedding call and returns per-query results in order"""
+    store = make_store(fake_collection, fake_embeddings)
+    queries = ["frontend", "linkedin", "backend"]
+
+    batch, info = await store.search_batch(queries, top_k=2, threshold=0.5)
+
+    assert fake_embeddings.batches == 1
+    assert [[r["id"] for r in results] for results in batch] == [["react"], ["contact"], ["python"]]
+    for query, results in zip(queries, batch):
+        assert results == await store.search(query, top_k=2, threshold=0.5)
+    assert info["served_by"] == "cache"
+    assert set(info) >= {"embedding_ms", "scoring_ms", "total_ms"}
+
+
+async def test_document_routes_write_through_the_shared_cache(monkeypatch, fake_collection, fake_embeddings):
+    """A document created or deleted through the API shows up in the next search"""
+    from types import SimpleNamespace
+
+    from src.api.routes import documents
+    from src.models import DocumentRequest
+
+    class WritableStore(FakeFirebaseStore):
+        async def add_document(self, text, metadata=None, document_id=None):
+            fake_collection.docs[document_id] = {"text": text, "embedding": [0.1, 1.0, 0.0], "metadata": metadata or {}}
+            return document_id
+
+        async def delete_document(self, document_id):
+            del fake_collection.docs[document_id]
+            return True
+
+    store = CachedVectorStore(firebase_store=WritableStore(fake_collection), embedding_service=fake_embeddings)
+    monkeypatch.setattr(documents, "get_agent_runtime", lambda: SimpleNamespace(vector_store=store))
+    assert [r["id"] for r in await store.search("frontend", top_k=3, threshold=0.5)] == ["react"]
+
+    await documents.create_document(DocumentRequest(text="Vue", document_id="vue"))
+    assert {r["id"] for r in await store.search("frontend", top_k=3, threshold=0.5)} == {"react", "vue"}
+
+    await documents.delete_document("vue")
+    assert [r["id"] for r in await store.search("frontend", top_k=3, threshold=0.5)] == ["react"]
@@ -0,0 +1,181 @@
+"""
+Tests for the bounded conversation checkpointers.
+"""
+
+import threading
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, StateGraph, add_messages
+
+from src.core.checkpointer import BoundedMemorySaver, SQLiteSaver
+from src.models.requests import ChatRequest
+
+
+class ChatState(TypedDict):
+    messages: Annotated[List, add_messages]
+    query: str
+
+
+def reply(state: ChatState):
+    return {"messages": [HumanMessage(state["query"]), AIMessage(f"echo {state['query']}")]}
+
+
+def build_app(checkpointer):
+    workflow = StateGraph(ChatState)
+    workflow.add_node("reply", reply)
+    workflow.set_entry_point("reply")
+    workflow.add_edge("reply", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+async def chat(app, thread_id, query):
+    config = {"configurable": {"thread_id": thread_id}}
+    return await app.ainvoke({"messages": [], "query": query}, config)
+
+
+async def test_messages_and_history_are_bounded():
+    """Long conversations keep only recent messages and checkpoints"""
+    saver = BoundedMemorySaver(max_messages=4)
+    app = build_app(saver)
+
+    for turn in range(10):
+        result = await chat(app, "conv-1", f"q{turn}")
+
+    assert result["messages"][-1].content == "echo q9"
+    assert len(saver.storage["conv-1"][""]) == 2
+    state = await app.aget_state({"configurable": {"thread_id": "conv-1"}})
+    assert [m.content for m in state.values["messages"]] == ["q8", "echo q8", "q9", "echo q9"]
+    # Blobs of pruned checkpoints are released
+    assert len(saver.blobs) <= 2 * 3
+
+
+async def test_least_recently_used_thread_is_evicted():
+    """Beyond max_threads the thread idle the longest is dropped"""
+    saver = BoundedMemorySaver(max_threads=2)
+    app = build_app(saver)
+
+    await chat(app, "a", "hi")
+    await chat(app, "b", "hi")
+    await chat(app, "a", "again")
+    await chat(app, "c", "hi")
+
+    assert set(saver.storage) == {"a", "c"}
+    assert not any(key[0] == "b" for key in saver.blobs)
+    assert saver.stats()["evictions"] == 1
+
+
+async def test_idle_threads_expire():
+    """Threads idle longer than the TTL start over"""
+    saver = BoundedMemorySaver(ttl=60)
+    app = build_app(saver)
+    await chat(app, "a", "hi")
+
+    saver._last_access["a"] -= 120
+    result = await chat(app, "a", "again")
+
+    assert [m.content for m in result["messages"]] == ["again", "echo again"]
+    assert saver.stats()["expirations"] == 1
+
+
+async def test_unknown_thread_lookup_does_not_grow_storage():
+    """Looking up a thread that was never saved leaves no entry behind"""
+    saver = BoundedMemorySaver()
+
+    assert saver.get_tuple({"configurable": {"thread_id": "missing"}}) is None
+    assert "missing" not in saver.storage
+
+
+async def test_sqlite_conversation_survives_new_saver(tmp_path):
+    """A new process continues the conversation from the SQLite file"""
+    path = str(tmp_path / "conversations.sqlite")
+    await chat(build_app(SQLiteSaver(path)), "conv-1", "first")
+
+    restarted = SQLiteSaver(path)
+    result = await chat(build_app(restarted), "conv-1", "second")
+
+    assert [m.content for m in result["messages"]] == ["first", "echo first", "second", "echo second"]
+    assert restarted.restored == 1
+
+
+async def test_sqlite_workers_see_each_others_turns(tmp_path):
+    """A worker with a stale copy reloads the newer checkpoint from the file"""
+    path = str(tmp_path / "conversations.sqlite")
+    worker_a, worker_b = build_app(SQLiteSaver(path)), build_app(SQLiteSaver(path))
+
+    await chat(worker_a, "conv-1", "one")
+    await chat(worker_b, "conv-1", "two")
+    result = await chat(worker_a, "conv-1", "three")
+
+    assert [m.content for m in result["messages"] if isinstance(m, HumanMessage)] == ["one", "two", "three"]
+
+
+async def test_sqlite_delete_thread_removes_row(tmp_path):
+    """Deleting a thread also removes it from the shared file"""
+    path = str(tmp_path / "conversations.sqlite")
+    saver = SQLiteSaver(path)
+    await chat(build_app(saver), "conv-1", "hi")
+
+    saver.delete_thread("conv-1")
+
+    assert SQLiteSaver(path).get_tuple({"configurable": {"thread_id": "conv-1"}}) is None
+    assert saver.stats()["stored_threads"] == 0
+
+
+async def test_sqlite_writes_run_off_the_event_loop(tmp_path):
+    """The graph's checkpoint reads and writes touch the file in worker threads"""
+    saver = SQLiteSaver(str(tmp_path / "conversations.sqlite"))
+    threads = []
+    load, write = saver._load, saver._write
+
+    def recording_load(*args):
+        threads.append(threading.current_thread())
+        return load(*args)
+
+    def recording_write(*args):
+        threads.append(threading.current_thread())
+        write(*args)
+
+    saver._load, saver._write = recording_load, recording_write
+    await chat(build_app(saver), "conv-1", "hi")
+
+    assert threads and threading.main_thread() not in threads
+
+
+async def test_sqlite_keeps_the_newest_checkpoint(tmp_path):
+    """A write that finishes late does not replace a newer stored checkpoint"""
+    path = str(tmp_path / "conversations.sqlite")
+    saver = SQLiteSaver(path)
+    await chat(build_app(saver), "conv-1", "hi")
+    newest = saver._load("conv-1", "")
+
+    saver._write("conv-1", "", "0", ("json", b"{}"))
+
+    assert saver._load("conv-1", "") == newest
+
+
+def test_anonymous_requests_get_their_own_conversation():
+    """Missing or legacy "default" ids are replaced by a fresh one"""
+    first = ChatRequest(query="hi").conversation_id
+    second = ChatRequest(query="hi", conversation_id="default").conversation_id
+
+    assert first.startswith("conv_") and second.startswith("conv_")
+    assert first != second
+    assert ChatRequest(query="hi", conversation_id=first).conversation_id == first
+
+
+async def test_visitors_sharing_a_client_chosen_id_do_not_share_history():
+    """Ids the server did not issue start separate conversations"""
+    app = build_app(BoundedMemorySaver())
+    alice = ChatRequest(query="my secret", conversation_id="frontend_chat").conversation_id
+    bob = ChatRequest(query="hello", conversation_id="frontend_chat").conversation_id
+    forged = ChatRequest(query="hello", conversation_id=alice[:-1] + ("1" if alice[-1] == "0" else "0")).conversation_id
+
+    await chat(app, alice, "my secret")
+    result = await chat(app, bob, "hello")
+
+    assert len({alice, bob, forged}) == 3 and "frontend_chat" not in (alice, bob)
+    assert [m.content for m in result["messages"]] == ["hello", "echo hello"]
+    # Alice continues her own conversation with the id she was given
+    result = await chat(app, ChatRequest(query="again", conversation_id=alice).conversation_id, "again")
+    assert [m.content for m in result["messages"]][:2] == ["my secret", "echo my secret"]
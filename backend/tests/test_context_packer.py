@@ -0,0 +1,59 @@
+"""
+Tests for token-budgeted context packing.
+"""
+
+from src.services.context_packer import ContextPacker, TokenCounter
+
+
+def estimating_counter() -> TokenCounter:
+    counter = TokenCounter("gpt-4o-mini")
+    counter.encoding = None  # deterministic 4 chars per token
+    return counter
+
+
+def doc(doc_id, text, similarity, **metadata):
+    return {"id": doc_id, "text": text, "similarity": similarity, "metadata": metadata}
+
+
+def test_highest_similarity_first_and_metadata_whitelisted():
+    """Documents are ordered by similarity and only allowed keys are shown"""
+    packer = ContextPacker(estimating_counter(), max_tokens=500, metadata_keys=["category"])
+    context = packer.pack([
+        doc("a", "I use React", 0.5, category="skills", internal_id="x1"),
+        doc("b", "I use Python", 0.9, category="skills", topic="python"),
+    ])
+
+    assert context.index("I use Python") < context.index("I use React")
+    assert "category: skills" in context
+    assert "internal_id" not in context and "topic" not in context
+
+
+def test_overlapping_chunks_are_deduplicated():
+    """A chunk mostly contained in a better one is skipped"""
+    text = "I have worked with Python for five years building FastAPI backends and LangGraph agents"
+    packer = ContextPacker(estimating_counter(), max_tokens=500)
+    context = packer.pack([
+        doc("a", text, 0.9),
+        doc("b", text[:60], 0.8),
+        doc("c", "I live in Sweden", 0.7),
+    ])
+
+    assert context.count("I have worked with Python") == 1
+    assert "I live in Sweden" in context
+
+
+def test_budget_truncates_then_drops_lowest_similarity():
+    """The prompt never exceeds the budget; low-ranked documents go first"""
+    counter = estimating_counter()
+    long_text = "word " * 200
+    packer = ContextPacker(counter, max_tokens=120, min_truncated_tokens=16)
+    context = packer.pack([
+        doc("top", "Most relevant fact", 0.9),
+        doc("long", long_text, 0.8),
+        doc("low", "Least relevant fact", 0.1),
+    ])
+
+    assert counter.count(context) <= 120
+    assert "Most relevant fact" in context
+    assert context.rstrip().endswith("…")
+    assert "Least relevant fact" not in context
@@ -0,0 +1,126 @@
+"""
+Tests for sliding-window conversation memory.
+"""
+
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.services.context_packer import TokenCounter
+from src.services.conversation_memory import ConversationMemory
+
+
+class SummaryLLM:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def ainvoke(self, messages, config=None):
+        self.calls.append(messages)
+        if self.fail:
+            raise TimeoutError("slow")
+        return AIMessage(content=f"summary {len(self.calls)}")
+
+
+def estimate_counter():
+    counter = TokenCounter("gpt-4o-mini")
+    counter.encoding = None
+    return counter
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages += [
+            SystemMessage(content="Query analysis: retrieval needed"),
+            HumanMessage(content=f"question {i}", id=f"q{i}"),
+            AIMessage(content=f"answer {i}", id=f"a{i}")
+        ]
+    return messages
+
+
+def test_build_keeps_recent_turns_and_summary():
+    """The window holds the last turns verbatim after the summary"""
+    memory = ConversationMemory(SummaryLLM(), estimate_counter(), window_turns=2)
+
+    history = memory.build(conversation(5), "visitor asked about Python")
+
+    assert history[0].content == "Summary of the earlier conversation: visitor asked about Python"
+    assert [m.content for m in history[1:]] == ["question 3", "answer 3", "question 4", "answer 4"]
+
+
+def test_build_respects_token_budget():
+    """Turns that do not fit the budget are left out of the window"""
+    memory = ConversationMemory(SummaryLLM(), estimate_counter(), window_turns=3, max_tokens=6)
+
+    history = memory.build(conversation(3), None)
+
+    assert [m.content for m in history] == ["question 2", "answer 2"]
+
+
+async def test_update_folds_only_turns_leaving_the_window():
+    """Each turn is summarized once, extending the previous summary"""
+    llm = SummaryLLM()
+    memory = ConversationMemory(llm, estimate_counter(), window_turns=2)
+
+    assert await memory.update(conversation(2), None, None) == (None, None)
+    assert llm.calls == []
+
+    summary, through = await memory.update(conversation(3), None, None)
+    assert (summary, through) == ("summary 1", "a0")
+
+    summary, through = await memory.update(conversation(4), summary, through)
+    assert (summary, through) == ("summary 2", "a1")
+    prompt = llm.calls[-1][1].content
+    assert "summary 1" in prompt
+    assert "question 1" in prompt and "question 0" not in prompt
+
+
+async def test_failed_summary_keeps_previous_state():
+    """A failed summary call is retried on the next turn instead of losing turns"""
+    memory = ConversationMemory(SummaryLLM(fail=True), estimate_counter(), window_turns=1)
+
+    assert await memory.update(conversation(3), "old", "a0") == ("old", "a0")
+
+
+async def test_disabled_memory_sends_no_history():
+    """window_turns=0 turns memory off"""
+    llm = SummaryLLM()
+    memory = ConversationMemory(llm, estimate_counter(), window_turns=0)
+
+    assert memory.build(conversation(4), "summary") == []
+    assert await memory.update(conversation(4), None, None) == (None, None)
+    assert llm.calls == []
+
+
+async def test_background_update_is_collected_on_next_turn():
+    """The fold runs after the answer and is applied when the next turn starts"""
+    llm = SummaryLLM()
+    memory = ConversationMemory(llm, estimate_counter(), window_turns=2)
+
+    memory.schedule_update("conv-1", conversation(3), None, None)
+    assert memory.collect("conv-1", None, None) == (None, None)
+
+    await asyncio.sleep(0)
+    assert memory.collect("conv-1", None, None) == ("summary 1", "a0")
+    assert memory.collect("conv-1", "summary 1", "a0") == ("summary 1", "a0")
+
+
+async def test_outdated_background_update_is_discarded():
+    """A fold started from an older cursor does not overwrite newer state"""
+    memory = ConversationMemory(SummaryLLM(), estimate_counter(), window_turns=2)
+
+    memory.schedule_update("conv-1", conversation(3), None, None)
+    await asyncio.sleep(0)
+
+    assert memory.collect("conv-1", "newer", "a1") == ("newer", "a1")
+
+
+def test_growing_summary_does_not_shrink_the_window():
+    """The window budget excludes the summary, so build and update agree on the window"""
+    memory = ConversationMemory(SummaryLLM(), estimate_counter(), window_turns=3, max_tokens=10)
+
+    without = memory.build(conversation(3), None)
+    with_summary = memory.build(conversation(3), "a long summary " * 20)
+
+    assert [m.content for m in with_summary[1:]] == [m.content for m in without]
@@ -0,0 +1,82 @@
+"""
+Offline tests for the embedding micro-batcher.
+"""
+
+import asyncio
+
+import pytest
+
+from src.config import settings
+from src.services.embedding_batcher import EmbeddingBatcher
+from src.services.embeddings import EmbeddingService
+
+
+class RecordingEmbedder:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("openai down")
+        return [[float(len(text))] for text in texts]
+
+
+async def test_concurrent_requests_share_one_call():
+    """Requests inside the window go out as one de-duplicated batch"""
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, window_ms=5, max_batch_size=10)
+
+    results = await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "a", "ccc"]))
+
+    assert results == [[1.0], [2.0], [1.0], [3.0]]
+    assert embedder.calls == [["a", "bb", "ccc"]]
+    assert batcher.stats()["deduplicated"] == 1
+
+
+async def test_max_batch_size_flushes_early():
+    """A full batch is sent without waiting for the window"""
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, window_ms=10_000, max_batch_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.embed("x"), batcher.embed("yy")), timeout=1
+    )
+    assert results == [[1.0], [2.0]]
+
+
+async def test_in_flight_text_is_joined():
+    """A text already being embedded is not sent again"""
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, window_ms=1, max_batch_size=10)
+
+    first = asyncio.create_task(batcher.embed("same"))
+    await asyncio.sleep(0.005)
+    second = await batcher.embed("same")
+
+    assert await first == second
+    assert embedder.calls == [["same"]]
+
+
+async def test_errors_reach_every_waiter():
+    """A failed batch raises in all callers"""
+    batcher = EmbeddingBatcher(RecordingEmbedder(fail=True), window_ms=1)
+
+    results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    with pytest.raises(RuntimeError):
+        await batcher.embed("c")
+
+
+def test_each_embedding_service_owns_its_batcher(monkeypatch):
+    """A rebuilt service sends through its own client and model, not the first one's"""
+    first = EmbeddingService()
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-3-large")
+    second = EmbeddingService()
+
+    assert first.batcher is not second.batcher
+    assert second.batcher.embed_many == second.embeddings.aembed_documents
+    assert second.embeddings.model == second.model == "text-embedding-3-large"
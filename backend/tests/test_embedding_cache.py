@@ -0,0 +1,52 @@
+"""
+Offline tests for the query embedding cache.
+"""
+
+from src.services.embedding_cache import QueryEmbeddingCache
+
+
+def test_normalized_text_shares_entry():
+    """Case and whitespace differences hit the same entry, models do not"""
+    cache = QueryEmbeddingCache()
+    cache.set("small", "What is your  tech stack?", [0.5, 0.25])
+
+    assert cache.get("small", "  what is your tech STACK? ") == [0.5, 0.25]
+    assert cache.get("large", "what is your tech stack?") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_by_count_and_bytes():
+    """Least recently used entries are evicted to honour both bounds"""
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.set("m", "a", [1.0])
+    cache.set("m", "b", [2.0])
+    cache.get("m", "a")
+    cache.set("m", "c", [3.0])
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+    small = QueryEmbeddingCache(max_bytes=200)
+    for i in range(10):
+        small.set("m", str(i), [0.0] * 8)
+    assert small.stats()["cache_bytes"] <= 200
+    assert small.get("m", "9") is not None
+
+
+def test_ttl_expiry():
+    """Expired entries are treated as misses"""
+    cache = QueryEmbeddingCache(ttl=-1)
+    cache.set("m", "a", [1.0])
+    assert cache.get("m", "a") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """A new cache instance is warmed from the SQLite file"""
+    path = str(tmp_path / "embeddings.sqlite")
+    QueryEmbeddingCache(path=path).set("m", "hej", [0.25, 0.5])
+
+    restarted = QueryEmbeddingCache(path=path)
+    assert restarted.get("m", "Hej") == [0.25, 0.5]
+    assert restarted.stats()["disk_hits"] == 1
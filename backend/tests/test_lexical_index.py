@@ -0,0 +1,107 @@
+"""
+Tests for the BM25 index and hybrid search.
+"""
+
+from src.services.cached_vector_store import CachedVectorStore
+from src.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from src.services.vector_cache_sync import DocumentChange
+from tests.conftest import FakeFirebaseStore
+
+
+def make_store(collection, embeddings) -> CachedVectorStore:
+    # A keyword that embeds far away from the only document mentioning it
+    collection.docs["k8s"] = {
+        "text": "Deployed the services on Kubernetes", "embedding": [0.0, 0.2, 1.0],
+        "metadata": {"category": "projects"}
+    }
+    embeddings.vectors["kubernetes"] = [1.0, 0.0, 0.0]
+    return CachedVectorStore(
+        firebase_store=FakeFirebaseStore(collection),
+        embedding_service=embeddings,
+        snapshot_path=None
+    )
+
+
+def test_tokenize_swedish_and_english():
+    """Stopwords are dropped and inflections share a stem"""
+    assert tokenize("Berätta om dina projekt") == ["projekt"]
+    assert tokenize("Projekten och erfarenheterna") == ["projekt", "erfaren"]
+    assert tokenize("What are your Python skills?") == ["python", "skill"]
+    assert tokenize("Python-utvecklare på Kubernetes") == ["python", "utveckl", "kubernet"]
+
+
+def test_index_follows_swap_remove():
+    """Rows and document statistics stay correct when rows move"""
+    index = BM25Index()
+    index.build([{"text": "Python backend"}, {"text": "React frontend"}, {"text": "Python scripts"}])
+    assert [row for row, _ in index.search("python", 5)] == [0, 2]
+
+    index.remove_row(0)
+    assert [row for row, _ in index.search("python", 5)] == [0]
+    assert [row for row, _ in index.search("react", 5)] == [1]
+    assert index.search("python", 5, rows=[1]) == []
+
+    index.set_row(0, {"text": "Go services"})
+    assert index.search("python", 5) == []
+    assert index.stats()["documents"] == 2
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """A row ranked by both retrievers beats rows ranked by one"""
+    fused = reciprocal_rank_fusion([[1, 2], [3, 2]], k=60)
+    assert fused[0][0] == 2
+    assert [row for row, _ in fused[1:]] == [1, 3]
+
+
+async def test_hybrid_finds_keyword_below_similarity_threshold(fake_collection, fake_embeddings):
+    """An exact term is retrieved without lowering the threshold"""
+    store = make_store(fake_collection, fake_embeddings)
+
+    vector = await store.search("kubernetes", top_k=3, threshold=0.5, mode="vector")
+    assert [r["id"] for r in vector] == ["python"]
+
+    results, info = await store.search_with_info("kubernetes", top_k=3, threshold=0.5, mode="hybrid")
+    assert info["mode"] == "hybrid"
+    assert {r["id"] for r in results} == {"python", "k8s"}
+    k8s = next(r for r in results if r["id"] == "k8s")
+    assert k8s["lexical_score"] > 0 and k8s["similarity"] < 0.5
+
+    batch, _ = await store.search_batch(["kubernetes"], top_k=3, threshold=0.5, mode="hybrid")
+    assert [r["id"] for r in batch[0]] == [r["id"] for r in results]
+
+
+async def test_hybrid_respects_filter_and_incremental_changes(fake_collection, fake_embeddings):
+    """Keyword hits follow the metadata filter and applied document changes"""
+    store = make_store(fake_collection, fake_embeddings)
+    await store.search("kubernetes", top_k=3, threshold=0.5, mode="hybrid")
+
+    results = await store.search(
+        "kubernetes", top_k=3, threshold=0.5, metadata_filter="category = skills", mode="hybrid"
+    )
+    assert [r["id"] for r in results] == ["python"]
+
+    store.apply_changes([
+        DocumentChange("k8s", None),
+        DocumentChange("helm", {"text": "Kubernetes clusters with Helm", "embedding": [0.0, 1.0, 0.0]}),
+    ])
+
+    results = await store.search("kubernetes", top_k=3, threshold=0.5, mode="hybrid")
+    assert {r["id"] for r in results} == {"python", "helm"}
+    assert store.get_cache_info()["lexical_index"]["documents"] == 4
+
+
+async def test_indexes_are_built_only_when_needed(fake_collection, fake_embeddings):
+    """Vector search keeps no BM25 or metadata copy of the corpus"""
+    store = make_store(fake_collection, fake_embeddings)
+
+    _, info = await store.search_with_info("kubernetes", top_k=3, threshold=0.5)
+    assert info["mode"] == "vector"
+    assert store.lexical_index is None and store.metadata_index is None
+
+    await store.search("kubernetes", top_k=3, threshold=0.5, mode="hybrid")
+    assert store.get_cache_info()["lexical_index"]["documents"] == 4
+    assert store.metadata_index is None
+
+    # Once used, the index is rebuilt with every reload
+    await store._refresh_cache()
+    assert store.lexical_index.stats()["documents"] == 4
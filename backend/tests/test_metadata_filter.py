@@ -0,0 +1,94 @@
+"""
+Tests for metadata filter expressions and the inverted metadata index.
+"""
+
+import pytest
+
+from src.services.cached_vector_store import CachedVectorStore
+from src.services.vector_cache_sync import DocumentChange
+from src.services.metadata_filter import MetadataIndex, parse_filter
+from src.models import SearchRequest
+from tests.conftest import FakeFirebaseStore
+
+
+def test_parse_filter_expressions():
+    """in-lists, equality, quotes and and-clauses are understood"""
+    parsed = parse_filter("category in [Skills, 'experience'] and topic = \"python\"")
+
+    assert dict(parsed.conditions) == {
+        "category": frozenset({"skills", "experience"}),
+        "topic": frozenset({"python"})
+    }
+    assert parsed.matches({"category": "Experience", "topic": "python"})
+    assert not parsed.matches({"category": "skills", "topic": "react"})
+    assert parse_filter("tags = fastapi").matches({"tags": ["python", "FastAPI"]})
+
+
+@pytest.mark.parametrize("expression", ["category", "category in skills", "category in []", "= skills"])
+def test_malformed_filters_are_rejected(expression):
+    """Malformed expressions raise, and the API turns them into validation errors"""
+    with pytest.raises(ValueError):
+        parse_filter(expression)
+    with pytest.raises(ValueError):
+        SearchRequest(query="python", filter=expression)
+
+
+def test_index_follows_swap_remove():
+    """Rows stay correct when the last row is moved into a removed one"""
+    index = MetadataIndex()
+    index.build([
+        {"metadata": {"category": "skills"}},
+        {"metadata": {"category": "contact"}},
+        {"metadata": {"category": "skills", "tags": ["react"]}},
+    ])
+    skills = parse_filter("category = skills")
+    assert index.rows(skills).tolist() == [0, 2]
+
+    index.remove_row(0)
+    assert index.rows(skills).tolist() == [0]
+    assert index.rows(parse_filter("tags = react")).tolist() == [0]
+
+    index.set_row(0, {"category": "projects"})
+    assert index.rows(skills).tolist() == []
+    assert index.stats() == {"category": 2}
+
+
+async def test_filtered_search_scores_only_matching_rows(fake_collection, fake_embeddings):
+    """Documents outside the filter are never returned, however similar"""
+    store = CachedVectorStore(
+        firebase_store=FakeFirebaseStore(fake_collection),
+        embedding_service=fake_embeddings,
+        snapshot_path=None
+    )
+
+    assert [r["id"] for r in await store.search("linkedin", top_k=3, threshold=0.5)] == ["contact"]
+    results, info = await store.search_with_info(
+        "linkedin", top_k=3, threshold=0.5, metadata_filter="category = skills"
+    )
+    assert results == []
+    assert info["filtered_rows"] == 2
+
+    batch, info = await store.search_batch(
+        ["backend", "frontend"], top_k=3, threshold=0.05, metadata_filter="category in [skills]"
+    )
+    assert [[r["id"] for r in results] for results in batch] == [["python", "react"], ["react", "python"]]
+    assert info["filtered_rows"] == 2
+
+
+async def test_filter_sees_incremental_changes(fake_collection, fake_embeddings):
+    """Applied document changes update the metadata index in place"""
+    store = CachedVectorStore(
+        firebase_store=FakeFirebaseStore(fake_collection),
+        embedding_service=fake_embeddings,
+        snapshot_path=None
+    )
+    await store.search("linkedin", top_k=1, threshold=0.5)
+
+    store.apply_changes([
+        DocumentChange("python", None),
+        DocumentChange("github", {"text": "GitHub", "embedding": [0.0, 0.1, 1.0], "metadata": {"category": "contact"}}),
+    ])
+
+    results = await store.search("linkedin", top_k=3, threshold=0.5, metadata_filter="category = contact")
+    assert [r["id"] for r in results] == ["contact", "github"]
+    assert store.metadata_index.rows(parse_filter("category = skills")).tolist() == [1]
@@ -0,0 +1,78 @@
+"""
+Tests for cache-friendly prompt layout and token usage reporting.
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.services.llm_usage import PROMPT_CACHE_MIN_TOKENS, record_usage, start_usage_tracking
+from src.services.query_analyzer import QueryAnalyzer
+from src.services.response_generator import ResponseGenerator
+
+
+class RecordingLLM:
+    model_name = "gpt-4o-mini"
+
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        return AIMessage(
+            content="answer",
+            usage_metadata={
+                "input_tokens": 1200, "output_tokens": 40, "total_tokens": 1240,
+                "input_token_details": {"cache_read": 1024}
+            }
+        )
+
+
+async def test_static_prefix_is_identical_and_variables_come_last():
+    """The system prompt never changes and the question ends the prompt"""
+    llm = RecordingLLM()
+    generator = ResponseGenerator(llm)
+
+    await generator.generate("What is your stack?", [{"id": "a", "text": "Python", "similarity": 0.9}])
+    await generator.generate("Var bor du?", [])
+
+    first, second = llm.calls
+    assert first[0].content == second[0].content == ResponseGenerator.SYSTEM_PROMPT
+    assert first[1].content.endswith("USER QUESTION: What is your stack?")
+    assert second[1].content.endswith("USER QUESTION: Var bor du?")
+    assert "Python" in first[1].content
+
+
+async def test_usage_is_totalled_per_request():
+    """Cached prompt tokens from every call add up for the request"""
+    usage = start_usage_tracking()
+    generator = ResponseGenerator(RecordingLLM())
+
+    await generator.generate("q1", [])
+    record_usage(AIMessage(content="yes", response_metadata={"token_usage": {
+        "prompt_tokens": 300, "completion_tokens": 1, "prompt_tokens_details": {"cached_tokens": 0}
+    }}), "query_analysis")
+
+    assert usage == {"llm_calls": 2, "input_tokens": 1500, "cached_input_tokens": 1024, "output_tokens": 41}
+
+
+async def test_history_sits_between_system_prompt_and_question():
+    """Conversation history follows the cached prefix and precedes the question"""
+    llm = RecordingLLM()
+    history = [HumanMessage(content="What is your stack?"), AIMessage(content="Python")]
+
+    await ResponseGenerator(llm).generate("And for the frontend?", [], history=history)
+
+    messages = llm.calls[0]
+    assert messages[0].content == ResponseGenerator.SYSTEM_PROMPT
+    assert messages[1:3] == history
+    assert messages[3].content.endswith("USER QUESTION: And for the frontend?")
+
+
+def test_static_prefixes_report_whether_they_can_be_cached():
+    """Both static prompts are measured against the provider's caching minimum"""
+    generator = ResponseGenerator(RecordingLLM())
+    analyzer = QueryAnalyzer(RecordingLLM())
+
+    tokens = generator.packer.counter.count(ResponseGenerator.SYSTEM_PROMPT)
+    assert generator.prefix_cacheable == (tokens >= PROMPT_CACHE_MIN_TOKENS)
+    # A yes/no classification is not worth padding to the minimum
+    assert analyzer.prefix_cacheable is False
@@ -0,0 +1,73 @@
+"""
+Tests for local re-ranking of retrieval candidates.
+"""
+
+from src.config import settings
+from src.core.nodes import RetrievalNode
+from src.services.reranker import LocalReranker
+
+
+def candidate(doc_id, text, similarity, **metadata):
+    return {"id": doc_id, "text": text, "similarity": similarity, "metadata": metadata}
+
+
+def test_lexical_overlap_promotes_exact_terms():
+    """A candidate containing the query terms overtakes a slightly more similar one"""
+    reranker = LocalReranker(mmr_lambda=1.0)
+    candidates = [
+        candidate("react", "React and TypeScript", 0.80),
+        candidate("docker", "Docker images for CI", 0.79),
+        candidate("k8s", "Deployed on Kubernetes", 0.75),
+    ]
+
+    selected, report = reranker.rerank("Har du jobbat med Kubernetes?", candidates, top_k=2)
+
+    assert [doc["id"] for doc in selected] == ["k8s", "react"]
+    assert selected[0]["score"] == selected[0]["rerank_score"] > selected[1]["score"]
+    assert report.rank_changes == [("k8s", 3, 1), ("react", 1, 2)]
+    assert report.promoted == ["k8s"]
+    assert report.dropped == ["docker"]
+    assert report.elapsed_ms >= 0
+
+
+def test_mmr_skips_near_duplicates():
+    """With diversity on, a repeated fact gives way to a new one"""
+    candidates = [
+        candidate("a", "Python backend with FastAPI and PostgreSQL", 0.90),
+        candidate("b", "Python backend with FastAPI and PostgreSQL services", 0.89),
+        candidate("c", "Led a team of four developers", 0.70),
+    ]
+
+    relevance_only, _ = LocalReranker(lexical_weight=0.0, mmr_lambda=1.0).rerank("experience", candidates, 2)
+    diverse, _ = LocalReranker(lexical_weight=0.0, mmr_lambda=0.5).rerank("experience", candidates, 2)
+
+    assert [doc["id"] for doc in relevance_only] == ["a", "b"]
+    assert [doc["id"] for doc in diverse] == ["a", "c"]
+
+
+def test_metadata_boosts():
+    """Configured field=value boosts are added to the relevance"""
+    reranker = LocalReranker(mmr_lambda=1.0, metadata_boosts={"category=Experience": 0.1})
+    candidates = [candidate("skill", "Go", 0.80, category="skills"), candidate("job", "Go", 0.75, category="experience")]
+
+    selected, _ = reranker.rerank("go", candidates, top_k=2)
+
+    assert [doc["id"] for doc in selected] == ["job", "skill"]
+    assert reranker.stats()["runs"] == 1
+
+
+async def test_retrieval_node_over_fetches_and_keeps_top_k(monkeypatch):
+    """The node asks for the reranker's candidate count and passes on max_search_results"""
+    class Store:
+        async def search(self, query, top_k=None, threshold=None, **kwargs):
+            self.top_k = top_k
+            return [candidate(f"doc{i}", f"text {i}", 0.9 - i / 100) for i in range(top_k)]
+
+    monkeypatch.setattr(settings, "max_search_results", 3)
+    store = Store()
+    node = RetrievalNode(store, LocalReranker(candidates=12))
+
+    result = await node.process({"query": "text", "messages": []})
+
+    assert store.top_k == 12
+    assert len(result["retrieved_context"]) == 3
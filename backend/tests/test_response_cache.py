@@ -0,0 +1,212 @@
+"""
+Tests for the bounded response cache.
+"""
+
+import sqlite3
+import time
+
+from src.utils.cache import RedisCache, SimpleCache, SQLiteCache
+
+
+def test_lru_eviction_by_entry_count():
+    """The least recently used entry goes first"""
+    cache = SimpleCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound_is_enforced():
+    """Total key and value bytes never exceed max_bytes"""
+    cache = SimpleCache(max_entries=100, max_bytes=200)
+    for i in range(10):
+        cache.set(f"query {i}", "x" * 50)
+
+    assert cache.stats()["cache_bytes"] <= 200
+    assert cache.stats()["cache_size"] == 2
+    assert cache.get("query 9") == "x" * 50
+
+
+def test_expired_entries_are_purged_without_access(monkeypatch):
+    """Expiry removes entries on any operation, counting them once"""
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.cache.time.time", lambda: now[0])
+    cache = SimpleCache()
+    cache.set("short", "S", ttl=10)
+    cache.set("long", "L", ttl=100)
+    cache.set("short", "S2", ttl=50)
+
+    now[0] += 20
+    assert cache.clear_expired() == 0
+    assert cache.get("short") == "S2"
+
+    now[0] += 40
+    cache.set("other", "O")
+    assert cache.stats()["cache_size"] == 2
+    assert cache.stats()["expirations"] == 1
+    assert cache.get("long") == "L"
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Two workers on one file see each other's entries, clears and stats"""
+    path = str(tmp_path / "responses.sqlite")
+    worker_a = SQLiteCache(path, max_entries=2)
+    worker_b = SQLiteCache(path, max_entries=2)
+
+    worker_a.set("What is your stack?", "Python")
+    assert worker_b.get("what is your stack? ") == "Python"
+    assert worker_b.get("Unknown") is None
+
+    worker_b.set("b", "B")
+    # The recency of a lookup reaches the file with the worker's next write
+    worker_a.get("What is your stack?")
+    worker_a.set("c", "C")
+
+    stats = worker_a.stats()
+    assert stats["cache_size"] == 2 and stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert worker_a.get("b") is None
+
+    worker_a.clear()
+    assert worker_b.get("c") is None
+    assert worker_b.stats()["hits"] == 0
+
+
+def test_sqlite_cache_reads_do_not_wait_for_writers(tmp_path):
+    """A lookup is served while another worker holds the write lock"""
+    path = str(tmp_path / "responses.sqlite")
+    cache = SQLiteCache(path, flush_interval=0)
+    cache.set("stack", "Python")
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    started = time.monotonic()
+    assert cache.get("stack") == "Python"
+    assert cache.get("unknown") is None
+    assert time.monotonic() - started < 1
+    writer.execute("COMMIT")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_sqlite_cache_expires_entries(tmp_path, monkeypatch):
+    """Expired rows are not served and are removed on the next write"""
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.cache.time.time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "responses.sqlite"))
+    cache.set("short", "S", ttl=10)
+
+    now[0] += 11
+    assert cache.get("short") is None
+    cache.set("other", "O")
+    assert cache.stats()["expirations"] == 1
+
+
+class FakeRedis:
+    """Stand-in for the subset of the Redis protocol the cache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode("utf-8")
+        self.expiry[key] = ex
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode("utf-8")] = fields.get(field.encode("utf-8"), 0) + amount
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [k.encode("utf-8") for k in [*self.values, *self.hashes] if k.startswith(prefix)]
+
+    def delete(self, *keys):
+        for key in keys:
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+
+
+def test_redis_cache_against_stand_in():
+    """Entries carry a server-side TTL and stats are kept in Redis"""
+    server = FakeRedis()
+    cache = RedisCache(server)
+
+    cache.set("What is your stack?", "Python", ttl=60)
+    assert RedisCache(server).get("WHAT IS YOUR STACK?") == "Python"
+    assert cache.get("missing") is None
+    assert list(server.expiry.values()) == [60]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["cache_size"] == 1
+
+    cache.clear()
+    assert cache.get("What is your stack?") is None
+    assert cache.stats()["cache_size"] == 0
+
+
+def test_unusable_backend_falls_back_to_memory(monkeypatch):
+    """A misconfigured shared cache is logged and replaced on first use"""
+    from src.utils import cache
+
+    monkeypatch.setattr(cache, "_response_cache", None)
+    monkeypatch.setattr(cache.settings, "response_cache_backend", "sqlite")
+    monkeypatch.setattr(cache.settings, "response_cache_path", None)
+
+    assert isinstance(cache.get_response_cache(), SimpleCache)
+    cache.cache_response("stack", "Python")
+    assert cache.get_cached_response("stack") == "Python"
+
+
+async def test_shared_backend_is_called_off_the_event_loop(monkeypatch, tmp_path):
+    """Async helpers run SQLite lookups and writes in a worker thread"""
+    import threading
+    from src.utils import cache
+
+    shared = SQLiteCache(str(tmp_path / "responses.sqlite"))
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(shared, name)
+        monkeypatch.setattr(
+            shared, name,
+            lambda *args, _method=method: threads.append(threading.current_thread()) or _method(*args)
+        )
+    monkeypatch.setattr(cache, "_response_cache", shared)
+
+    await cache.acache_response("stack", "Python")
+    assert await cache.aget_cached_response("stack") == "Python"
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_redis_client_has_timeouts(monkeypatch):
+    """The Redis client gives up instead of hanging on an unreachable server"""
+    import sys
+    import types
+    from src.utils import cache
+
+    created = {}
+    fake_redis = types.SimpleNamespace(
+        Redis=types.SimpleNamespace(from_url=lambda url, **kwargs: created.update(kwargs) or FakeRedis())
+    )
+    monkeypatch.setitem(sys.modules, "redis", fake_redis)
+    monkeypatch.setattr(cache.settings, "response_cache_redis_timeout", 0.25)
+
+    assert isinstance(cache.create_response_cache("redis"), RedisCache)
+    assert created == {"socket_timeout": 0.25, "socket_connect_timeout": 0.25}
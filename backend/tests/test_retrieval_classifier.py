@@ -0,0 +1,71 @@
+"""
+Tests for the local retrieval classifier and analyzer fallback.
+"""
+
+import numpy as np
+
+from src.services.query_analyzer import LocalQueryAnalyzer
+from src.services.retrieval_classifier import (
+    RetrievalClassifier,
+    load_labeled_queries,
+    load_retrieval_classifier,
+)
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.queries = []
+
+    async def requires_retrieval(self, query):
+        self.queries.append(query)
+        return True, "retrieve"
+
+
+def test_keyword_model_generalizes_to_held_out_queries():
+    """A keyword model trained on the shipped set is accurate on unseen queries"""
+    queries, labels = load_labeled_queries()
+    # Same split as scripts/train_retrieval_classifier.py
+    order = np.random.default_rng(0).permutation(len(queries))
+    cut = int(len(queries) * 0.75)
+    train, test = order[:cut], order[cut:]
+
+    model = RetrievalClassifier.fit(
+        [queries[i] for i in train], [labels[i] for i in train], None, "keywords"
+    )
+    metrics = model.evaluate([queries[i] for i in test], [labels[i] for i in test], None, 0.8)
+
+    assert metrics["samples"] >= 30
+    assert metrics["accuracy"] >= 0.9
+    assert metrics["confident_accuracy"] >= 0.95
+    assert metrics["coverage"] >= 0.8
+
+
+def test_embedding_features_and_round_trip(tmp_path):
+    """Models with embedding features survive save and load"""
+    queries = ["What is your stack?", "hej", "Your projects", "Tell me a joke"]
+    labels = [True, False, True, False]
+    embeddings = [[1.0, 0.0], [0.0, 1.0], [0.9, 0.1], [0.1, 0.9]]
+    model = RetrievalClassifier.fit(queries, labels, embeddings, "test-model")
+
+    path = str(tmp_path / "classifier.npz")
+    model.save(path)
+    loaded = RetrievalClassifier.load(path)
+
+    assert loaded.use_embedding and loaded.embedding_model == "test-model"
+    assert loaded.predict_proba("Your skills?", [0.95, 0.05]) > 0.5
+    assert loaded.predict_proba("hello", [0.0, 1.0]) < 0.5
+
+
+async def test_local_analyzer_falls_back_when_unsure():
+    """Confident queries skip the LLM, ambiguous ones use it"""
+    fallback = FakeAnalyzer()
+    analyzer = LocalQueryAnalyzer(load_retrieval_classifier(), fallback, min_confidence=0.8)
+
+    assert await analyzer.requires_retrieval("Vilka ramverk använder du?") == (True, "retrieve")
+    assert await analyzer.requires_retrieval("hej") == (False, "direct answer")
+    assert fallback.queries == []
+
+    await analyzer.requires_retrieval("Tell me about Peter")
+    assert fallback.queries == ["Tell me about Peter"]
+    assert analyzer.stats()["local_decisions"] == 2
+    assert analyzer.stats()["llm_fallbacks"] == 1
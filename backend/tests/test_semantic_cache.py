@@ -0,0 +1,136 @@
+"""
+Tests for the semantic response cache tier.
+"""
+
+import pytest
+
+from src.api.routes import chat
+from src.models import ChatRequest
+from src.services import semantic_cache
+from src.services.cached_vector_store import CachedVectorStore
+from src.services.semantic_cache import SemanticResponseCache
+from src.services.vector_cache_sync import DocumentChange
+from src.utils.cache import clear_cache
+from tests.conftest import FakeEmbeddingService, FakeFirebaseStore
+
+
+def test_near_duplicate_query_hits():
+    """A query above the threshold gets the closest cached answer"""
+    cache = SemanticResponseCache(max_entries=4, threshold=0.95, ttl=60)
+    cache.set([1.0, 0.0, 0.0], "What's your tech stack?", "Python", ["python"])
+    cache.set([0.0, 1.0, 0.0], "How do I contact you?", "LinkedIn", ["contact"])
+
+    hit = cache.get([0.99, 0.05, 0.0])
+    assert hit.entry.response == "Python"
+    assert hit.entry.retrieved_ids == ["python"]
+    assert hit.similarity > 0.95
+
+    assert cache.get([0.7, 0.7, 0.0]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expired_and_evicted_entries_do_not_match():
+    """TTL and the entry bound both remove answers"""
+    cache = SemanticResponseCache(max_entries=2, threshold=0.9, ttl=60)
+    cache.set([1.0, 0.0], "a", "A")
+    cache.set([0.0, 1.0], "b", "B")
+    cache.set([-1.0, 0.0], "c", "C")
+
+    assert cache.get([1.0, 0.0]) is None
+    assert cache.get([0.0, 1.0]).entry.response == "B"
+
+    cache.created_at[:] -= 120
+    assert cache.get([0.0, 1.0]) is None
+
+
+@pytest.fixture
+def semantic(monkeypatch):
+    cache = SemanticResponseCache(max_entries=8, threshold=0.95, ttl=60)
+    monkeypatch.setattr(semantic_cache, "_semantic_response_cache", cache)
+    clear_cache()
+    yield cache
+    clear_cache()
+
+
+async def test_chat_serves_near_duplicates_without_agent(monkeypatch, semantic):
+    """Second phrasing of a question is answered from the semantic tier"""
+    embeddings = FakeEmbeddingService({
+        "What's your tech stack?": [1.0, 0.0, 0.0],
+        "what is your techstack": [0.98, 0.02, 0.0],
+    })
+    runs = 0
+
+    async def fake_run_agent(query, conversation_id, user_id, additional_context):
+        nonlocal runs
+        runs += 1
+        return {"response": "Python and FastAPI", "conversation_id": conversation_id,
+                "retrieved_context": [{"id": "python", "text": "Python", "similarity": 0.9}]}
+
+    monkeypatch.setattr(chat, "run_agent", fake_run_agent)
+    monkeypatch.setattr(chat, "_embed_query", embeddings.embed_text)
+    recorded = []
+
+    async def no_history(conversation_id):
+        return False
+
+    async def fake_record_turn(query, response, conversation_id):
+        recorded.append((conversation_id, query))
+
+    monkeypatch.setattr(chat, "has_conversation_history", no_history)
+    monkeypatch.setattr(chat, "record_turn", fake_record_turn)
+
+    first = await chat.chat(ChatRequest(query="What's your tech stack?"))
+    second = await chat.chat(ChatRequest(query="what is your techstack"))
+
+    assert runs == 1
+    assert first.response == second.response == "Python and FastAPI"
+    assert semantic.stats()["hits"] == 1
+    # The cached answer still becomes part of the second conversation
+    assert recorded == [(second.conversation_id, "what is your techstack")]
+
+
+async def test_follow_up_questions_bypass_response_caches(monkeypatch, semantic):
+    """Answers in a conversation with history are neither served from nor stored in the caches"""
+    embeddings = FakeEmbeddingService({"tell me more": [1.0, 0.0, 0.0]})
+    runs = []
+
+    async def fake_run_agent(query, conversation_id, user_id, additional_context):
+        runs.append(conversation_id)
+        return {"response": f"more for {conversation_id}", "conversation_id": conversation_id,
+                "retrieved_context": []}
+
+    async def has_history(conversation_id):
+        return True
+
+    monkeypatch.setattr(chat, "run_agent", fake_run_agent)
+    monkeypatch.setattr(chat, "_embed_query", embeddings.embed_text)
+    monkeypatch.setattr(chat, "has_conversation_history", has_history)
+
+    first = await chat.chat(ChatRequest(query="tell me more"))
+    second = await chat.chat(ChatRequest(query="tell me more"))
+
+    assert runs == [first.conversation_id, second.conversation_id]
+    assert second.response == f"more for {second.conversation_id}" != first.response
+    assert semantic.stats()["cache_size"] == 0
+
+
+async def test_document_changes_invalidate_semantic_tier(fake_collection, fake_embeddings, semantic):
+    """Applied changes and reloads with a different corpus drop cached answers"""
+    store = CachedVectorStore(
+        firebase_store=FakeFirebaseStore(fake_collection),
+        embedding_service=fake_embeddings
+    )
+    await store._refresh_cache()
+    semantic.set([1.0, 0.0, 0.0], "q", "answer")
+
+    await store._refresh_cache()
+    assert semantic.get([1.0, 0.0, 0.0]) is not None
+
+    fake_collection.docs["python"]["updated_at"] = "2026-01-01T00:00:00"
+    await store._refresh_cache()
+    assert semantic.get([1.0, 0.0, 0.0]) is None
+
+    semantic.set([1.0, 0.0, 0.0], "q", "answer")
+    store.apply_changes([DocumentChange("react", None)])
+    assert semantic.get([1.0, 0.0, 0.0]) is None
+    assert semantic.stats()["invalidations"] == 2
@@ -0,0 +1,134 @@
+"""
+Tests for request coalescing of identical in-flight chat queries.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.routes import chat
+from src.models import ChatRequest
+from src.utils.cache import clear_cache, get_cached_response
+from src.utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def no_semantic_cache(monkeypatch):
+    async def no_embedding(query):
+        return None
+
+    monkeypatch.setattr(chat, "_embed_query", no_embedding)
+
+
+@pytest.fixture
+def first_turns(monkeypatch):
+    """Every request opens its conversation; recorded turns are collected"""
+    recorded = []
+
+    async def no_history(conversation_id):
+        return False
+
+    async def fake_record_turn(query, response, conversation_id):
+        recorded.append(conversation_id)
+
+    monkeypatch.setattr(chat, "has_conversation_history", no_history)
+    monkeypatch.setattr(chat, "record_turn", fake_record_turn)
+    return recorded
+
+
+async def test_concurrent_calls_share_one_execution():
+    """Callers with the same key await a single run"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert results == ["answer"] * 5
+    assert calls == 1
+    assert flight.stats() == {"executions": 1, "shared": 4, "abandoned": 0, "in_flight": 0}
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    """Only the last waiter leaving cancels the shared run"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await release.wait()
+        return "answer"
+
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    lonely = asyncio.create_task(flight.do("other", asyncio.Event().wait))
+    await asyncio.sleep(0)
+    lonely.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await lonely
+    await asyncio.sleep(0)
+    assert flight.stats()["abandoned"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_chat_coalesces_identical_queries(monkeypatch, no_semantic_cache, first_turns):
+    """Identical chat queries run the agent once and fill the cache"""
+    clear_cache()
+    runs = 0
+
+    async def fake_run_agent(query, conversation_id, user_id, additional_context):
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return {"response": "Hi!", "retrieved_context": [], "conversation_id": conversation_id}
+
+    monkeypatch.setattr(chat, "run_agent", fake_run_agent)
+    requests = [ChatRequest(query="Which databases have you used?") for _ in range(3)]
+    ids = [request.conversation_id for request in requests]
+
+    responses = await asyncio.gather(*(chat.chat(request) for request in requests))
+
+    assert runs == 1
+    assert [r.response for r in responses] == ["Hi!"] * 3
+    assert [r.conversation_id for r in responses] == ids
+    # The agent ran in the first thread; the others get the turn recorded
+    assert sorted(first_turns) == sorted(ids[1:])
+    assert get_cached_response("which databases have you used?") == "Hi!"
+    clear_cache()
+
+
+async def test_chat_timeout_applies_to_every_waiter(monkeypatch, no_semantic_cache, first_turns):
+    """A timed-out shared run answers 504 to all coalesced requests"""
+    clear_cache()
+
+    async def slow_run_agent(**kwargs):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(chat, "run_agent", slow_run_agent)
+    monkeypatch.setattr(chat.settings, "request_timeout", 0.01)
+
+    results = await asyncio.gather(
+        chat.chat(ChatRequest(query="Slow question")),
+        chat.chat(ChatRequest(query="slow question ")),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, HTTPException) and r.status_code == 504 for r in results)
+    assert chat.get_chat_flight_stats()["in_flight"] == 0
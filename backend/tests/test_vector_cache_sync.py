@@ -0,0 +1,123 @@
+"""
+Offline tests for incremental vector cache synchronization.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from src.services.cached_vector_store import CachedVectorStore
+from src.services.vector_cache_sync import DocumentChange
+from tests.conftest import FakeFirebaseStore
+
+
+def make_store(collection, embeddings, sync_mode) -> CachedVectorStore:
+    return CachedVectorStore(
+        firebase_store=FakeFirebaseStore(collection),
+        embedding_service=embeddings,
+        snapshot_path=None,
+        sync_mode=sync_mode
+    )
+
+
+async def settle():
+    """Let call_soon_threadsafe callbacks run"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_listener_applies_changes_in_place(fake_collection, fake_embeddings):
+    """Inserts, updates and deletes reach the index without a full reload"""
+    store = make_store(fake_collection, fake_embeddings, "listener")
+    await store.search("frontend", top_k=1, threshold=0.5)
+    assert fake_collection.stream_calls == 1
+
+    fake_collection.set("vue", {"text": "Vue", "embedding": [0.1, 1.0, 0.0]})
+    fake_collection.set("react", {"text": "React", "embedding": [1.0, 0.0, 0.0]})
+    fake_collection.delete("python")
+    await settle()
+
+    results = await store.search("frontend", top_k=3, threshold=0.5)
+    assert [r["id"] for r in results] == ["vue"]
+    results = await store.search("backend", top_k=3, threshold=0.5)
+    assert [r["id"] for r in results] == ["react"]
+    assert store.embedding_matrix.shape == (3, 3)
+    assert fake_collection.stream_calls == 1
+
+    await store.stop_sync()
+
+
+async def test_index_grows_past_buffer_capacity(fake_collection, fake_embeddings):
+    """Appends beyond the initial buffer keep every row searchable"""
+    store = make_store(fake_collection, fake_embeddings, "listener")
+    await store.search("linkedin", top_k=1, threshold=0.5)
+
+    for i in range(40):
+        fake_collection.set(f"doc-{i}", {"text": str(i), "embedding": [0.0, 0.0, 1.0]})
+    await settle()
+
+    results = await store.search("linkedin", top_k=50, threshold=0.5)
+    assert len(results) == 41
+    await store.stop_sync()
+
+
+async def test_poller_tracks_watermark_and_deletions(fake_collection, fake_embeddings):
+    """Polling picks up newer updated_at values and reconciles removals"""
+    start = datetime(2024, 1, 1)
+    for i, data in enumerate(fake_collection.docs.values()):
+        data["updated_at"] = start + timedelta(minutes=i)
+
+    store = make_store(fake_collection, fake_embeddings, "poll")
+    await store.search("backend", top_k=1, threshold=0.5)
+    sync = store._sync
+    assert sync.watermark == start + timedelta(minutes=2)
+
+    fake_collection.docs["python"] = {
+        "text": "Python", "embedding": [0.0, 1.0, 0.0], "updated_at": start + timedelta(hours=1)
+    }
+    del fake_collection.docs["contact"]
+
+    changes = sync.poll()
+    assert [c.document_id for c in changes] == ["python"]
+    assert sync.poll() == []
+
+    removals = sync.reconcile()
+    assert [(c.document_id, c.data) for c in removals] == [("contact", None)]
+
+    store.apply_changes(changes + removals)
+    results = await store.search("frontend", top_k=5, threshold=0.5)
+    assert {r["id"] for r in results} == {"python", "react"}
+    await store.stop_sync()
+
+
+async def test_listener_initial_snapshot_keeps_shared_matrix(tmp_path, fake_collection, fake_embeddings):
+    """The first callback re-lists every document; an unchanged cache stays mapped"""
+    store = CachedVectorStore(
+        firebase_store=FakeFirebaseStore(fake_collection),
+        embedding_service=fake_embeddings,
+        snapshot_path=str(tmp_path / "vectors.snapshot"),
+        sync_mode="listener"
+    )
+    await store.search("frontend", top_k=1, threshold=0.5)
+    await settle()
+
+    assert store._matrix_buffer is None
+    assert not store.embedding_matrix.flags["WRITEABLE"]
+    await store.stop_sync()
+
+
+async def test_initial_snapshot_applies_only_differences(fake_collection, fake_embeddings):
+    """Documents changed or removed since the load are applied; the rest are skipped"""
+    store = make_store(fake_collection, fake_embeddings, "ttl")
+    await store.search("frontend", top_k=1, threshold=0.5)
+    applied = []
+    store.apply_changes = applied.extend
+
+    store.reconcile_snapshot([
+        DocumentChange("python", fake_collection.docs["python"]),
+        DocumentChange("react", {**fake_collection.docs["react"], "text": "React 19"}),
+    ])
+
+    assert applied == [
+        DocumentChange("react", {**fake_collection.docs["react"], "text": "React 19"}),
+        DocumentChange("contact", None),
+    ]
@@ -0,0 +1,151 @@
+"""
+Offline tests for the pluggable vector indexes.
+"""
+
+import numpy as np
+
+from src.services.vector_index import FlatIndex, IVFIndex, normalize_rows
+
+
+def clustered_matrix(rows: int = 4000, dim: int = 32, clusters: int = 40) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(clusters, size=rows)] + 0.2 * rng.normal(size=(rows, dim))
+    return normalize_rows(points.astype(np.float32))
+
+
+def test_ivf_recall_against_flat():
+    """IVF top-10 mostly agrees with exact search on clustered data"""
+    matrix = clustered_matrix()
+    flat, ivf = FlatIndex(), IVFIndex(nprobe=8, min_size=100)
+    ivf.build(matrix)
+    assert ivf.stats()["nlist"] == 63
+
+    recalls = []
+    for query in matrix[:50]:
+        exact = {row for row, _ in flat.search(matrix, query, 10)}
+        approx = {row for row, _ in ivf.search(matrix, query, 10)}
+        recalls.append(len(exact & approx) / 10)
+
+    assert np.mean(recalls) > 0.9
+
+
+def test_ivf_incremental_insert_and_delete():
+    """Rows written after build are found; truncated rows are not"""
+    matrix = clustered_matrix(rows=1000)
+    buffer = np.zeros((1001, matrix.shape[1]), dtype=np.float32)
+    buffer[:1000] = matrix
+    ivf = IVFIndex(nprobe=4, min_size=100)
+    ivf.build(matrix)
+
+    buffer[1000] = matrix[5]
+    ivf.set_row(1000, buffer[1000])
+    rows = {row for row, _ in ivf.search(buffer, matrix[5], 2)}
+    assert rows == {5, 1000}
+
+    # Swap-remove row 5: move the last row into its place, then shrink
+    buffer[5] = buffer[1000]
+    ivf.set_row(5, buffer[5])
+    ivf.truncate(1000)
+    results = ivf.search(buffer[:1000], matrix[5], 2)
+    assert results[0][0] == 5
+    assert all(row < 1000 for row, _ in results)
+
+
+def test_ivf_small_corpus_is_exhaustive():
+    """Below min_size the index behaves exactly like flat search"""
+    matrix = clustered_matrix(rows=50)
+    ivf = IVFIndex(min_size=100)
+    ivf.build(matrix)
+
+    assert ivf.stats()["exhaustive"]
+    assert ivf.search(matrix, matrix[3], 5) == FlatIndex().search(matrix, matrix[3], 5)
+
+
+def test_quantized_index_reranks_with_full_precision():
+    """Int8 and binary first passes return exact similarities after re-ranking"""
+    from src.services.quantization import BinaryQuantizer, Int8Quantizer
+    from src.services.vector_index import QuantizedIndex
+
+    matrix = clustered_matrix(rows=2000, dim=64)
+    flat = FlatIndex()
+
+    for quantizer, factor in ((Int8Quantizer(), 2), (BinaryQuantizer(), 8)):
+        index = QuantizedIndex(quantizer, rerank_factor=factor)
+        index.build(matrix)
+
+        recalls = []
+        for query in matrix[:30]:
+            exact = flat.search(matrix, query, 5)
+            approx = index.search(matrix, query, 5)
+            recalls.append(len({r for r, _ in exact} & {r for r, _ in approx}) / 5)
+            # Scores come from the float matrix, not the codes
+            for row, score in approx:
+                assert abs(score - float(np.clip(matrix[row] @ query, 0, 1))) < 1e-6
+
+        assert np.mean(recalls) > 0.9, quantizer.name
+
+    assert index.stats()["code_bytes"] == matrix.shape[0] * matrix.shape[1] // 8
+
+
+def test_quantized_index_incremental_rows():
+    """Rows added after build are encoded and searchable"""
+    from src.services.quantization import Int8Quantizer
+    from src.services.vector_index import QuantizedIndex
+
+    matrix = clustered_matrix(rows=10, dim=16)
+    index = QuantizedIndex(Int8Quantizer())
+    index.set_row(0, matrix[0])
+    index.set_row(1, matrix[1])
+
+    assert index.search(matrix[:2], matrix[1], 1)[0][0] == 1
+    index.truncate(1)
+    assert [row for row, _ in index.search(matrix[:2], matrix[1], 2)] == [0]
+
+
+def test_quantized_index_builds_from_an_empty_collection():
+    """An empty matrix encodes to no rows and later rows can still be added"""
+    from src.services.quantization import BinaryQuantizer, Int8Quantizer
+    from src.services.vector_index import QuantizedIndex
+
+    matrix = clustered_matrix(rows=2, dim=16)
+    for quantizer in (Int8Quantizer(), BinaryQuantizer()):
+        index = QuantizedIndex(quantizer)
+        index.build(np.zeros((0, 0), dtype=np.float32))
+        assert index.codes.shape[0] == 0
+        assert index.stats()["code_bytes"] == 0
+
+        index.set_row(0, matrix[0])
+        index.set_row(1, matrix[1])
+        assert index.search(matrix, matrix[1], 1)[0][0] == 1, quantizer.name
+
+
+def test_flat_batch_search_matches_single_queries():
+    """Chunked matrix-matrix scoring returns the same top-k as one query at a time"""
+    matrix = clustered_matrix(rows=500)
+    queries = matrix[:20]
+    flat = FlatIndex()
+
+    batch = flat.search_batch(matrix, queries, 5, max_scores=2000)
+
+    for pairs, query in zip(batch, queries):
+        single = flat.search(matrix, query, 5)
+        assert [row for row, _ in pairs] == [row for row, _ in single]
+        np.testing.assert_allclose([s for _, s in pairs], [s for _, s in single], rtol=1e-5)
+
+
+async def test_quantized_search_without_codes_uses_exact_path(fake_collection, fake_embeddings):
+    """Before the backfill, one exact scan replaces fetching every uncoded document by id"""
+    from src.services.quantization import Int8Quantizer
+    from src.services.vector_search_engine import VectorSearchEngine
+
+    engine = VectorSearchEngine(fake_embeddings)
+    engine.quantizer = Int8Quantizer()
+
+    results = await engine.execute_quantized_search("backend", fake_collection, 1, 0.5)
+    assert [r["id"] for r in results] == ["python"]
+    assert fake_collection.stream_calls == 1
+
+    # Stays on the exact path without re-reading the codes
+    await engine.execute_quantized_search("backend", fake_collection, 1, 0.5)
+    assert fake_collection.stream_calls == 2
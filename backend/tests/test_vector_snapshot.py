@@ -0,0 +1,95 @@
+"""
+Offline tests for the shared memory-mapped vector snapshot.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from src.services.cached_vector_store import CachedVectorStore
+from src.services.vector_snapshot import VectorSnapshotStore, read_snapshot, write_snapshot
+from tests.conftest import FakeFirebaseStore
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Ids, texts, metadata and the matrix survive a write/map cycle"""
+    path = str(tmp_path / "vectors.snapshot")
+    documents = [
+        {"id": "a", "text": "Hej världen", "metadata": {"category": "personal"},
+         "created_at": datetime(2024, 1, 1)},
+        {"id": "b", "text": "", "metadata": {}},
+    ]
+    matrix = np.array([[1.0, 0.0], [0.6, 0.8]], dtype=np.float32)
+
+    write_snapshot(path, documents, matrix)
+    snapshot = read_snapshot(path)
+
+    assert len(snapshot.documents) == 2
+    assert snapshot.documents[0]["text"] == "Hej världen"
+    assert snapshot.documents[0]["metadata"] == {"category": "personal"}
+    assert snapshot.documents[0]["created_at"] == "2024-01-01T00:00:00"
+    assert snapshot.documents[-1]["id"] == "b"
+    assert not snapshot.matrix.flags["WRITEABLE"]
+    np.testing.assert_array_equal(snapshot.matrix, matrix)
+
+
+def test_acquire_builds_once_per_host(tmp_path):
+    """A second worker maps the fresh file instead of rebuilding"""
+    path = str(tmp_path / "vectors.snapshot")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return [{"id": "a", "text": "x"}], np.ones((1, 3), dtype=np.float32)
+
+    first = VectorSnapshotStore(path).acquire(max_age=60, build=build)
+    second = VectorSnapshotStore(path).acquire(max_age=60, build=build)
+
+    assert len(builds) == 1
+    assert first.created_at == second.created_at
+
+    VectorSnapshotStore(path).invalidate()
+    VectorSnapshotStore(path).acquire(max_age=60, build=build)
+    assert len(builds) == 2
+
+
+async def test_cached_store_searches_snapshot(tmp_path, fake_collection, fake_embeddings):
+    """Workers sharing a snapshot scan Firestore once and search the mapped matrix"""
+    path = str(tmp_path / "vectors.snapshot")
+    workers = [
+        CachedVectorStore(
+            firebase_store=FakeFirebaseStore(fake_collection),
+            embedding_service=fake_embeddings,
+            snapshot_path=path
+        )
+        for _ in range(3)
+    ]
+
+    for worker in workers:
+        results = await worker.search("frontend", top_k=1, threshold=0.5)
+        assert [r["id"] for r in results] == ["react"]
+
+    assert fake_collection.stream_calls == 1
+
+
+async def test_strong_read_rejects_snapshot_older_than_the_request(tmp_path, fake_collection, fake_embeddings):
+    """Without update times a strong read rescans instead of mapping an older snapshot"""
+    path = str(tmp_path / "vectors.snapshot")
+    workers = [
+        CachedVectorStore(
+            firebase_store=FakeFirebaseStore(fake_collection),
+            embedding_service=fake_embeddings,
+            snapshot_path=path
+        )
+        for _ in range(2)
+    ]
+    await workers[0].search("frontend", top_k=1, threshold=0.5)
+    fake_collection.docs["vue"] = {"text": "Vue", "embedding": [0.1, 1.0, 0.0]}
+
+    cached = await workers[1].search("frontend", top_k=3, threshold=0.5)
+    strong, info = await workers[1].search_with_info("frontend", top_k=3, threshold=0.5, consistency="strong")
+
+    assert [r["id"] for r in cached] == ["react"]
+    assert {r["id"] for r in strong} == {"react", "vue"}
+    assert info["served_by"] == "cache_verified"
+    assert fake_collection.stream_calls == 2
@@ -3,7 +3,12 @@ import { IoSend } from 'react-icons/io5';
 import { BeatLoader } from 'react-spinners';
 import { FaTimes } from 'react-icons/fa';
 import profilfoto from '../assets/peter-profile-small.png'; 
-import { sendChatMessage, APIError } from '../utils/api';
+import {
+    sendChatMessage,
+    APIError,
+    getSessionConversationId,
+    saveSessionConversationId
+} from '../utils/api';
 
 interface Message {
     id: number;
@@ -50,9 +55,10 @@ const ChatWindow: React.FC = () => {
         try {
             const data = await sendChatMessage({
                 query: trimmedInput,
-                conversation_id: 'frontend_chat',
+                conversation_id: getSessionConversationId(),
                 user_id: 'web_user'
             });
+            saveSessionConversationId(data.conversation_id);
 
             if (!data.response) {
                 throw new Error("Received an empty response from the server.");
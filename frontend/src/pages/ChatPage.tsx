@@ -31,6 +31,7 @@ const ChatPage: React.FC = () => {
     const [showSuggestions, setShowSuggestions] = useState(true);
     const messagesEndRef = useRef<HTMLDivElement>(null);
     const inputRef = useRef<HTMLInputElement>(null);
+    const conversationIdRef = useRef<string | undefined>(undefined);
 
     useEffect(() => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -60,9 +61,10 @@ const ChatPage: React.FC = () => {
         try {
             const data = await sendChatMessage({
                 query: trimmedInput,
-                conversation_id: `chat_${Date.now()}`,
+                conversation_id: conversationIdRef.current,
                 user_id: 'web_user'
             });
+            conversationIdRef.current = data.conversation_id;
 
             if (!data.response) {
                 throw new Error("Received an empty response from the server.");
@@ -105,6 +105,26 @@ export interface ChatResponse {
   }>;
 }
 
+const CONVERSATION_STORAGE_KEY = 'peterbot_conversation_id';
+
+// The server issues conversation ids; keep this tab's id so follow-up
+// questions continue the same conversation
+export function getSessionConversationId(): string | undefined {
+  try {
+    return sessionStorage.getItem(CONVERSATION_STORAGE_KEY) ?? undefined;
+  } catch {
+    return undefined;
+  }
+}
+
+export function saveSessionConversationId(conversationId: string): void {
+  try {
+    sessionStorage.setItem(CONVERSATION_STORAGE_KEY, conversationId);
+  } catch {
+    // Storage disabled: every question starts a new conversation
+  }
+}
+
 export async function sendChatMessage(request: ChatRequest): Promise<ChatResponse> {
   return apiFetch<ChatResponse>(API_ENDPOINTS.chat, {
     method: 'POST',